@@ -0,0 +1,619 @@
+import asyncio
+import json
+import random
+import struct
+import time
+import weakref
+import zlib
+from typing import Dict, List
+
+from lib.adapters.adapter import Adapter as Default
+from lib.adapters.breaker import PermanentError
+from lib.adapters.cache import Cache
+from lib.adapters.http import Client, HTTPError, multipart
+from lib.adapters.websocket import ConnectionClosed, WebSocket, WebSocketError, connect
+from lib.core.client import Baseclient
+
+# 网关操作码
+# Gateway opcodes
+OP_DISPATCH = 0
+OP_HEARTBEAT = 1
+OP_IDENTIFY = 2
+OP_RESUME = 6
+OP_RECONNECT = 7
+OP_INVALID_SESSION = 9
+OP_HELLO = 10
+OP_HEARTBEAT_ACK = 11
+
+# zlib-stream 中每个完整负载的结尾
+# Suffix ending every complete payload of zlib-stream
+ZLIB_SUFFIX = b'\x00\x00\xff\xff'
+
+# 无法恢复的关闭码, 收到后分片停止
+# Close codes that cannot be recovered from, the shard stops on them
+FATAL_CODES = (4004, 4010, 4011, 4012, 4013, 4014)
+
+# 需要重新鉴权而不能恢复会话的关闭码
+# Close codes that need a new identify instead of resuming the session
+RESET_CODES = (4007, 4009)
+
+# 单条文本消息的最大长度
+# Maximum length of a single text message
+MAX_TEXT = 2000
+
+# 默认订阅: GUILD_MESSAGES | DIRECT_MESSAGES | MESSAGE_CONTENT
+# Default intents: GUILD_MESSAGES | DIRECT_MESSAGES | MESSAGE_CONTENT
+INTENTS = 1 << 9 | 1 << 12 | 1 << 15
+
+
+# Discord 错误
+# Discord error
+class DiscordError(Exception):
+    pass
+
+
+# 针对单个频道或用户的永久错误, 例如 403 无权限或 404 频道不存在, 不重试也不计入熔断器
+# Permanent error of a single channel or user, e.g. 403 missing access or 404 unknown channel,
+# neither retried nor counted by the breaker
+class DiscordRejected(DiscordError, PermanentError):
+    pass
+
+
+# 单个网关分片
+# A single gateway shard
+class Shard:
+    """
+    中文:
+    单个网关分片, 维持一条网关连接并按 HELLO 给出的间隔发送心跳。
+    心跳未被确认时视为连接失效, 以非 1000 关闭码断开并恢复会话; 断线后以 RESUME 从最后的序号继续,
+    网关只补发缺失的事件, 会话失效时才重新 IDENTIFY。
+
+    English:
+    A single gateway shard, keeps one gateway connection and heartbeats at the interval given by HELLO.
+    An unacknowledged heartbeat marks the connection as zombied, it is closed with a non-1000 code and resumed;
+    after a disconnection RESUME continues from the last sequence so the gateway only replays missed events,
+    IDENTIFY is only sent again when the session is invalid.
+    """
+
+    def __init__(
+            self,
+            adapter,
+            shard_id: int,
+            shard_count: int
+    ) -> None:
+        self.adapter = adapter
+        self.shard_id = shard_id
+        self.shard_count = shard_count
+        self.ws = None
+        self.session_id = None
+        self.resume_url = None
+        self.seq = None
+        self.user = { }
+        self.latency = None
+        self.identifies = 0
+        self.resumes = 0
+        self.reconnects = 0
+        self.events = 0
+        self.stopped = None
+        self._acked = True
+        self._sent = 0
+        self._buffer = bytearray()
+
+    # 解压 zlib-stream 消息
+    # Decompress zlib-stream messages
+    def _decode(
+            self,
+            frames: list,
+            inflator
+    ) -> List[dict]:
+        _payloads = []
+        _buffer = self._buffer
+        for _frame in frames:
+            if isinstance(_frame, str):
+                _payloads.append(json.loads(_frame))
+                continue
+            _buffer += _frame
+            if inflator is None:
+                _payloads.append(json.loads(_buffer))
+                _buffer.clear()
+            elif _buffer.endswith(ZLIB_SUFFIX):
+                _payloads.append(json.loads(inflator.decompress(_buffer)))
+                _buffer.clear()
+        return _payloads
+
+    # 按间隔发送心跳
+    # Heartbeat at the interval
+    async def _heartbeat(
+            self,
+            ws: WebSocket,
+            interval: float
+    ) -> None:
+        # 首次心跳按抖动延迟, 避免所有分片同时发送
+        # The first heartbeat is jittered so the shards do not send at once
+        await asyncio.sleep(interval * random.random())
+        while not ws.closed:
+            if not self._acked:
+                await ws.close(struct.pack('!H', 4000))
+                return
+            self._acked = False
+            await self._beat(ws)
+            await asyncio.sleep(interval)
+
+    async def _beat(
+            self,
+            ws: WebSocket
+    ) -> None:
+        self._sent = time.monotonic()
+        try:
+            await ws.send(json.dumps({'op': OP_HEARTBEAT, 'd': self.seq}))
+        except ConnectionClosed:
+            pass
+
+    # 发送 IDENTIFY 或 RESUME
+    # Send IDENTIFY or RESUME
+    async def _login(
+            self,
+            ws: WebSocket
+    ) -> None:
+        _cfg = self.adapter.cfg
+        if self.session_id is not None:
+            self.resumes += 1
+            try:
+                await ws.send(json.dumps({
+                    'op': OP_RESUME,
+                    'd': {'token': _cfg['token'], 'session_id': self.session_id, 'seq': self.seq}
+                }))
+            except ConnectionClosed:
+                pass
+            return
+
+        # 同一时刻只有一个分片鉴权, 间隔结束后才释放锁, 遵守 IDENTIFY 频率限制; 等待期间本分片照常接收事件
+        # Only one shard identifies at a time and the lock is released after the interval, following the
+        # IDENTIFY rate limit; this shard keeps receiving events meanwhile
+        await self.adapter.identify_lock.acquire()
+        try:
+            self.identifies += 1
+            await ws.send(json.dumps({
+                'op': OP_IDENTIFY,
+                'd': {
+                    'token': _cfg['token'],
+                    'intents': _cfg['intents'],
+                    'shard': [self.shard_id, self.shard_count],
+                    'properties': {'os': 'linux', 'browser': 'justrobot', 'device': 'justrobot'}
+                }
+            }))
+        except ConnectionClosed:
+            pass
+        finally:
+            asyncio.get_running_loop().call_later(_cfg['identify_interval'], self.adapter.identify_lock.release)
+
+    # 维持一次网关连接
+    # Keep one gateway connection
+    async def _session(self) -> None:
+        _cfg = self.adapter.cfg
+        _url = self.resume_url if self.session_id is not None and self.resume_url else _cfg['gateway']
+        _query = 'v=10&encoding=json' + ('&compress=zlib-stream' if _cfg['compress'] else '')
+        self.ws = None
+        _ws = await connect(f'{_url.rstrip("/")}/?{_query}', timeout=_cfg['timeout'])
+        self.ws = _ws
+        self._buffer = bytearray()
+        _inflator = zlib.decompressobj() if _cfg['compress'] else None
+        _heartbeat = None
+        _login = None
+        try:
+            while True:
+                _batch = []
+                for _payload in self._decode(await _ws.recv_batch(), _inflator):
+                    _op = _payload.get('op')
+                    if _payload.get('s') is not None:
+                        self.seq = _payload['s']
+                    if _op == OP_DISPATCH:
+                        self.events += 1
+                        _msg = self._dispatch(_payload.get('t'), _payload.get('d') or { })
+                        if _msg is not None:
+                            _batch.append(_msg)
+                    elif _op == OP_HELLO:
+                        self._acked = True
+                        _heartbeat = asyncio.create_task(
+                            self._heartbeat(_ws, _payload['d']['heartbeat_interval'] / 1000)
+                        )
+                        # 等待鉴权名额时仍需读取心跳确认
+                        # Heartbeat acks are still read while waiting for the identify slot
+                        _login = asyncio.create_task(self._login(_ws))
+                    elif _op == OP_HEARTBEAT_ACK:
+                        self._acked = True
+                        self.latency = time.monotonic() - self._sent
+                    elif _op == OP_HEARTBEAT:
+                        await self._beat(_ws)
+                    elif _op == OP_RECONNECT:
+                        await _ws.close(struct.pack('!H', 4000))
+                    elif _op == OP_INVALID_SESSION:
+                        if not _payload.get('d'):
+                            self.session_id = None
+                            self.seq = None
+                        await asyncio.sleep(random.uniform(1, 5))
+                        await _ws.close(struct.pack('!H', 4000))
+                if _batch:
+                    await self.adapter.inbox.put(_batch)
+        finally:
+            for _task in (_heartbeat, _login):
+                if _task is not None:
+                    _task.cancel()
+            await _ws.close(struct.pack('!H', 4000))
+
+    # 将分发事件转换为内建消息
+    # Convert a dispatch event to a builtin message
+    def _dispatch(
+            self,
+            event: str,
+            data: dict
+    ) -> dict:
+        if event == 'READY':
+            self.session_id = data.get('session_id')
+            self.resume_url = data.get('resume_gateway_url')
+            self.user = data.get('user') or { }
+            return None
+        if event != 'MESSAGE_CREATE':
+            return None
+
+        _author = data.get('author') or { }
+        if _author.get('bot') or _author.get('id') == self.user.get('id'):
+            return None
+        _msg = {
+            'seq': data.get('id'),
+            'notice': 'text',
+            'msg': data.get('content', ''),
+            'file': None,
+            'user': str(_author.get('id', '')),
+            'time': str(data.get('timestamp', '')),
+            'account': f'{self.adapter.Adapter.id}:{self.shard_id}'
+        }
+        if data.get('guild_id'):
+            _msg['guild'] = str(data['guild_id'])
+            _msg['channel'] = str(data.get('channel_id'))
+        else:
+            # 私信回复需要私信频道 id
+            # Replying to a direct message needs the DM channel id
+            self.adapter.channels.put(('user', _msg['user']), str(data.get('channel_id')))
+        return _msg
+
+    # 运行分片, 断线后自动恢复
+    # Run the shard, resuming after disconnections
+    async def run(self) -> None:
+        _attempt = 0
+        while True:
+            _begin = time.monotonic()
+            try:
+                await self._session()
+            except (ConnectionClosed, WebSocketError, ConnectionError, OSError, asyncio.TimeoutError, ValueError,
+                    zlib.error) as _error:
+                _code = getattr(self.ws, 'close_code', None)
+                if _code in FATAL_CODES:
+                    self.stopped = _code
+                    await self.adapter.Adapter.log.error(
+                        {
+                            'zh': f'[{self.adapter.Adapter.name}] 分片 {self.shard_id} 已停止, 关闭码: {_code}',
+                            'en': f'[{self.adapter.Adapter.name}] Shard {self.shard_id} stopped, close code: {_code}'
+                        }
+                    )
+                    return
+                if _code in RESET_CODES:
+                    self.session_id = None
+                    self.seq = None
+                await self.adapter.Adapter.log.warn(
+                    {
+                        'zh': f'[{self.adapter.Adapter.name}] 分片 {self.shard_id} 断开: {_code or _error!r}',
+                        'en': f'[{self.adapter.Adapter.name}] Shard {self.shard_id} disconnected: {_code or _error!r}'
+                    }
+                )
+            except Exception as _error:
+                # 意外错误同样按退避重连, 不让分片任务静默退出
+                # Unexpected errors also reconnect with backoff, so the shard task never exits silently
+                await self.adapter.Adapter.log.error(
+                    {
+                        'zh': f'[{self.adapter.Adapter.name}] 分片 {self.shard_id} 意外错误: {_error!r}',
+                        'en': f'[{self.adapter.Adapter.name}] Shard {self.shard_id} unexpected error: {_error!r}'
+                    }
+                )
+            self.reconnects += 1
+            # 稳定运行过的连接立即重连
+            # Connections that ran stably reconnect at once
+            _attempt = 0 if time.monotonic() - _begin > 60 else _attempt + 1
+            await asyncio.sleep(
+                random.uniform(0, min(self.adapter.cfg['reconnect_max_delay'],
+                                      self.adapter.cfg['reconnect_delay'] * 2 ** _attempt)) if _attempt else 0
+            )
+
+    def stats(self) -> dict:
+        return {
+            'shard': [self.shard_id, self.shard_count],
+            'online': self.ws is not None and not self.ws.closed,
+            'session_id': self.session_id,
+            'seq': self.seq,
+            'latency': self.latency,
+            'events': self.events,
+            'identifies': self.identifies,
+            'resumes': self.resumes,
+            'reconnects': self.reconnects,
+            'stopped': self.stopped
+        }
+
+
+# Discord 网关适配器
+# Discord gateway adapter
+# noinspection PyMethodMayBeStatic
+class Adapter:
+    """
+    中文:
+    Discord 网关适配器, 在一个进程内运行多个网关分片, 每个分片注册一个 Baseclient 到 Core。
+    网关连接使用 zlib-stream 传输压缩, 每个连接共用一个解压上下文; 断线后以 RESUME 恢复会话。
+    服务器内的消息对应 channel, 私信对应 user; 回复通过 REST API 发送, 按响应头中的速率限制等待,
+    收到 429 时按 retry_after 暂停后重试; 超过 2000 字符的文本会拆分发送,
+    每次 API 调用都单独限速, 重试时从第一个未发送的分段继续。
+    需要在 adapter.json 中为 discord-adapter 设置 enable 与 token 才会启动。
+
+    配置:
+        token: 机器人令牌
+        intents: 网关订阅
+        shard_count: 分片数, 为 0 时使用网关推荐的分片数
+        gateway: 网关地址, 为空时通过 REST API 获取
+        api: REST API 地址
+        compress: 是否使用 zlib-stream 传输压缩
+        identify_interval: 两次 IDENTIFY 之间的间隔(秒)
+        timeout: 连接与请求超时(秒)
+        pool_size: REST 连接池大小
+        reconnect_delay: 首次重连的退避上限(秒), 之后每次翻倍
+        reconnect_max_delay: 重连退避上限的最大值(秒)
+
+    English:
+    Discord gateway adapter, runs several gateway shards in one process, every shard registers a Baseclient
+    to Core.
+    Gateway connections use zlib-stream transport compression with one inflate context per connection;
+    sessions are resumed with RESUME after disconnections.
+    Guild messages map to channel and direct messages to user; replies are sent through the REST API,
+    waiting on the rate limits in the response headers, and retried after retry_after on 429;
+    texts longer than 2000 characters are split, every API call is paced on its own and retries resume from
+    the first unsent chunk.
+    It only starts once enable and token are set for discord-adapter in adapter.json.
+
+    Config:
+        token: Bot token
+        intents: Gateway intents
+        shard_count: Shard count, the gateway recommendation if 0
+        gateway: Gateway url, fetched through the REST API if empty
+        api: REST API url
+        compress: Whether to use zlib-stream transport compression
+        identify_interval: Interval(seconds) between two IDENTIFY
+        timeout: Connection and request timeout(seconds)
+        pool_size: REST connection pool size
+        reconnect_delay: Backoff cap(seconds) of the first reconnection, doubled every time
+        reconnect_max_delay: Maximum reconnection backoff cap(seconds)
+    """
+
+    def __init__(self) -> None:
+        self.shards: Dict[int, Shard] = { }
+        self.tasks = []
+        self.channels = Cache()
+        self.buckets: Dict[str, float] = { }
+        self.inbox = None
+        self.http = None
+        self.identify_lock = None
+        self.global_until = 0
+        self.rate_limited = 0
+        self.sent = weakref.WeakKeyDictionary()
+        self.cfg = {
+            'token': '',
+            'intents': INTENTS,
+            'shard_count': 0,
+            'gateway': '',
+            'api': 'https://discord.com/api/v10',
+            'compress': True,
+            'identify_interval': 5,
+            'timeout': 30,
+            'pool_size': 8,
+            'reconnect_delay': 1,
+            'reconnect_max_delay': 60
+        }
+        self.Adapter = Default({
+            'name': 'discord-adapter',
+            'id': 'discord',
+            'version': '0.1.0',
+            'enable': False,
+            'rate_limit': 50,
+            'rate_burst': 50,
+            '_start': self._start,
+            '_recv_msg_batch': self._recv_msg_batch,
+            '_send': self._send,
+            'isFriend': self.isFriend
+        })
+
+    async def _start(self) -> None:
+        self.cfg.update(self.Adapter.cfg.get(self.Adapter.name, { }))
+        self.channels = Cache(self.Adapter.entitycache.size)
+        self.inbox = asyncio.Queue(maxsize=self.Adapter.queue_size)
+        self.identify_lock = asyncio.Lock()
+        self.http = Client(self.cfg['pool_size'], self.cfg['timeout'])
+
+        if not self.cfg['gateway'] or not self.cfg['shard_count']:
+            try:
+                _gateway = await self.call('GET', '/gateway/bot')
+            except (DiscordError, HTTPError, ConnectionError, OSError, asyncio.TimeoutError, ValueError) as _error:
+                await self.Adapter.log.error(
+                    {
+                        'zh': f'[{self.Adapter.name}] 获取网关失败: {_error!r}',
+                        'en': f'[{self.Adapter.name}] Failed to get the gateway: {_error!r}'
+                    }
+                )
+                return
+            self.cfg['gateway'] = self.cfg['gateway'] or _gateway.get('url')
+            self.cfg['shard_count'] = self.cfg['shard_count'] or _gateway.get('shards', 1)
+
+        for _shard_id in range(self.cfg['shard_count']):
+            _shard = Shard(self, _shard_id, self.cfg['shard_count'])
+            self.shards[_shard_id] = _shard
+            self._register(_shard)
+            self.tasks.append(asyncio.create_task(_shard.run()))
+        await self.Adapter.log.info(
+            {
+                'zh': f'[{self.Adapter.name}] 正在启动 {self.cfg["shard_count"]} 个分片: {self.cfg["gateway"]}',
+                'en': f'[{self.Adapter.name}] Starting {self.cfg["shard_count"]} shards: {self.cfg["gateway"]}'
+            }
+        )
+
+    # 为分片注册 client
+    # Register a client for a shard
+    def _register(
+            self,
+            shard: Shard
+    ) -> None:
+        _adapter = self.Adapter
+        _uin = {
+            'name': _adapter.name,
+            'id': f'{_adapter.id}:{shard.shard_id}',
+            'version': _adapter.version
+        }
+        _adapter.bot.append(
+            _uin,
+            Baseclient(
+                {
+                    'adapter_name': _adapter.name,
+                    'adapter_id': _uin['id'],
+                    'adapter_version': _adapter.version,
+                    'shard_id': shard.shard_id,
+                    'pickUser': _adapter.pickUser,
+                    'pickGroup': _adapter.pickGroup,
+                    'pickChannel': _adapter.pickChannel,
+                    'pickGuild': _adapter.pickGuild,
+                    'invalidate': _adapter.invalidate,
+                    'call': self.call,
+                    'stats': shard.stats
+                }
+            )
+        )
+
+    async def _recv_msg_batch(self) -> List[dict]:
+        return await self.inbox.get()
+
+    # 调用 REST API
+    # Call the REST API
+    async def call(
+            self,
+            method: str,
+            path: str,
+            data: dict = None,
+            files: Dict[str, tuple] = None,
+            bucket: str = None
+    ) -> object:
+        """
+        中文:
+        调用 REST API 并返回解析后的响应, 按响应头中的剩余次数等待, 收到 429 时暂停 retry_after 秒后重试。
+        :param method: 请求方法。
+        :param path: API 路径。
+        :param data: 请求数据。
+        :param files: 上传的文件, 为空时以 JSON 发送。
+        :param bucket: 速率限制分组, 为空时使用路径。
+        :return: 响应数据。
+
+        English:
+        Call the REST API and return the parsed response, waiting on the remaining count in the response headers,
+        and retried after retry_after seconds on 429.
+        :param method: Request method.
+        :param path: API path.
+        :param data: Request data.
+        :param files: Files to upload, sent as JSON if empty.
+        :param bucket: Rate limit group, the path if empty.
+        :return: Response data.
+        """
+        _bucket = bucket or path
+        _loop = asyncio.get_running_loop()
+        _headers = {'Authorization': f'Bot {self.cfg["token"]}', 'User-Agent': 'DiscordBot (justrobot, 0.1.0)'}
+        if files:
+            _body, _headers['Content-Type'] = multipart({'payload_json': json.dumps(data or { })}, files)
+        elif data is not None:
+            _body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+            _headers['Content-Type'] = 'application/json'
+        else:
+            _body = b''
+
+        while True:
+            _wait = max(self.global_until, self.buckets.get(_bucket, 0)) - _loop.time()
+            if _wait > 0:
+                await asyncio.sleep(_wait)
+            _status, _response_headers, _raw = await self.http.request(
+                method,
+                f'{self.cfg["api"].rstrip("/")}{path}',
+                _body,
+                _headers
+            )
+            _result = json.loads(_raw) if _raw else None
+            if _response_headers.get('x-ratelimit-remaining') == '0':
+                self.buckets[_bucket] = _loop.time() + float(_response_headers.get('x-ratelimit-reset-after', 0))
+            if _status == 429:
+                self.rate_limited += 1
+                _retry_after = float((_result or { }).get('retry_after', 1))
+                if (_result or { }).get('global'):
+                    self.global_until = _loop.time() + _retry_after
+                else:
+                    self.buckets[_bucket] = _loop.time() + _retry_after
+                continue
+            if 400 <= _status < 500:
+                raise DiscordRejected(f'{method} {path}: {_status} {_result}')
+            if _status >= 300:
+                raise DiscordError(f'{method} {path}: {_status} {_result}')
+            return _result
+
+    async def _send(
+            self,
+            message
+    ) -> bool:
+        _e = getattr(message, 'e', None)
+        _kind, _id = _e.target if hasattr(_e, 'target') else (None, None)
+        # 第一次调用使用 _paced 已取得的令牌, 之后每次调用各取一个令牌
+        # The first call uses the token _paced took already, every later call takes a token of its own
+        _ready = True
+        if _kind == 'channel':
+            _channel = _id
+        elif _kind == 'user':
+            _channel = self.channels.get(('user', _id))
+            if _channel is None:
+                _channel = (await self.call('POST', '/users/@me/channels', {'recipient_id': _id}))['id']
+                self.channels.put(('user', _id), _channel)
+                _ready = False
+        else:
+            raise PermanentError(f'unsupported reply target: {_kind}')
+
+        _reference = { }
+        if message.at_sender and getattr(_e, 'seq', None) is not None:
+            _reference = {'message_reference': {'message_id': _e.seq, 'fail_if_not_exists': False}}
+        _path = f'/channels/{_channel}/messages'
+        _text = message.msg or ''
+        _files = message.file if isinstance(message.file, list) else [message.file] if message.file else []
+        if not _text and not _files:
+            raise PermanentError('empty message')
+
+        _chunks = [_text[_start:_start + MAX_TEXT] for _start in range(0, len(_text), MAX_TEXT)] or ['']
+        # 重试时从第一个未发送的分段继续, 已发送的分段不会重复
+        # Retries resume from the first unsent chunk, chunks sent already are not repeated
+        for _index in range(self.sent.get(message, 0), len(_chunks)):
+            if not _ready:
+                await self.Adapter._throttle((_kind, _id))
+            _ready = False
+            # 文件随最后一段文本一起发送
+            # Files are sent along with the last text chunk
+            _upload = {
+                f'files[{_i}]': (f'file{_i}.png', _file) for _i, _file in enumerate(_files)
+            } if _index == len(_chunks) - 1 else None
+            await self.call('POST', _path, {'content': _chunks[_index], **_reference}, _upload)
+            self.sent[message] = _index + 1
+        self.sent.pop(message, None)
+        self.Adapter.client.msg_send_append()
+        return True
+
+    def isFriend(
+            self,
+            user
+    ) -> bool:
+        return True
+
+    def load_on(self) -> Default:
+        return self.Adapter
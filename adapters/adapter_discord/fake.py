@@ -0,0 +1,297 @@
+"""
+中文:
+本地模拟的 Discord 网关与 REST API, 按分片推送 MESSAGE_CREATE 事件并统计回复, 用于离线压测 Discord 适配器。
+网关使用 zlib-stream 压缩, 支持 RESUME 补发缺失的事件; drop 大于 0 时每个会话推送该数量的事件后断开一次,
+用于验证会话恢复。机器人需要载入对每条消息都进行回复的插件, 并将 gateway 与 api 指向本地地址。
+在仓库根目录运行:
+    python -m adapters.adapter_discord.fake --port 8082 --api-port 8083 --shards 4 --count 20000
+
+English:
+Local fake Discord gateway and REST API, pushes MESSAGE_CREATE events per shard and counts replies,
+used to load test the Discord adapter offline.
+The gateway uses zlib-stream compression and replays missed events on RESUME; when drop is greater than 0 every
+session is disconnected once after pushing that many events, used to verify session resuming.
+The bot needs a plugin replying to every message, with gateway and api pointed at the local addresses.
+Run from the repository root:
+    python -m adapters.adapter_discord.fake --port 8082 --api-port 8083 --shards 4 --count 20000
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+import zlib
+
+from adapters.adapter_discord import (OP_DISPATCH, OP_HEARTBEAT, OP_HEARTBEAT_ACK, OP_HELLO, OP_IDENTIFY,
+                                      OP_INVALID_SESSION, OP_RESUME)
+from lib.adapters.http import HTTPError, read_request, write_response
+from lib.adapters.websocket import ConnectionClosed, WebSocket, WebSocketError, accept
+
+
+# 模拟网关
+# Fake gateway
+class Gateway:
+    """
+    中文:
+    模拟网关与 REST API, 每个分片的会话推送 count 条事件, 全部事件都收到回复后 done 被设置。
+    :param shards: 分片数。
+    :param count: 每个分片推送的事件数。
+    :param batch: 每批连续写出的事件数。
+    :param guilds: 每个分片模拟的服务器数量。
+    :param heartbeat_interval: 心跳间隔(毫秒)。
+    :param compress: 是否使用 zlib-stream 压缩。
+    :param drop: 每个会话推送多少事件后断开一次, 为 0 时不断开。
+
+    English:
+    Fake gateway and REST API, the session of every shard pushes count events, done is set once every event
+    has been replied to.
+    :param shards: Shard count.
+    :param count: Events pushed per shard.
+    :param batch: Events written back to back per batch.
+    :param guilds: Simulated guilds per shard.
+    :param heartbeat_interval: Heartbeat interval(milliseconds).
+    :param compress: Whether to use zlib-stream compression.
+    :param drop: Disconnect every session once after this many events, never if 0.
+    """
+
+    def __init__(
+            self,
+            shards: int = 1,
+            count: int = 10000,
+            batch: int = 64,
+            guilds: int = 64,
+            heartbeat_interval: int = 41250,
+            compress: bool = True,
+            drop: int = 0
+    ) -> None:
+        self.shards = shards
+        self.count = count
+        self.batch = batch
+        self.guilds = guilds
+        self.heartbeat_interval = heartbeat_interval
+        self.compress = compress
+        self.drop = drop
+        self.sessions = { }
+        self.url = ''
+        self.replies = 0
+        self.replayed = 0
+        self.identifies = 0
+        self.resumes = 0
+        self.started = None
+        self.finished = None
+        self.done = asyncio.Event()
+        self.servers = []
+
+    async def start(
+            self,
+            host: str = '127.0.0.1',
+            port: int = 8082,
+            api_port: int = 8083
+    ) -> tuple:
+        _gateway = await asyncio.start_server(self._gateway, host, port)
+        _api = await asyncio.start_server(self._api, host, api_port)
+        self.servers = [_gateway, _api]
+        _port = _gateway.sockets[0].getsockname()[1]
+        self.url = f'ws://{host}:{_port}'
+        return _port, _api.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        self.done.set()
+        for _server in self.servers:
+            _server.close()
+
+    # 生成分片的事件
+    # Generate the events of a shard
+    def _event(
+            self,
+            shard_id: int,
+            index: int
+    ) -> dict:
+        # 服务器 id 按 (guild_id >> 22) % shards 落在该分片
+        # Guild ids fall on the shard by (guild_id >> 22) % shards
+        _guild = (index % self.guilds * self.shards + shard_id) << 22
+        return {
+            'id': str(_guild + 100000 + index),
+            'channel_id': str(_guild + 1),
+            'guild_id': str(_guild),
+            'author': {'id': str(1000 + index % 997), 'username': 'fake', 'bot': False},
+            'content': f'echo {shard_id}:{index}',
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S+00:00', time.gmtime())
+        }
+
+    # 持续推送会话剩余的事件
+    # Keep pushing the remaining events of a session
+    async def _push(
+            self,
+            ws: WebSocket,
+            send,
+            session: dict
+    ) -> None:
+        while session['next'] < self.count:
+            if self.drop and not session['dropped'] and session['next'] >= self.drop:
+                session['dropped'] = True
+                ws.writer.close()
+                return
+            _end = min(session['next'] + self.batch, self.count)
+            _payloads = [
+                {'op': OP_DISPATCH, 't': 'MESSAGE_CREATE', 's': _i + 2, 'd': self._event(session['shard'], _i)}
+                for _i in range(session['next'], _end)
+            ]
+            session['next'] = _end
+            await send(_payloads)
+
+    async def _gateway(
+            self,
+            reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            _ws = await accept(reader, writer)
+        except (WebSocketError, ConnectionError, OSError):
+            writer.close()
+            return
+        _deflator = zlib.compressobj() if self.compress else None
+
+        async def _send(payloads: list) -> None:
+            if _deflator is None:
+                await _ws.send_many([json.dumps(_payload) for _payload in payloads])
+            else:
+                await _ws.send_many([
+                    _deflator.compress(json.dumps(_payload).encode('utf-8')) + _deflator.flush(zlib.Z_SYNC_FLUSH)
+                    for _payload in payloads
+                ])
+
+        _pusher = None
+        try:
+            await _send([{'op': OP_HELLO, 'd': {'heartbeat_interval': self.heartbeat_interval}}])
+            while True:
+                for _frame in await _ws.recv_batch():
+                    _payload = json.loads(_frame)
+                    _op, _data = _payload.get('op'), _payload.get('d')
+                    if _op == OP_HEARTBEAT:
+                        await _send([{'op': OP_HEARTBEAT_ACK}])
+                    elif _op == OP_IDENTIFY:
+                        self.identifies += 1
+                        if self.started is None:
+                            self.started = time.perf_counter()
+                        _session = {'id': uuid.uuid4().hex, 'shard': _data['shard'][0], 'next': 0, 'dropped': False}
+                        self.sessions[_session['id']] = _session
+                        await _send([{
+                            'op': OP_DISPATCH,
+                            't': 'READY',
+                            's': 1,
+                            'd': {
+                                'v': 10,
+                                'session_id': _session['id'],
+                                'resume_gateway_url': self.url,
+                                'user': {'id': '1', 'username': 'fake', 'bot': True},
+                                'shard': _data['shard']
+                            }
+                        }])
+                        _pusher = asyncio.create_task(self._push(_ws, _send, _session))
+                    elif _op == OP_RESUME:
+                        _session = self.sessions.get(_data.get('session_id'))
+                        if _session is None:
+                            await _send([{'op': OP_INVALID_SESSION, 'd': False}])
+                            continue
+                        self.resumes += 1
+                        # 从客户端最后收到的序号之后补发
+                        # Replay after the last sequence the client received
+                        _next = max((_data.get('seq') or 1) - 1, 0)
+                        self.replayed += _session['next'] - _next
+                        _session['next'] = _next
+                        await _send([{'op': OP_DISPATCH, 't': 'RESUMED', 's': None, 'd': { }}])
+                        _pusher = asyncio.create_task(self._push(_ws, _send, _session))
+        except (ConnectionClosed, ConnectionError, OSError, ValueError):
+            pass
+        finally:
+            if _pusher is not None:
+                _pusher.cancel()
+            await _ws.close()
+
+    # 处理一次 REST 请求
+    # Handle a REST request
+    def _call(
+            self,
+            method: str,
+            path: str,
+            data: dict
+    ) -> tuple:
+        if path.endswith('/gateway/bot'):
+            return 200, {
+                'url': self.url,
+                'shards': self.shards,
+                'session_start_limit': {'total': 1000, 'remaining': 1000, 'reset_after': 0, 'max_concurrency': 1}
+            }
+        if path.endswith('/users/@me/channels'):
+            return 200, {'id': f'9{data.get("recipient_id", 0)}', 'type': 1}
+        if method == 'POST' and path.endswith('/messages'):
+            self.replies += str(data.get('content', '')).count('\n') + 1
+            if self.replies >= self.shards * self.count and self.finished is None:
+                self.finished = time.perf_counter()
+                self.done.set()
+            return 200, {'id': str(self.replies), 'channel_id': path.split('/')[-2], 'content': data.get('content')}
+        return 404, {'message': '404: Not Found', 'code': 0}
+
+    async def _api(
+            self,
+            reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                try:
+                    _request = await read_request(reader, 64 * 1024 * 1024)
+                except HTTPError as _error:
+                    write_response(writer, _error.status, keep_alive=False)
+                    await writer.drain()
+                    return
+                if _request is None:
+                    return
+                # 上传文件时不解析 multipart, 只统计调用
+                # multipart bodies are not parsed, the call is only counted
+                try:
+                    _data = _request.json() if _request.body else { }
+                except ValueError:
+                    _data = { }
+                _status, _body = self._call(_request.method, _request.path, _data)
+                write_response(
+                    writer,
+                    _status,
+                    _body,
+                    _request.keep_alive,
+                    {'X-RateLimit-Limit': '5', 'X-RateLimit-Remaining': '4', 'X-RateLimit-Reset-After': '1'}
+                )
+                await writer.drain()
+                if not _request.keep_alive:
+                    return
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            writer.close()
+
+
+async def main() -> None:
+    _parser = argparse.ArgumentParser(description='Fake Discord gateway and REST API')
+    _parser.add_argument('--host', default='127.0.0.1')
+    _parser.add_argument('--port', type=int, default=8082)
+    _parser.add_argument('--api-port', type=int, default=8083)
+    _parser.add_argument('--shards', type=int, default=4)
+    _parser.add_argument('--count', type=int, default=20000, help='events per shard')
+    _parser.add_argument('--batch', type=int, default=64)
+    _parser.add_argument('--no-compress', action='store_true')
+    _parser.add_argument('--drop', type=int, default=0, help='disconnect every session once after this many events')
+    _args = _parser.parse_args()
+
+    _gateway = Gateway(_args.shards, _args.count, _args.batch, compress=not _args.no_compress, drop=_args.drop)
+    _port, _api_port = await _gateway.start(_args.host, _args.port, _args.api_port)
+    print(f'gateway ws://{_args.host}:{_port}, api http://{_args.host}:{_api_port}/api/v10')
+    await _gateway.done.wait()
+    _elapsed = _gateway.finished - _gateway.started
+    print(f'{_gateway.replies} replies in {_elapsed:.3f}s, {_gateway.replies / _elapsed:.0f} msg/s, '
+          f'{_gateway.identifies} identifies, {_gateway.resumes} resumes, {_gateway.replayed} replayed')
+    await _gateway.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
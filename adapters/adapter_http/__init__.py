@@ -0,0 +1,245 @@
+import asyncio
+import base64
+from typing import List
+
+from lib.adapters.adapter import Adapter as Default
+from lib.adapters.breaker import PermanentError
+from lib.adapters.cache import Cache
+from lib.adapters.http import Client, HTTPError, read_head, read_request, write_response
+
+
+# 基于内建协议的 HTTP 回调适配器
+# HTTP webhook adapter based on the builtin protocol
+# noinspection PyMethodMayBeStatic
+class Adapter:
+    """
+    中文:
+    基于内建协议的 HTTP 回调适配器, 以 POST 接收 JSON 事件, 请求体为一条消息或消息数组。
+    消息放入接收队列后立即返回 200, 不等待处理完成; 接收队列已满时返回 503 让上游稍后重试。
+    路径 path 之后的一段作为机器人账号, 多个账号可以共用同一个监听端口;
+    回复以 JSON POST 到 callback, 其中的 {account} 会替换为收到该目标消息的账号。
+    需要在 adapter.json 中为 http-adapter 设置 enable 才会启动。
+
+    配置:
+        host: 监听地址
+        port: 监听端口
+        path: 接收事件的路径前缀
+        access_token: 访问令牌, 为空时不校验
+        max_body: 请求体最大字节数
+        max_concurrency: 同时处理的请求数上限
+        keep_alive_timeout: 保持连接的空闲超时(秒)
+        timeout: 收到请求头后读取请求体的超时(秒)
+        callback: 回复地址, 为空时不回复
+
+    English:
+    HTTP webhook adapter based on the builtin protocol, receives JSON events by POST, the body is a message
+    or a message array.
+    200 is answered as soon as the messages are queued, without waiting for them to be dealt with;
+    503 is answered when the receive queue is full so the upstream retries later.
+    The path segment after path is the bot account, several accounts can share one listening port;
+    replies are POSTed as JSON to callback, where {account} is replaced by the account the target was seen on.
+    It only starts once enable is set for http-adapter in adapter.json.
+
+    Config:
+        host: Listening host
+        port: Listening port
+        path: Path prefix receiving events
+        access_token: Access token, not checked if empty
+        max_body: Maximum request body bytes
+        max_concurrency: Maximum requests dealt with at the same time
+        keep_alive_timeout: Idle timeout(seconds) of kept-alive connections
+        timeout: Timeout(seconds) of reading the body once the request head arrived
+        callback: Reply url, no replies if empty
+    """
+
+    def __init__(self) -> None:
+        self.accounts = Cache()
+        self.inbox = None
+        self.server = None
+        self.limit = None
+        self.http = None
+        self.cfg = {
+            'host': '127.0.0.1',
+            'port': 8080,
+            'path': '/',
+            'access_token': '',
+            'max_body': 1024 * 1024,
+            'max_concurrency': 64,
+            'keep_alive_timeout': 15,
+            'timeout': 10,
+            'callback': ''
+        }
+        self.Adapter = Default({
+            'name': 'http-adapter',
+            'id': 'http',
+            'version': '0.1.0',
+            'enable': False,
+            '_start': self._start,
+            '_recv_msg_batch': self._recv_msg_batch,
+            '_send': self._send,
+            'isFriend': self.isFriend
+        })
+
+    async def _start(self) -> None:
+        self.cfg.update(self.Adapter.cfg.get(self.Adapter.name, { }))
+        self.accounts = Cache(self.Adapter.entitycache.size)
+        self.inbox = asyncio.Queue(maxsize=self.Adapter.queue_size)
+        self.limit = asyncio.Semaphore(self.cfg['max_concurrency'])
+        self.http = Client()
+        self.server = await asyncio.start_server(self._handle, self.cfg['host'], self.cfg['port'])
+        await self.Adapter.log.info(
+            {
+                'zh': f'[{self.Adapter.name}] 正在监听 http://{self.cfg["host"]}:{self.cfg["port"]}{self.cfg["path"]}',
+                'en': f'[{self.Adapter.name}] Listening on http://{self.cfg["host"]}:{self.cfg["port"]}{self.cfg["path"]}'
+            }
+        )
+
+    # 处理一个连接上的全部请求
+    # Handle every request on a connection
+    async def _handle(
+            self,
+            reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                try:
+                    # 等待下一个请求时不占用并发名额
+                    # Waiting for the next request does not take a concurrency slot
+                    _head = await asyncio.wait_for(read_head(reader), self.cfg['keep_alive_timeout'])
+                    if _head is None:
+                        return
+                    async with self.limit:
+                        # 请求体同样限时读取, 慢速上游不能一直占用并发名额
+                        # The body is read under a deadline as well, a slow upstream cannot hold a slot forever
+                        _request = await asyncio.wait_for(
+                            read_request(reader, self.cfg['max_body'], _head),
+                            self.cfg['timeout']
+                        )
+                        _status, _body = self._accept(_request)
+                        # 先应答再处理, 上游不必等待插件执行
+                        # Answer before dealing, the upstream does not wait for plugins
+                        write_response(writer, _status, _body, _request.keep_alive)
+                        await writer.drain()
+                except HTTPError as _error:
+                    write_response(writer, _error.status, keep_alive=False)
+                    await writer.drain()
+                    return
+                if not _request.keep_alive:
+                    return
+        except (asyncio.TimeoutError, ConnectionError, OSError):
+            pass
+        finally:
+            writer.close()
+
+    # 校验请求并放入接收队列
+    # Validate the request and put it into the receive queue
+    def _accept(
+            self,
+            request
+    ) -> tuple:
+        _base = self.cfg['path'].rstrip('/')
+        if request.method != 'POST':
+            return 405, { }
+        if not (request.path == _base or request.path.startswith(f'{_base}/')):
+            return 404, { }
+        if self.cfg['access_token'] and request.headers.get('authorization', '').removeprefix('Bearer ').strip() \
+                != self.cfg['access_token']:
+            return 401, { }
+
+        try:
+            _batch = request.json()
+        except ValueError:
+            return 400, {'error': 'invalid json'}
+        if isinstance(_batch, dict):
+            _batch = [_batch]
+        if not isinstance(_batch, list):
+            return 400, {'error': 'expected an object or an array'}
+
+        _account = request.path[len(_base):].strip('/') or None
+        for _msg in _batch:
+            if not isinstance(_msg, dict):
+                continue
+            if isinstance(_msg.get('file'), list):
+                try:
+                    _msg['file'] = [base64.b64decode(_file) for _file in _msg['file']]
+                except (ValueError, TypeError):
+                    return 400, {'error': 'invalid file'}
+            _msg.setdefault('account', _account)
+
+        try:
+            self.inbox.put_nowait(_batch)
+        except asyncio.QueueFull:
+            return 503, {'error': 'busy'}
+        # 只记录已接收的消息, 被拒绝的请求不影响回复账号
+        # Only accepted messages are recorded, rejected requests do not change reply accounts
+        for _msg in _batch:
+            if isinstance(_msg, dict):
+                self.accounts.put(self._target(_msg), _msg['account'])
+        return 200, {'accepted': len(_batch)}
+
+    # 获取消息的回复目标
+    # Get the reply target of a message
+    def _target(
+            self,
+            msg: dict
+    ) -> tuple:
+        for _kind in ('group', 'channel', 'user'):
+            if msg.get(_kind):
+                return _kind, msg[_kind]
+        return None, None
+
+    async def _recv_msg_batch(self) -> List[dict]:
+        return await self.inbox.get()
+
+    async def _send(
+            self,
+            message
+    ) -> bool:
+        if not self.cfg['callback']:
+            raise PermanentError('no callback configured')
+        _e = getattr(message, 'e', None)
+        _kind, _id = _e.target if hasattr(_e, 'target') else (None, None)
+        # 优先使用收到原消息的账号, 没有原消息时才按目标查找
+        # Prefer the account the original message arrived on, only look the target up without one
+        _account = (getattr(_e, '_raw', None) or { }).get('account') or self.accounts.get((_kind, _id))
+
+        _payload = {
+            'account': _account,
+            'seq': getattr(_e, 'seq', None),
+            'notice': message.notice,
+            'msg': message.msg,
+            'at_sender': message.at_sender,
+            'operation': message.operation
+        }
+        if _kind:
+            _payload[_kind] = _id
+        if message.file:
+            _files = message.file if isinstance(message.file, list) else [message.file]
+            _payload['file'] = [base64.b64encode(_file).decode() for _file in _files]
+
+        _headers = { }
+        if self.cfg['access_token']:
+            _headers['Authorization'] = f'Bearer {self.cfg["access_token"]}'
+        _status, _ = await self.http.post_json(
+            self.cfg['callback'].replace('{account}', _account or ''),
+            _payload,
+            _headers
+        )
+        # 408 与 429 之外的 4xx 说明回调拒绝了该回复, 重试也不会成功
+        # 4xx other than 408 and 429 means the callback rejected this reply, retrying would not help
+        if 400 <= _status < 500 and _status not in (408, 429):
+            raise PermanentError(f'callback answered {_status}')
+        if _status >= 300:
+            return False
+        self.Adapter.client.msg_send_append()
+        return True
+
+    def isFriend(
+            self,
+            user
+    ) -> bool:
+        return True
+
+    def load_on(self) -> Default:
+        return self.Adapter
@@ -0,0 +1,450 @@
+import asyncio
+import base64
+import itertools
+import json
+from functools import partial
+from typing import Dict, List, Union
+
+from lib.adapters.adapter import Adapter as Default
+from lib.adapters.breaker import PermanentError, UnconfirmedError
+from lib.adapters.cache import Cache
+from lib.adapters.websocket import ConnectionClosed, WebSocket, WebSocketError, accept
+from lib.core.client import Baseclient, Group, User
+
+
+# 转义 CQ 码中的特殊字符
+# Escape special characters of CQ codes
+def escape(
+        text: str,
+        comma: bool = False
+) -> str:
+    text = text.replace('&', '&amp;').replace('[', '&#91;').replace(']', '&#93;')
+    return text.replace(',', '&#44;') if comma else text
+
+
+# 还原 CQ 码中的特殊字符
+# Unescape special characters of CQ codes
+def unescape(
+        text: str
+) -> str:
+    return text.replace('&#44;', ',').replace('&#91;', '[').replace('&#93;', ']').replace('&amp;', '&')
+
+
+# API 调用已发出但没有收到响应
+# The API call was sent but no response was received
+class CallLost(ConnectionClosed, UnconfirmedError):
+    pass
+
+
+# OneBot v11 反向 WebSocket 适配器
+# OneBot v11 reverse WebSocket adapter
+# noinspection PyMethodMayBeStatic
+class Adapter:
+    """
+    中文:
+    OneBot v11 反向 WebSocket 适配器, 一个监听端口服务多个机器人账号。
+    每个连接按 X-Self-ID 对应一个账号, 每个账号注册一个 Baseclient 到 Core, 重连时复用同一实例。
+    API 调用以 echo 关联响应, 同一连接上可以同时有多个调用等待响应, 连接断开时只有在该连接上发出的调用失败。
+    回复由收到原消息的账号发送, 没有原消息时由最近一次收到该目标消息的账号发送;
+    各账号 client 的 pickUser 与 pickGroup 返回的实例由该账号发送。
+    需要在 adapter.json 中为 onebot-adapter 设置 enable 才会启动。
+
+    配置:
+        host: 监听地址
+        port: 监听端口
+        path: 反向 WebSocket 路径
+        access_token: 访问令牌, 为空时不校验
+        api_timeout: API 调用超时(秒)
+
+    English:
+    OneBot v11 reverse WebSocket adapter, one listening port serves many bot accounts.
+    Every connection maps to an account by X-Self-ID, every account registers a Baseclient to Core,
+    the same instance is reused on reconnection.
+    API calls are correlated with their responses by echo, many calls can be in flight on one connection, and
+    only the calls sent on a connection fail when it closes.
+    Replies are sent by the account the original message arrived on, or the account the target was last seen on
+    without one; instances returned by pickUser and pickGroup of
+    an account client are sent by that account.
+    It only starts once enable is set for onebot-adapter in adapter.json.
+
+    Config:
+        host: Listening host
+        port: Listening port
+        path: Reverse WebSocket path
+        access_token: Access token, not checked if empty
+        api_timeout: API call timeout(seconds)
+    """
+
+    def __init__(self) -> None:
+        self.connections: Dict[str, WebSocket] = { }
+        self.clients: Dict[str, Baseclient] = { }
+        self.calls: Dict[str, tuple] = { }
+        self.accounts = Cache()
+        self.entities = Cache()
+        self.inbox = None
+        self.server = None
+        self.echo = itertools.count()
+        self.cfg = {
+            'host': '127.0.0.1',
+            'port': 8080,
+            'path': '/onebot/v11/ws',
+            'access_token': '',
+            'api_timeout': 30
+        }
+        self.Adapter = Default({
+            'name': 'onebot-adapter',
+            'id': 'onebot',
+            'version': '0.1.0',
+            'enable': False,
+            '_start': self._start,
+            '_recv_msg_batch': self._recv_msg_batch,
+            '_send': self._send,
+            'isFriend': self.isFriend
+        })
+
+    async def _start(self) -> None:
+        self.cfg.update(self.Adapter.cfg.get(self.Adapter.name, { }))
+        self.accounts = Cache(self.Adapter.entitycache.size)
+        self.entities = Cache(self.Adapter.entitycache.size)
+        self.inbox = asyncio.Queue(maxsize=self.Adapter.queue_size)
+        self.server = await asyncio.start_server(self._handle, self.cfg['host'], self.cfg['port'])
+        await self.Adapter.log.info(
+            {
+                'zh': f'[{self.Adapter.name}] 正在监听 ws://{self.cfg["host"]}:{self.cfg["port"]}{self.cfg["path"]}',
+                'en': f'[{self.Adapter.name}] Listening on ws://{self.cfg["host"]}:{self.cfg["port"]}{self.cfg["path"]}'
+            }
+        )
+
+    # 获取账号的 client, 首次连接时注册到 Core
+    # Get the client of an account, registered to Core on first connection
+    def _client(
+            self,
+            self_id: str
+    ) -> Baseclient:
+        if self_id in self.clients:
+            return self.clients[self_id]
+
+        _adapter = self.Adapter
+        _uin = {
+            'name': _adapter.name,
+            'id': f'{_adapter.id}:{self_id}',
+            'version': _adapter.version
+        }
+        _client = Baseclient(
+            {
+                'adapter_name': _adapter.name,
+                'adapter_id': _uin['id'],
+                'adapter_version': _adapter.version,
+                'self_id': self_id,
+                'pickUser': partial(self.pickUser, self_id),
+                'pickGroup': partial(self.pickGroup, self_id),
+                'pickChannel': _adapter.pickChannel,
+                'pickGuild': _adapter.pickGuild,
+                'get_user_list': _adapter.get_user_list,
+                'get_group_list': _adapter.get_group_list,
+                'get_channel_list': _adapter.get_channel_list,
+                'get_guild_list': _adapter.get_guild_list,
+                'update_user_list': _adapter.update_user_list,
+                'update_group_list': _adapter.update_group_list,
+                'update_channel_list': _adapter.update_channel_list,
+                'update_guild_list': _adapter.update_guild_list,
+                'invalidate': _adapter.invalidate,
+                'call': lambda action, **params: self.call(self_id, action, params),
+                'stats': lambda: {
+                    'self_id': self_id,
+                    'online': self_id in self.connections,
+                    'pending_calls': sum(1 for _echo in self.calls if _echo.startswith(f'{self_id}:'))
+                }
+            }
+        )
+        self.clients[self_id] = _client
+        _adapter.bot.append(_uin, _client)
+        return _client
+
+    # 处理实现端的反向连接
+    # Handle a reverse connection of the implementation
+    async def _handle(
+            self,
+            reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            _ws = await accept(reader, writer, self.cfg['path'], self.cfg['access_token'])
+        except (WebSocketError, ConnectionError, OSError) as _error:
+            await self.Adapter.log.warn(
+                {
+                    'zh': f'[{self.Adapter.name}] 握手失败: {_error!r}',
+                    'en': f'[{self.Adapter.name}] Handshake failed: {_error!r}'
+                }
+            )
+            writer.close()
+            return
+
+        _self_id = _ws.headers.get('x-self-id')
+        if not _self_id or _ws.headers.get('x-client-role', 'Universal').lower() not in ('universal', 'event', 'api'):
+            await _ws.close(b'\x03\xf0')
+            return
+
+        # 同一账号重连时替换旧连接
+        # Replace the old connection when the same account reconnects
+        _old = self.connections.get(_self_id)
+        if _old is not None:
+            await _old.close()
+        self.connections[_self_id] = _ws
+        self._client(_self_id)
+        await self.Adapter.log.info(
+            {
+                'zh': f'[{self.Adapter.name}] 账号已连接: {_self_id}',
+                'en': f'[{self.Adapter.name}] Account connected: {_self_id}'
+            }
+        )
+
+        try:
+            while True:
+                _batch = []
+                for _frame in await _ws.recv_batch():
+                    try:
+                        _data = json.loads(_frame)
+                    except ValueError:
+                        continue
+                    if 'echo' in _data and 'post_type' not in _data:
+                        _call = self.calls.pop(str(_data['echo']), None)
+                        if _call is not None and not _call[1].done():
+                            _call[1].set_result(_data)
+                        continue
+                    _msg = self._event(_self_id, _data)
+                    if _msg is not None:
+                        _batch.append(_msg)
+                if _batch:
+                    await self.inbox.put(_batch)
+        except ConnectionClosed:
+            pass
+        except Exception as _error:
+            await self.Adapter.log.error(
+                {
+                    'zh': f'[{self.Adapter.name}] 连接出错: {_self_id}: {_error!r}',
+                    'en': f'[{self.Adapter.name}] Connection error: {_self_id}: {_error!r}'
+                }
+            )
+        finally:
+            await _ws.close()
+            if self.connections.get(_self_id) is _ws:
+                del self.connections[_self_id]
+            # 只让在该连接上发出的调用失败, 同一账号新连接上的调用不受影响
+            # Only fail the calls sent on this connection, calls on a new connection of the account are kept
+            for _echo in [_echo for _echo, (_owner, _) in self.calls.items() if _owner is _ws]:
+                _future = self.calls.pop(_echo)[1]
+                if not _future.done():
+                    _future.set_exception(ConnectionClosed(_self_id))
+            await self.Adapter.log.info(
+                {
+                    'zh': f'[{self.Adapter.name}] 账号已断开: {_self_id}',
+                    'en': f'[{self.Adapter.name}] Account disconnected: {_self_id}'
+                }
+            )
+
+    # 将 OneBot 消息事件转换为内建消息
+    # Convert a OneBot message event to a builtin message
+    def _event(
+            self,
+            self_id: str,
+            data: dict
+    ) -> dict:
+        if data.get('post_type') != 'message':
+            return None
+
+        _message = data.get('message')
+        if isinstance(_message, list):
+            _text = ''.join(
+                _segment.get('data', { }).get('text', '')
+                for _segment in _message if _segment.get('type') == 'text'
+            )
+        else:
+            _text = unescape(str(data.get('raw_message') or _message or ''))
+
+        _msg = {
+            'seq': data.get('message_id'),
+            'notice': 'text',
+            'msg': _text,
+            'file': None,
+            'user': str(data.get('user_id', '')),
+            'time': str(data.get('time', '')),
+            'account': self_id
+        }
+        if data.get('message_type') == 'group':
+            _msg['group'] = str(data.get('group_id', ''))
+        self.accounts.put(('group', _msg['group']) if 'group' in _msg else ('user', _msg['user']), self_id)
+        return _msg
+
+    async def _recv_msg_batch(self) -> List[dict]:
+        return await self.inbox.get()
+
+    # 调用 OneBot API
+    # Call a OneBot API
+    async def call(
+            self,
+            self_id: str,
+            action: str,
+            params: dict
+    ) -> dict:
+        """
+        中文:
+        调用 OneBot API 并等待响应, 同一连接上可以同时有多个调用。
+        调用发出后超时或连接关闭时抛出 CallLost, 实现端可能已经执行了该调用。
+        :param self_id: 账号。
+        :param action: API 名称。
+        :param params: API 参数。
+        :return: API 响应(dict)。
+
+        English:
+        Call a OneBot API and wait for the response, many calls can be in flight on one connection.
+        A timeout or a closed connection after the call was sent raises CallLost, the implementation may have
+        run the call already.
+        :param self_id: Account.
+        :param action: API name.
+        :param params: API parameters.
+        :return: API response(dict).
+        """
+        _ws = self.connections.get(self_id)
+        if _ws is None:
+            raise ConnectionClosed(self_id)
+        _echo = f'{self_id}:{next(self.echo)}'
+        _future = asyncio.get_running_loop().create_future()
+        self.calls[_echo] = (_ws, _future)
+        try:
+            await _ws.send(json.dumps({'action': action, 'params': params, 'echo': _echo}, ensure_ascii=False))
+            try:
+                return await asyncio.wait_for(_future, self.cfg['api_timeout'])
+            except (ConnectionClosed, asyncio.TimeoutError) as _error:
+                raise CallLost(self_id) from _error
+        finally:
+            self.calls.pop(_echo, None)
+
+    async def _send(
+            self,
+            message
+    ) -> bool:
+        _e = getattr(message, 'e', None)
+        _kind, _id = _e.target if hasattr(_e, 'target') else (None, None)
+        # 优先由收到原消息的账号回复, 没有原消息时才按目标查找最近的账号
+        # Prefer the account the original message arrived on, only look up the latest account of the target
+        # without one
+        _self_id = (getattr(_e, '_raw', None) or { }).get('account') \
+            or self.accounts.get((_kind, _id)) or next(iter(self.connections), None)
+        if _kind not in ('group', 'user'):
+            raise PermanentError(f'unsupported reply target: {_kind}')
+        if _self_id is None:
+            return False
+
+        _user = _e.user.id if message.at_sender and getattr(_e, 'user', None) is not None else None
+        _params = {'message_type': 'group' if _kind == 'group' else 'private', 'message': self._compose(message, _user)}
+        _params['group_id' if _kind == 'group' else 'user_id'] = int(_id) if str(_id).isdigit() else _id
+        return await self._post(_self_id, 'send_msg', _params)
+
+    # 将消息转换为 CQ 码文本
+    # Convert a message to CQ code text
+    def _compose(
+            self,
+            message,
+            at: str = None
+    ) -> str:
+        _text = f'[CQ:at,qq={at}] ' if at is not None else ''
+        if getattr(message, 'msg', None):
+            _text += escape(message.msg)
+        _file = getattr(message, 'file', None)
+        if _file:
+            _files = _file if isinstance(_file, list) else [_file]
+            _text += ''.join(f'[CQ:image,file=base64://{base64.b64encode(_item).decode()}]' for _item in _files)
+        if not _text:
+            raise PermanentError('empty message')
+        return _text
+
+    # 调用发送 API 并检查响应
+    # Call a sending API and check the response
+    async def _post(
+            self,
+            self_id: str,
+            action: str,
+            params: dict
+    ) -> bool:
+        try:
+            _response = await self.call(self_id, action, params)
+        except UnconfirmedError:
+            raise
+        except ConnectionClosed:
+            return False
+        # 实现端处理后返回 failed 说明该请求被拒绝, 例如群不存在或被禁言
+        # failed after the implementation handled the request means it was rejected, e.g. unknown group or muted
+        if _response.get('status') == 'failed':
+            raise PermanentError(f'{action} failed: {_response.get("retcode")} {_response.get("wording", "")}')
+        if _response.get('status') not in ('ok', 'async'):
+            return False
+        self.Adapter.client.msg_send_append()
+        return True
+
+    # 获取账号下的 User 实例, 发送方法绑定到该账号
+    # Get a user instance of an account, its send method is bound to the account
+    def pickUser(
+            self,
+            self_id: str,
+            uid: str
+    ) -> Union[User, None]:
+        if not uid:
+            return None
+        _user = self.entities.get((self_id, 'user', uid))
+        if _user is None:
+            _user = User({'id': uid, 'adapter': self.Adapter.id})
+            _user.load({'send': partial(self.Adapter._paced, ('user', uid), partial(self._send_user, self_id, uid))})
+            self.entities.put((self_id, 'user', uid), _user)
+        return _user
+
+    # 获取账号下的 Group 实例, 发送方法绑定到该账号
+    # Get a group instance of an account, its send method is bound to the account
+    def pickGroup(
+            self,
+            self_id: str,
+            grid: str
+    ) -> Union[Group, None]:
+        if not grid:
+            return None
+        _group = self.entities.get((self_id, 'group', grid))
+        if _group is None:
+            _group = Group({'id': grid, 'adapter': self.Adapter.id})
+            _group.load(
+                {'send': partial(self.Adapter._paced, ('group', grid), partial(self._send_group, self_id, grid))}
+            )
+            self.entities.put((self_id, 'group', grid), _group)
+        return _group
+
+    async def _send_user(
+            self,
+            self_id: str,
+            uid: str,
+            _e: object
+    ) -> bool:
+        return await self._post(
+            self_id,
+            'send_private_msg',
+            {'user_id': int(uid) if str(uid).isdigit() else uid, 'message': self._compose(_e)}
+        )
+
+    async def _send_group(
+            self,
+            self_id: str,
+            grid: str,
+            _e: object
+    ) -> bool:
+        return await self._post(
+            self_id,
+            'send_group_msg',
+            {'group_id': int(grid) if str(grid).isdigit() else grid, 'message': self._compose(_e)}
+        )
+
+    def isFriend(
+            self,
+            user
+    ) -> bool:
+        return True
+
+    def load_on(self) -> Default:
+        return self.Adapter
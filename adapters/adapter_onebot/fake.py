@@ -0,0 +1,129 @@
+"""
+中文:
+本地模拟的 OneBot v11 实现, 以多个账号反向连接到 OneBot 适配器, 批量推送群消息事件并响应 send_msg 调用,
+用于离线压测多账号吞吐。机器人需要载入对每条消息都进行回复的插件。
+在仓库根目录运行:
+    python -m adapters.adapter_onebot.fake --url ws://127.0.0.1:8080/onebot/v11/ws --accounts 4 --count 20000
+
+English:
+Local fake OneBot v11 implementation, connects to the OneBot adapter reversely with several accounts, pushes
+group message events in batches and answers send_msg calls, used to load test multi-account throughput offline.
+The bot needs a plugin replying to every message.
+Run from the repository root:
+    python -m adapters.adapter_onebot.fake --url ws://127.0.0.1:8080/onebot/v11/ws --accounts 4 --count 20000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from lib.adapters.websocket import connect
+
+
+# 模拟单个账号
+# Simulate a single account
+async def account(
+        url: str,
+        self_id: int,
+        count: int,
+        batch: int = 64,
+        groups: int = 16,
+        token: str = ''
+) -> dict:
+    """
+    中文:
+    以一个账号连接, 推送 count 条群消息事件, 并等待同样数量的 send_msg 调用。
+    :param url: 适配器的反向 WebSocket 地址。
+    :param self_id: 账号。
+    :param count: 推送的事件数。
+    :param batch: 每批连续写出的事件数。
+    :param groups: 模拟的群数量。
+    :param token: 访问令牌。
+    :return: 统计结果(dict)。
+
+    English:
+    Connect as one account, push count group message events and wait for as many send_msg calls.
+    :param url: Reverse WebSocket url of the adapter.
+    :param self_id: Account.
+    :param count: Events to push.
+    :param batch: Events written back to back per batch.
+    :param groups: Simulated group count.
+    :param token: Access token.
+    :return: Statistics(dict).
+    """
+    _headers = {'X-Self-ID': str(self_id), 'X-Client-Role': 'Universal'}
+    if token:
+        _headers['Authorization'] = f'Bearer {token}'
+    _ws = await connect(url, _headers)
+
+    async def _push() -> None:
+        for _start in range(0, count, batch):
+            await _ws.send_many([
+                json.dumps({
+                    'time': int(time.time()),
+                    'self_id': self_id,
+                    'post_type': 'message',
+                    'message_type': 'group',
+                    'sub_type': 'normal',
+                    'message_id': _i,
+                    'group_id': self_id * 1000 + _i % groups,
+                    'user_id': 2000 + _i,
+                    'message': f'echo {_i}',
+                    'raw_message': f'echo {_i}',
+                    'font': 0,
+                    'sender': {'user_id': 2000 + _i, 'nickname': 'fake'}
+                }) for _i in range(_start, min(_start + batch, count))
+            ])
+
+    _begin = time.perf_counter()
+    _pusher = asyncio.create_task(_push())
+    _calls = 0
+    _message_id = 0
+    while _calls < count:
+        _replies = []
+        for _frame in await _ws.recv_batch():
+            _data = json.loads(_frame)
+            if _data.get('action') == 'send_msg':
+                _calls += str(_data['params'].get('message', '')).count('\n') + 1
+            _message_id += 1
+            _replies.append(json.dumps({
+                'status': 'ok',
+                'retcode': 0,
+                'data': {'message_id': _message_id},
+                'echo': _data.get('echo')
+            }))
+        await _ws.send_many(_replies)
+    _elapsed = time.perf_counter() - _begin
+    await _pusher
+    await _ws.close()
+    return {
+        'self_id': self_id,
+        'messages': count,
+        'seconds': _elapsed,
+        'rate': count / _elapsed
+    }
+
+
+async def main() -> None:
+    _parser = argparse.ArgumentParser(description='Fake OneBot v11 implementation')
+    _parser.add_argument('--url', default='ws://127.0.0.1:8080/onebot/v11/ws')
+    _parser.add_argument('--accounts', type=int, default=4)
+    _parser.add_argument('--count', type=int, default=20000, help='events per account')
+    _parser.add_argument('--batch', type=int, default=64)
+    _parser.add_argument('--token', default='')
+    _args = _parser.parse_args()
+
+    _begin = time.perf_counter()
+    _results = await asyncio.gather(*(
+        account(_args.url, 10000 + _i, _args.count, _args.batch, token=_args.token) for _i in range(_args.accounts)
+    ))
+    _elapsed = time.perf_counter() - _begin
+    for _result in _results:
+        print(f'{_result["self_id"]}: {_result["messages"]} messages in {_result["seconds"]:.3f}s, '
+              f'{_result["rate"]:.0f} msg/s')
+    _total = sum(_result['messages'] for _result in _results)
+    print(f'total: {_total} messages in {_elapsed:.3f}s, {_total / _elapsed:.0f} msg/s')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,419 @@
+import asyncio
+import itertools
+import json
+import random
+import struct
+from functools import partial
+from typing import Dict, List, Union
+
+from lib.adapters.adapter import Adapter as Default
+from lib.adapters.breaker import PermanentError, UnconfirmedError
+from lib.core.client import Baseclient
+
+# 数据包类型
+# Packet types
+TYPE_RESPONSE = 0
+TYPE_COMMAND = 2
+TYPE_LOGIN = 3
+
+# 单个响应包的最大正文长度, 更长的响应会分成多个包
+# Maximum body length of a single response packet, longer responses are split into several packets
+MAX_BODY = 4096
+
+
+# RCON 错误
+# RCON error
+class RconError(Exception):
+    pass
+
+
+# 命令已写出但没有收到响应
+# The command was written but no response was received
+class CommandLost(ConnectionError, UnconfirmedError):
+    pass
+
+
+# 打包 RCON 数据包
+# Pack a RCON packet
+def pack(
+        request_id: int,
+        packet_type: int,
+        body: str
+) -> bytes:
+    _body = body.encode('utf-8') + b'\x00\x00'
+    return struct.pack('<iii', len(_body) + 8, request_id, packet_type) + _body
+
+
+# 读取一个 RCON 数据包
+# Read a RCON packet
+async def read_packet(
+        reader: asyncio.StreamReader
+) -> tuple:
+    _length, = struct.unpack('<i', await reader.readexactly(4))
+    if not 10 <= _length <= MAX_BODY + 10:
+        raise RconError(f'bad packet length: {_length}')
+    _data = await reader.readexactly(_length)
+    _request_id, _packet_type = struct.unpack_from('<ii', _data)
+    return _request_id, _packet_type, _data[8:-2].decode('utf-8', 'replace')
+
+
+# 单个服务器的 RCON 连接
+# RCON connection of a single server
+class Rcon:
+    """
+    中文:
+    单个服务器的持久 RCON 连接, 登录一次后复用。
+    多条命令不等待响应直接连续写出, 由读取协程按请求 id 把响应交给对应的调用。
+    每条命令之后紧跟一个空的 TYPE_RESPONSE 包, 服务器在整条响应之后才回应它,
+    因此收到该结束标记的回应时响应即已完整, 与各分包的长度无关。
+    连接断开时等待中的调用立即失败, 并在后台按带抖动的指数退避自动重连。
+
+    English:
+    Persistent RCON connection of a single server, logged in once and reused.
+    Commands are written back to back without waiting for responses, the reader coroutine hands every response
+    to its call by request id.
+    Every command is followed by an empty TYPE_RESPONSE packet the server answers after the whole response,
+    so a response is complete once the answer to that end marker arrives, whatever the length of its packets.
+    Calls waiting when the connection drops fail at once, and it reconnects in the background with jittered
+    exponential backoff.
+    """
+
+    def __init__(
+            self,
+            host: str,
+            port: int,
+            password: str,
+            timeout: float = 10,
+            reconnect_delay: float = 1,
+            reconnect_max_delay: float = 60
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.password = password
+        self.timeout = timeout
+        self.reconnect_delay = reconnect_delay
+        self.reconnect_max_delay = reconnect_max_delay
+        self.connected = asyncio.Event()
+        self.reconnects = 0
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, list] = { }
+        self._ends: Dict[int, int] = { }
+        self._writer = None
+        self._reader_task = None
+        self._connector = None
+
+    async def _login(self) -> None:
+        _reader, _writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.timeout)
+        try:
+            _id = next(self._ids)
+            _writer.write(pack(_id, TYPE_LOGIN, self.password))
+            await _writer.drain()
+            while True:
+                _request_id, _packet_type, _ = await asyncio.wait_for(read_packet(_reader), self.timeout)
+                # 部分实现会先返回一个空的响应包
+                # Some implementations send an empty response packet first
+                if _packet_type == TYPE_COMMAND:
+                    break
+            if _request_id == -1:
+                raise RconError('authentication failed')
+        except BaseException:
+            _writer.close()
+            raise
+        self._writer = _writer
+        self._reader_task = asyncio.create_task(self._read(_reader, _writer))
+        self.connected.set()
+
+    # 后台重连
+    # Reconnect in the background
+    async def _connect(self) -> None:
+        _attempt = 0
+        while True:
+            try:
+                await self._login()
+                return
+            except RconError:
+                raise
+            except (ConnectionError, OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+                await asyncio.sleep(
+                    random.uniform(0, min(self.reconnect_max_delay, self.reconnect_delay * 2 ** _attempt))
+                )
+                _attempt += 1
+
+    def start(self) -> asyncio.Task:
+        if self._connector is None or self._connector.done():
+            self._connector = asyncio.create_task(self._connect())
+        return self._connector
+
+    async def _read(
+            self,
+            reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                _request_id, _, _body = await read_packet(reader)
+                # 结束标记的回应排在命令的全部响应包之后
+                # The answer to the end marker comes after every response packet of the command
+                _command_id = self._ends.pop(_request_id, None)
+                if _command_id is not None:
+                    _call = self._pending.pop(_command_id, None)
+                    if _call is not None and not _call[0].done():
+                        _call[0].set_result(''.join(_call[1]))
+                    continue
+                _call = self._pending.get(_request_id)
+                if _call is not None:
+                    _call[1].append(_body)
+        except (ConnectionError, OSError, RconError, asyncio.IncompleteReadError) as _error:
+            self._drop(writer, ConnectionResetError(repr(_error)))
+
+    # 断开连接并让等待中的调用失败
+    # Drop the connection and fail the waiting calls
+    def _drop(
+            self,
+            writer: asyncio.StreamWriter,
+            error: Exception
+    ) -> None:
+        # 同一连接只处理一次
+        # Handle the same connection only once
+        if writer is None or self._writer is not writer:
+            return
+        self.connected.clear()
+        self._writer.close()
+        self._writer = None
+        for _future, _ in self._pending.values():
+            if not _future.done():
+                _future.set_exception(error)
+        self._pending.clear()
+        self._ends.clear()
+        self.reconnects += 1
+        self.start()
+
+    async def command(
+            self,
+            command: str
+    ) -> str:
+        """
+        中文:
+        执行命令并返回响应, 未连接时等待重连完成。
+        命令写出后失败时抛出 CommandLost, 服务器可能已经执行了该命令。
+        :param command: 命令。
+        :return: 响应(str)。
+
+        English:
+        Run a command and return the response, wait for reconnection when not connected.
+        Failures after the command was written raise CommandLost, the server may have run it already.
+        :param command: Command.
+        :return: Response(str).
+        """
+        if not self.connected.is_set():
+            # 登录失败时直接抛出, 不让连接任务随超时被取消
+            # Raise at once when login fails, the connection task is not cancelled by the timeout
+            await asyncio.wait_for(asyncio.shield(self.start()), self.timeout)
+        _writer = self._writer
+        if _writer is None:
+            raise ConnectionResetError(f'{self.host}:{self.port}')
+        _id = next(self._ids)
+        _end = next(self._ids)
+        _future = asyncio.get_running_loop().create_future()
+        self._pending[_id] = [_future, []]
+        self._ends[_end] = _id
+        try:
+            _writer.write(pack(_id, TYPE_COMMAND, command) + pack(_end, TYPE_RESPONSE, ''))
+            await _writer.drain()
+            return await asyncio.wait_for(_future, self.timeout)
+        except (ConnectionError, OSError, RconError, asyncio.IncompleteReadError) as _error:
+            self._drop(_writer, _error)
+            # 服务器可能已经执行了命令
+            # The server may have run the command already
+            raise CommandLost(f'{self.host}:{self.port}') from _error
+        finally:
+            self._pending.pop(_id, None)
+            self._ends.pop(_end, None)
+
+    async def close(self) -> None:
+        if self._connector is not None:
+            self._connector.cancel()
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+        if self._writer is not None:
+            self._writer.close()
+        self.connected.clear()
+
+
+# Minecraft RCON 适配器
+# Minecraft RCON adapter
+# noinspection PyMethodMayBeStatic
+class Adapter:
+    """
+    中文:
+    Minecraft RCON 适配器, 每个服务器保持一条已登录的持久连接, 多条命令在同一连接上流水线发送。
+    RCON 只能执行命令, 不会推送聊天事件, 因此没有可回复的消息, 只能通过 pickGroup 与 pickUser 取得的实例发送;
+    群 id 为服务器名称, 消息以 tellraw @a 广播, 用户 id 为 服务器名称:玩家名, 消息以 tellraw 发送给该玩家。
+    每个服务器注册一个 Baseclient 到 Core, 插件可通过其 command 方法直接执行命令, 例如跨服转发聊天。
+    需要在 adapter.json 中为 rcon-adapter 设置 enable 才会启动。
+
+    配置:
+        servers: 服务器名称到 {host, port, password} 的映射
+        timeout: 连接与命令超时(秒)
+        reconnect_delay: 首次重连的退避上限(秒), 之后每次翻倍
+        reconnect_max_delay: 重连退避上限的最大值(秒)
+
+    English:
+    Minecraft RCON adapter, keeps one logged-in persistent connection per server, commands are pipelined on it.
+    RCON only runs commands and pushes no chat events, so there are no messages to reply to and sending goes
+    through instances from pickGroup and pickUser; group ids are server names and messages are broadcast by
+    tellraw @a, user ids are server:player and messages are sent to that player by tellraw.
+    Every server registers a Baseclient to Core, plugins can run commands directly through its command method,
+    e.g. to relay chat between servers.
+    It only starts once enable is set for rcon-adapter in adapter.json.
+
+    Config:
+        servers: Map of server name to {host, port, password}
+        timeout: Connection and command timeout(seconds)
+        reconnect_delay: Backoff cap(seconds) of the first reconnection, doubled every time
+        reconnect_max_delay: Maximum reconnection backoff cap(seconds)
+    """
+
+    def __init__(self) -> None:
+        self.servers: Dict[str, Rcon] = { }
+        self.cfg = {
+            'servers': { },
+            'timeout': 10,
+            'reconnect_delay': 1,
+            'reconnect_max_delay': 60
+        }
+        self.Adapter = Default({
+            'name': 'rcon-adapter',
+            'id': 'rcon',
+            'version': '0.1.0',
+            'enable': False,
+            '_start': self._start,
+            '_recv_msg_batch': self._recv_msg_batch,
+            'pickUser': self.pickUser,
+            'pickGroup': self.pickGroup,
+            'isFriend': self.isFriend
+        })
+
+    async def _start(self) -> None:
+        self.cfg.update(self.Adapter.cfg.get(self.Adapter.name, { }))
+        for _name, _server in self.cfg['servers'].items():
+            _rcon = Rcon(
+                _server.get('host', '127.0.0.1'),
+                _server.get('port', 25575),
+                _server.get('password', ''),
+                self.cfg['timeout'],
+                self.cfg['reconnect_delay'],
+                self.cfg['reconnect_max_delay']
+            )
+            self.servers[_name] = _rcon
+            _rcon.start()
+            self._register(_name, _rcon)
+
+    # 为服务器注册 client
+    # Register a client for a server
+    def _register(
+            self,
+            name: str,
+            rcon: Rcon
+    ) -> None:
+        _adapter = self.Adapter
+        _uin = {
+            'name': _adapter.name,
+            'id': f'{_adapter.id}:{name}',
+            'version': _adapter.version
+        }
+        _adapter.bot.append(
+            _uin,
+            Baseclient(
+                {
+                    'adapter_name': _adapter.name,
+                    'adapter_id': _uin['id'],
+                    'adapter_version': _adapter.version,
+                    'pickUser': _adapter.pickUser,
+                    'pickGroup': _adapter.pickGroup,
+                    'pickChannel': _adapter.pickChannel,
+                    'pickGuild': _adapter.pickGuild,
+                    'invalidate': _adapter.invalidate,
+                    'command': rcon.command,
+                    'stats': lambda: {
+                        'server': name,
+                        'connected': rcon.connected.is_set(),
+                        'pending_commands': len(rcon._pending),
+                        'reconnects': rcon.reconnects
+                    }
+                }
+            )
+        )
+
+    # RCON 不推送事件, 接收协程只在此等待
+    # RCON pushes no events, the receive coroutine only waits here
+    async def _recv_msg_batch(self) -> List[dict]:
+        await asyncio.Event().wait()
+        return []
+
+    # 获取 User 实例, 发送方法绑定到玩家所在的服务器
+    # Get a user instance, its send method is bound to the server of the player
+    def pickUser(
+            self,
+            uid: str
+    ) -> Union[object, None]:
+        _user = Default.pickUser(self.Adapter, uid)
+        if _user is not None:
+            _user.load({'send': partial(self.Adapter._paced, ('user', uid), partial(self._send_user, uid))})
+        return _user
+
+    # 获取 Group 实例, 发送方法绑定到对应的服务器
+    # Get a group instance, its send method is bound to the matching server
+    def pickGroup(
+            self,
+            grid: str
+    ) -> Union[object, None]:
+        _group = Default.pickGroup(self.Adapter, grid)
+        if _group is not None:
+            _group.load({'send': partial(self.Adapter._paced, ('group', grid), partial(self._send_group, grid))})
+        return _group
+
+    # 以 tellraw 发送消息
+    # Send a message by tellraw
+    async def _tellraw(
+            self,
+            server: str,
+            player: str,
+            _e: object
+    ) -> bool:
+        _rcon = self.servers.get(server)
+        if _rcon is None:
+            raise PermanentError(f'unknown server: {server}')
+        _msg = getattr(_e, 'msg', None)
+        if not _msg:
+            raise PermanentError('empty message')
+
+        await _rcon.command(f'tellraw {player} {json.dumps({"text": _msg}, ensure_ascii=False)}')
+        self.Adapter.client.msg_send_append()
+        return True
+
+    async def _send_user(
+            self,
+            uid: str,
+            _e: object
+    ) -> bool:
+        _server, _, _player = str(uid).partition(':')
+        if not _player:
+            raise PermanentError(f'user id is not server:player: {uid}')
+        return await self._tellraw(_server, _player, _e)
+
+    async def _send_group(
+            self,
+            grid: str,
+            _e: object
+    ) -> bool:
+        return await self._tellraw(grid, '@a', _e)
+
+    def isFriend(
+            self,
+            user
+    ) -> bool:
+        return True
+
+    def load_on(self) -> Default:
+        return self.Adapter
@@ -0,0 +1,147 @@
+"""
+中文:
+本地模拟的 Minecraft RCON 服务器, 校验密码, 按请求 id 回应每条命令, 超过 4096 字节的响应会分包发送,
+未知类型的包与原版一样回应 Unknown request, 用于在没有游戏服务器时离线测试 RCON 适配器。
+say 与 tellraw 命令会打印到标准输出, echo <文本> 原样返回文本, repeat <次数> <文本> 返回重复的文本,
+其它命令返回命令本身。
+在仓库根目录运行:
+    python -m adapters.adapter_rcon.server --port 25575 --password secret
+
+English:
+Local fake Minecraft RCON server, checks the password and answers every command by request id, responses over
+4096 bytes are split into several packets and packets of unknown type are answered with Unknown request like
+the vanilla server, used to test the RCON adapter offline without a game server.
+say and tellraw commands are printed to stdout, echo <text> returns the text as is, repeat <count> <text>
+returns the text repeated, other commands return the command itself.
+Run from the repository root:
+    python -m adapters.adapter_rcon.server --port 25575 --password secret
+"""
+import argparse
+import asyncio
+
+from adapters.adapter_rcon import MAX_BODY, TYPE_COMMAND, TYPE_LOGIN, TYPE_RESPONSE, RconError, pack, read_packet
+
+
+# 模拟 RCON 服务器
+# Fake RCON server
+class Server:
+    """
+    中文:
+    模拟 RCON 服务器, 记录收到的命令与连接数, 便于测试断言。
+    :param password: 登录密码。
+    :param quiet: 是否不打印聊天命令。
+
+    English:
+    Fake RCON server, records received commands and connection count for test assertions.
+    :param password: Login password.
+    :param quiet: Whether not to print chat commands.
+    """
+
+    def __init__(
+            self,
+            password: str = '',
+            quiet: bool = False
+    ) -> None:
+        self.password = password
+        self.quiet = quiet
+        self.commands = []
+        self.connections = 0
+        self.server = None
+        self._writers = set()
+
+    async def start(
+            self,
+            host: str = '127.0.0.1',
+            port: int = 25575
+    ) -> int:
+        self.server = await asyncio.start_server(self._handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    # 关闭服务器并断开全部连接, 用于测试重连
+    # Close the server and drop every connection, used to test reconnection
+    async def close(self) -> None:
+        for _writer in list(self._writers):
+            _writer.close()
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    # 执行命令
+    # Run a command
+    def _run(
+            self,
+            command: str
+    ) -> str:
+        self.commands.append(command)
+        _name, _, _args = command.partition(' ')
+        if _name in ('say', 'tellraw'):
+            if not self.quiet:
+                print(command)
+            return ''
+        if _name == 'echo':
+            return _args
+        if _name == 'repeat':
+            _count, _, _text = _args.partition(' ')
+            return _text * int(_count) if _count.isdigit() else ''
+        return command
+
+    async def _handle(
+            self,
+            reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter
+    ) -> None:
+        self.connections += 1
+        self._writers.add(writer)
+        _logged = False
+        try:
+            while True:
+                _request_id, _packet_type, _body = await read_packet(reader)
+                if _packet_type == TYPE_LOGIN:
+                    _logged = _body == self.password
+                    # 与原版服务器一样先返回一个空的响应包
+                    # Send an empty response packet first like the vanilla server
+                    writer.write(pack(_request_id, TYPE_RESPONSE, ''))
+                    writer.write(pack(_request_id if _logged else -1, TYPE_COMMAND, ''))
+                elif not _logged:
+                    writer.write(pack(-1, TYPE_COMMAND, ''))
+                elif _packet_type == TYPE_COMMAND:
+                    _data = self._run(_body).encode('utf-8')
+                    # 与原版服务器一样按 MAX_BODY 分包, 响应正好是 MAX_BODY 的整数倍时没有更短的末包
+                    # Split by MAX_BODY like the vanilla server, there is no shorter last packet when the response
+                    # is an exact multiple of MAX_BODY
+                    for _start in range(0, max(len(_data), 1), MAX_BODY):
+                        writer.write(pack(
+                            _request_id,
+                            TYPE_RESPONSE,
+                            _data[_start:_start + MAX_BODY].decode('utf-8', 'ignore')
+                        ))
+                else:
+                    # 原版服务器以同一请求 id 回应未知类型的包, 客户端以此作为响应的结束标记
+                    # The vanilla server answers packets of unknown type with the same request id, clients use
+                    # it as the end marker of a response
+                    writer.write(pack(_request_id, TYPE_RESPONSE, f'Unknown request {_packet_type:x}'))
+                await writer.drain()
+        except (ConnectionError, OSError, RconError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+
+async def main() -> None:
+    _parser = argparse.ArgumentParser(description='Fake Minecraft RCON server')
+    _parser.add_argument('--host', default='127.0.0.1')
+    _parser.add_argument('--port', type=int, default=25575)
+    _parser.add_argument('--password', default='')
+    _parser.add_argument('--quiet', action='store_true')
+    _args = _parser.parse_args()
+
+    _server = Server(_args.password, _args.quiet)
+    _port = await _server.start(_args.host, _args.port)
+    print(f'listening on {_args.host}:{_port}')
+    async with _server.server:
+        await _server.server.serve_forever()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,277 @@
+import asyncio
+import gzip
+import io
+import json
+import time
+from typing import Dict, List
+
+from lib.adapters.adapter import Adapter as Default
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# 按最近秩计算百分位数
+# Percentile by nearest rank
+def percentile(
+        values: List[float],
+        percent: float
+) -> float:
+    if not values:
+        return 0
+    return values[min(max(int(len(values) * percent / 100 + 0.5) - 1, 0), len(values) - 1)]
+
+
+# 消息回放适配器
+# Message replay adapter
+# noinspection PyMethodMayBeStatic
+class Adapter:
+    """
+    中文:
+    消息回放适配器, 读取每行一条原始消息的 JSONL 文件(可为 .gz 或 .zst), 格式与 _recv_msg 返回的消息相同,
+    经由正常的接收队列与 _deal 处理, 用于复现线上问题与离线压测。
+    回放方式:
+        recorded: 按记录的 time 字段间隔回放, 可用 speed 加速
+        rate: 按固定速率回放
+        max: 尽可能快地回放, 受接收队列背压限制
+    延迟从消息的计划到达时间算起, 到 _deal 处理完成为止, 回放变慢时排队时间也计入延迟。
+    全部消息处理完成后打印吞吐与延迟百分位数, 并记录在 stats 的 replay 中。
+    回放时消息的 seq 会被替换为行号; 回复只计数, 不会发送到任何地方。
+    需要在 adapter.json 中为 replay-adapter 设置 enable 与 file 才会启动。
+
+    配置:
+        file: 回放文件路径
+        mode: 回放方式, 为 recorded、rate 或 max
+        rate: rate 方式下每秒回放的消息数
+        speed: recorded 方式下的回放倍速
+        batch: 单批最多放入的消息数
+        repeat: 回放次数
+
+    English:
+    Message replay adapter, reads a JSONL file(may be .gz or .zst) with one raw message per line, shaped like the
+    messages returned by _recv_msg, and deals with them through the normal receive queues and _deal,
+    used to reproduce production incidents and for offline load tests.
+    Replay modes:
+        recorded: Replay at the intervals of the recorded time field, speed may accelerate it
+        rate: Replay at a fixed rate
+        max: Replay as fast as possible, limited by the backpressure of the receive queues
+    Latency counts from the scheduled arrival of a message until _deal finishes, so queueing is included
+    when the replay falls behind.
+    Once every message is dealt with, throughput and latency percentiles are printed and kept in replay of stats.
+    The seq of replayed messages is replaced by the line number; replies are only counted and sent nowhere.
+    It only starts once enable and file are set for replay-adapter in adapter.json.
+
+    Config:
+        file: Replay file path
+        mode: Replay mode, recorded, rate or max
+        rate: Messages replayed per second in rate mode
+        speed: Replay speed multiplier in recorded mode
+        batch: Maximum messages put in a batch
+        repeat: Replay count
+    """
+
+    def __init__(self) -> None:
+        self.messages: List[dict] = []
+        self.schedule: List[float] = []
+        self.position = 0
+        self.scheduled: Dict[int, float] = { }
+        self.latencies: List[float] = []
+        self.begin = None
+        self.end = None
+        self.result = { }
+        self.cfg = {
+            'file': '',
+            'mode': 'max',
+            'rate': 1000,
+            'speed': 1,
+            'batch': 256,
+            'repeat': 1
+        }
+        self.Adapter = Default({
+            'name': 'replay-adapter',
+            'id': 'replay',
+            'version': '0.1.0',
+            'enable': False,
+            '_start': self._start,
+            '_recv_msg_batch': self._recv_msg_batch,
+            '_deal': self._deal,
+            '_send': self._send,
+            'isFriend': self.isFriend,
+            'stats': self.stats
+        })
+
+    async def _start(self) -> None:
+        self.cfg.update(self.Adapter.cfg.get(self.Adapter.name, { }))
+        # 逐行解析, 例如录制中断留下的不完整末行只会被跳过, 不会让回放无法启动
+        # Parse line by line, e.g. an incomplete last line left by an interrupted capture is only skipped and
+        # does not keep the replay from starting
+        _records = []
+        _unparsed = 0
+        with self._open(self.cfg['file']) as _file:
+            for _line in _file:
+                if not _line.strip():
+                    continue
+                try:
+                    _records.append(json.loads(_line))
+                except ValueError:
+                    _unparsed += 1
+        # 提前丢弃格式错误的消息, 保证每条回放的消息都会经过 _deal
+        # Drop malformed messages up front so every replayed message goes through _deal
+        _valid = [
+            _record for _record in _records
+            if isinstance(_record, dict) and isinstance(_record.get('msg'), str)
+        ]
+        _dropped = len(_records) - len(_valid) + _unparsed
+        if _dropped:
+            await self.Adapter.log.warn(
+                {
+                    'zh': f'[{self.Adapter.name}] 丢弃 {_dropped} 条格式错误的消息, 其中 {_unparsed} 行无法解析',
+                    'en': f'[{self.Adapter.name}] Dropped {_dropped} malformed messages, {_unparsed} lines could not '
+                          f'be parsed'
+                }
+            )
+        _records = _valid
+        self.messages = _records * self.cfg['repeat']
+
+        # 计划到达时间为相对回放开始的秒数
+        # Scheduled arrivals are seconds relative to the start of the replay
+        if self.cfg['mode'] == 'recorded':
+            _times = [self._time(_record) for _record in _records]
+            _span = (_times[-1] - _times[0]) if _times else 0
+            self.schedule = [
+                (_round * _span + _time - _times[0]) / self.cfg['speed']
+                for _round in range(self.cfg['repeat']) for _time in _times
+            ]
+        elif self.cfg['mode'] == 'rate':
+            self.schedule = [_index / self.cfg['rate'] for _index in range(len(self.messages))]
+        else:
+            self.schedule = []
+        await self.Adapter.log.info(
+            {
+                'zh': f'[{self.Adapter.name}] 开始回放 {len(self.messages)} 条消息, 方式: {self.cfg["mode"]}',
+                'en': f'[{self.Adapter.name}] Replaying {len(self.messages)} messages, mode: {self.cfg["mode"]}'
+            }
+        )
+
+    # 打开回放文件, .gz 与 .zst 文件可由多个成员或帧拼接而成
+    # Open the replay file, .gz and .zst files may be made of several concatenated members or frames
+    def _open(
+            self,
+            path: str
+    ) -> io.TextIOBase:
+        if path.endswith('.gz'):
+            return gzip.open(path, 'rt', encoding='utf-8')
+        if path.endswith('.zst'):
+            if zstandard is None:
+                raise ValueError('.zst files require the zstandard package')
+            return io.TextIOWrapper(
+                zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), read_across_frames=True, closefd=True),
+                encoding='utf-8'
+            )
+        return open(path, encoding='utf-8')
+
+    # 读取记录的到达时间
+    # Read the recorded arrival time
+    def _time(
+            self,
+            record: dict
+    ) -> float:
+        try:
+            return float(record.get('time') or 0)
+        except (TypeError, ValueError):
+            return 0
+
+    async def _recv_msg_batch(self) -> List[dict]:
+        if self.position >= len(self.messages):
+            # 回放结束后不再产生消息
+            # No more messages once the replay ends
+            await asyncio.Event().wait()
+        _now = time.perf_counter()
+        if self.begin is None:
+            self.begin = _now
+
+        _end = min(self.position + self.cfg['batch'], len(self.messages))
+        if self.schedule:
+            _wait = self.begin + self.schedule[self.position] - _now
+            if _wait > 0:
+                await asyncio.sleep(_wait)
+                _now = time.perf_counter()
+            # 取出所有已到计划时间的消息
+            # Take every message whose scheduled time has come
+            _due = _now - self.begin
+            _last = self.position + 1
+            while _last < _end and self.schedule[_last] <= _due:
+                _last += 1
+            _end = _last
+
+        _batch = []
+        for _index in range(self.position, _end):
+            _message = dict(self.messages[_index], seq=_index)
+            self.scheduled[id(_message)] = self.begin + self.schedule[_index] if self.schedule else _now
+            _batch.append(_message)
+        self.position = _end
+        return _batch
+
+    async def _deal(
+            self,
+            _message: dict
+    ) -> None:
+        try:
+            await Default._deal(self.Adapter, _message)
+        finally:
+            _scheduled = self.scheduled.pop(id(_message), None)
+            if _scheduled is not None:
+                self.end = time.perf_counter()
+                self.latencies.append(self.end - _scheduled)
+                if len(self.latencies) == len(self.messages):
+                    self._report()
+
+    # 打印回放结果
+    # Print the replay result
+    def _report(self) -> None:
+        _latencies = sorted(self.latencies)
+        _elapsed = max(self.end - self.begin, 1e-9)
+        self.result = {
+            'messages': len(_latencies),
+            'replies': self.Adapter.client.msg_send,
+            'seconds': _elapsed,
+            'rate': len(_latencies) / _elapsed,
+            'latency': {
+                f'p{_percent}': percentile(_latencies, _percent) for _percent in (50, 90, 99, 99.9)
+            }
+        }
+        self.result['latency']['max'] = _latencies[-1] if _latencies else 0
+        print(
+            f'[{self.Adapter.name}] {self.result["messages"]} messages, {self.result["replies"]} replies '
+            f'in {_elapsed:.3f}s, {self.result["rate"]:.0f} msg/s, latency '
+            + ', '.join(f'{_name} {_value * 1000:.2f}ms' for _name, _value in self.result['latency'].items())
+        )
+
+    async def _send(
+            self,
+            message
+    ) -> bool:
+        self.Adapter.client.msg_send_append()
+        return True
+
+    def stats(self) -> dict:
+        _stats = Default.stats(self.Adapter)
+        _stats['replay'] = {
+            'mode': self.cfg['mode'],
+            'position': self.position,
+            'total': len(self.messages),
+            'dealt': len(self.latencies),
+            'result': self.result
+        }
+        return _stats
+
+    def isFriend(
+            self,
+            user
+    ) -> bool:
+        return True
+
+    def load_on(self) -> Default:
+        return self.Adapter
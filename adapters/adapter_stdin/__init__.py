@@ -1,44 +1,91 @@
 import asyncio
+import os
+import stat
 import time
 import sys
 from datetime import datetime
+from typing import List
 from lib.adapters.adapter import Adapter as Default
-from lib.adapters.adapter import User
+
+# 单次读取的字节数, 管道或文件输入时一次读取即可得到一批行
+# Bytes per read, a single read yields a batch of lines for piped or file input
+CHUNK_SIZE = 256 * 1024
 
 
 # noinspection PyMethodMayBeStatic
 class Adapter:
 
     def __init__(self) -> None:
+        self.reader = None
+        self.tail = b''
+        self.eof = False
         self.Adapter = Default({
             'name': 'stdin-adapter',
             'id': 'stdin',
             'version': 'stdin',
-            '_recv_msg': self._recv_msg,
+            '_start': self._start,
+            '_recv_msg_batch': self._recv_msg_batch,
             '_send': self._send,
             'isFriend': self.isFriend,
             '_send_user': self._send_user
         })
 
-    async def _recv_msg(self) -> dict:
-        loop = asyncio.get_event_loop()
-        _msg = await loop.run_in_executor(None, input, '')
+    async def _start(self) -> None:
+        loop = asyncio.get_running_loop()
+        # 普通文件不能注册到事件循环, 改为在线程中按块读取;
+        # 对普通文件 os.read 总是立即返回已有的数据而不会等待新输入, 且同一时间只有一次读取, 只会短暂占用一个默认线程
+        # Regular files cannot be registered to the event loop, read them in chunks in a thread instead;
+        # os.read on a regular file always returns the available data at once without waiting for new input,
+        # and only one read is in flight at a time, so it only briefly holds one default executor thread
+        if stat.S_ISREG(os.fstat(sys.stdin.fileno()).st_mode):
+            _fd = sys.stdin.fileno()
+            self.reader = lambda: loop.run_in_executor(None, os.read, _fd, CHUNK_SIZE)
+            return
+        _reader = asyncio.StreamReader(limit=CHUNK_SIZE)
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(_reader), sys.stdin)
+        self.reader = lambda: _reader.read(CHUNK_SIZE)
+
+    # 读取一块输入并切分为完整的行, 不完整的末行留到下一次
+    # Read a chunk of input and split it into complete lines, the incomplete last line is kept for the next read
+    async def _recv_msg_batch(self) -> List[dict]:
+        while True:
+            if self.eof:
+                # 输入结束后不再产生消息
+                # No more messages once the input ends
+                await asyncio.Event().wait()
+            _chunk = await self.reader()
+            if not _chunk:
+                self.eof = True
+                _lines = [self.tail] if self.tail else []
+                self.tail = b''
+            else:
+                _lines = (self.tail + _chunk).split(b'\n')
+                self.tail = _lines.pop()
+            if _lines:
+                break
+
         _seq = self.Adapter.client.msg_recv
-        return {
-            'seq': _seq,
-            'notice': 'text',
-            'msg': _msg,
-            'file': None,
-            'user': 'stdin',
-            'time': str(time.time())
-        }
+        _time = str(time.time())
+        return [
+            {
+                'seq': _seq + _i,
+                'notice': 'text',
+                'msg': _line.rstrip(b'\r').decode('utf-8', 'replace'),
+                'file': None,
+                'user': 'stdin',
+                'time': _time
+            } for _i, _line in enumerate(_lines)
+        ]
 
     async def _send(
             self,
             message
     ) -> bool:
+        # ReplyMessage 没有 time 属性, 以发送时间代替
+        # ReplyMessage has no time attribute, the sending time is used instead
+        _time = getattr(message, 'time', None) or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        print(str(_time) + ' ' + str(message.msg))
         self.Adapter.client.msg_send_append()
-        print(str(message.time) + ' ' + message.msg)
         return True
 
     def isFriend(
@@ -0,0 +1,300 @@
+import asyncio
+import json
+import random
+import weakref
+from typing import Dict, List
+
+from lib.adapters.adapter import Adapter as Default
+from lib.adapters.breaker import PermanentError
+from lib.adapters.http import Client, HTTPError, multipart
+
+# 单条文本消息的最大长度
+# Maximum length of a single text message
+MAX_TEXT = 4096
+
+
+# Telegram Bot API 错误
+# Telegram Bot API error
+class TelegramError(Exception):
+    pass
+
+
+# 针对单个会话的永久错误, 例如 403 被用户屏蔽或 400 会话不存在, 不重试也不计入熔断器
+# Permanent error of a single chat, e.g. 403 blocked by the user or 400 chat not found,
+# neither retried nor counted by the breaker
+class TelegramRejected(TelegramError, PermanentError):
+    pass
+
+
+# Telegram Bot API 适配器
+# Telegram Bot API adapter
+# noinspection PyMethodMayBeStatic
+class Adapter:
+    """
+    中文:
+    Telegram Bot API 适配器, 以 getUpdates 长轮询批量接收更新, 并在下一次轮询时以 offset 确认已接收的更新。
+    长轮询与发送各使用一个保持连接的 HTTP 连接池, 发送不会排在长轮询之后。
+    默认按平台限制限速: 全局每秒 30 条, 每个会话每秒 1 条; 收到 429 时所有发送暂停 retry_after 秒后重试。
+    私聊对应 user, 群组与超级群组对应 group, 频道对应 channel; 超过 4096 字符的文本会拆分发送,
+    每次 API 调用都单独限速, 重试时从第一个未发送的部分继续。
+    需要在 adapter.json 中为 telegram-adapter 设置 enable 与 token 才会启动。
+
+    配置:
+        token: 机器人令牌
+        api: Bot API 地址, 可指向本地 Bot API 服务器或测试桩
+        poll_limit: 每次 getUpdates 的最大更新数, 最大 100
+        poll_timeout: 长轮询等待时间(秒)
+        pool_size: 发送连接池大小
+        timeout: 发送请求超时(秒)
+        reconnect_delay: 轮询出错后首次重试的退避上限(秒), 之后每次翻倍
+        reconnect_max_delay: 轮询重试退避上限的最大值(秒)
+
+    English:
+    Telegram Bot API adapter, receives updates in batches by getUpdates long polling, and acknowledges received
+    updates with offset on the next poll.
+    Long polling and sending use separate kept-alive HTTP connection pools, so sends never queue behind a poll.
+    Sends are paced to the platform limits by default: 30 per second overall and 1 per second per chat;
+    on 429 every send pauses for retry_after seconds and is retried.
+    Private chats map to user, groups and supergroups to group, channels to channel; texts longer than 4096
+    characters are split, every API call is paced on its own and retries resume from the first unsent part.
+    It only starts once enable and token are set for telegram-adapter in adapter.json.
+
+    Config:
+        token: Bot token
+        api: Bot API url, may point to a local Bot API server or the stub
+        poll_limit: Maximum updates per getUpdates, at most 100
+        poll_timeout: Long polling wait(seconds)
+        pool_size: Sending connection pool size
+        timeout: Sending request timeout(seconds)
+        reconnect_delay: Backoff cap(seconds) of the first retry after a polling error, doubled every time
+        reconnect_max_delay: Maximum polling retry backoff cap(seconds)
+    """
+
+    def __init__(self) -> None:
+        self.offset = 0
+        self.me = { }
+        self.poller = None
+        self.http = None
+        self.flood_until = 0
+        self.floods = 0
+        self.sent = weakref.WeakKeyDictionary()
+        self.cfg = {
+            'token': '',
+            'api': 'https://api.telegram.org',
+            'poll_limit': 100,
+            'poll_timeout': 30,
+            'pool_size': 8,
+            'timeout': 30,
+            'reconnect_delay': 1,
+            'reconnect_max_delay': 60
+        }
+        self.Adapter = Default({
+            'name': 'telegram-adapter',
+            'id': 'telegram',
+            'version': '0.1.0',
+            'enable': False,
+            'rate_limit': 30,
+            'rate_burst': 30,
+            'target_rate_limit': 1,
+            'target_rate_burst': 3,
+            '_start': self._start,
+            '_recv_msg_batch': self._recv_msg_batch,
+            '_send': self._send,
+            'isFriend': self.isFriend,
+            'stats': self.stats
+        })
+
+    async def _start(self) -> None:
+        self.cfg.update(self.Adapter.cfg.get(self.Adapter.name, { }))
+        # 长轮询请求的超时需要长于轮询等待时间
+        # The timeout of polling requests must be longer than the polling wait
+        self.poller = Client(1, self.cfg['poll_timeout'] + 10)
+        self.http = Client(self.cfg['pool_size'], self.cfg['timeout'])
+        try:
+            self.me = await self.call('getMe')
+        except (TelegramError, HTTPError, ConnectionError, OSError, asyncio.TimeoutError) as _error:
+            await self.Adapter.log.warn(
+                {
+                    'zh': f'[{self.Adapter.name}] getMe 失败: {_error!r}',
+                    'en': f'[{self.Adapter.name}] getMe failed: {_error!r}'
+                }
+            )
+            return
+        await self.Adapter.log.info(
+            {
+                'zh': f'[{self.Adapter.name}] 已登录: @{self.me.get("username")}',
+                'en': f'[{self.Adapter.name}] Logged in: @{self.me.get("username")}'
+            }
+        )
+
+    # 调用 Bot API
+    # Call the Bot API
+    async def call(
+            self,
+            method: str,
+            params: dict = None,
+            files: Dict[str, bytes] = None,
+            client: Client = None
+    ) -> object:
+        """
+        中文:
+        调用 Bot API 并返回 result, 收到 429 时所有调用暂停 retry_after 秒后重试。
+        :param method: 方法名称。
+        :param params: 参数。
+        :param files: 上传的文件, 为空时以 JSON 发送。
+        :param client: 使用的 HTTP 客户端, 为空时使用发送连接池。
+        :return: 调用结果。
+
+        English:
+        Call the Bot API and return result, on 429 every call pauses for retry_after seconds and is retried.
+        :param method: Method name.
+        :param params: Parameters.
+        :param files: Files to upload, sent as JSON if empty.
+        :param client: HTTP client to use, the sending pool if empty.
+        :return: Call result.
+        """
+        _url = f'{self.cfg["api"].rstrip("/")}/bot{self.cfg["token"]}/{method}'
+        _loop = asyncio.get_running_loop()
+        while True:
+            _wait = self.flood_until - _loop.time()
+            if _wait > 0:
+                await asyncio.sleep(_wait)
+            if files:
+                _body, _type = multipart(params or { }, files)
+                _status, _, _raw = await (client or self.http).request('POST', _url, _body, {'Content-Type': _type})
+                try:
+                    _data = json.loads(_raw)
+                except ValueError:
+                    _data = { }
+            else:
+                _status, _data = await (client or self.http).post_json(_url, params or { })
+            if not isinstance(_data, dict):
+                raise TelegramError(f'{method}: HTTP {_status}')
+            if _data.get('ok'):
+                return _data.get('result')
+
+            _retry_after = (_data.get('parameters') or { }).get('retry_after')
+            if _data.get('error_code') == 429 and _retry_after:
+                self.floods += 1
+                self.flood_until = max(self.flood_until, _loop.time() + _retry_after)
+                continue
+            _error = TelegramRejected if isinstance(_data.get('error_code'), int) and 400 <= _data['error_code'] < 500 \
+                else TelegramError
+            raise _error(f'{method}: {_data.get("error_code")} {_data.get("description")}')
+
+    # 将更新转换为内建消息
+    # Convert an update to a builtin message
+    def _update(
+            self,
+            update: dict
+    ) -> dict:
+        _message = update.get('message') or update.get('edited_message') or update.get('channel_post')
+        if not _message:
+            return None
+        _chat = _message.get('chat', { })
+        _sender = _message.get('from') or { }
+        _msg = {
+            'seq': _message.get('message_id'),
+            'notice': 'text',
+            'msg': _message.get('text') or _message.get('caption') or '',
+            'file': None,
+            'user': str(_sender.get('id', _chat.get('id', ''))),
+            'time': str(_message.get('date', '')),
+            'account': self.me.get('username')
+        }
+        if _chat.get('type') in ('group', 'supergroup'):
+            _msg['group'] = str(_chat.get('id'))
+        elif _chat.get('type') == 'channel':
+            _msg['channel'] = str(_chat.get('id'))
+        return _msg
+
+    # 长轮询接收一批更新
+    # Receive a batch of updates by long polling
+    async def _recv_msg_batch(self) -> List[dict]:
+        _attempt = 0
+        while True:
+            try:
+                _updates = await self.call(
+                    'getUpdates',
+                    {
+                        'offset': self.offset,
+                        'limit': self.cfg['poll_limit'],
+                        'timeout': self.cfg['poll_timeout'],
+                        'allowed_updates': ['message', 'edited_message', 'channel_post']
+                    },
+                    client=self.poller
+                )
+            except (TelegramError, HTTPError, ConnectionError, OSError, asyncio.TimeoutError) as _error:
+                await self.Adapter.log.warn(
+                    {
+                        'zh': f'[{self.Adapter.name}] getUpdates 失败: {_error!r}',
+                        'en': f'[{self.Adapter.name}] getUpdates failed: {_error!r}'
+                    }
+                )
+                await asyncio.sleep(
+                    random.uniform(0, min(self.cfg['reconnect_max_delay'], self.cfg['reconnect_delay'] * 2 ** _attempt))
+                )
+                _attempt += 1
+                continue
+            _attempt = 0
+            if not _updates:
+                continue
+
+            # 下一次轮询以 offset 确认本批更新
+            # The next poll acknowledges this batch with offset
+            self.offset = max(_update['update_id'] for _update in _updates) + 1
+            _batch = [_msg for _msg in map(self._update, _updates) if _msg is not None]
+            if _batch:
+                return _batch
+
+    async def _send(
+            self,
+            message
+    ) -> bool:
+        _e = getattr(message, 'e', None)
+        _kind, _id = _e.target if hasattr(_e, 'target') else (None, None)
+        if _kind is None:
+            raise PermanentError('no reply target')
+
+        _reply = { }
+        if message.at_sender and getattr(_e, 'seq', None) is not None:
+            _reply = {'reply_to_message_id': _e.seq, 'allow_sending_without_reply': True}
+        _text = message.msg or ''
+        _files = message.file if isinstance(message.file, list) else [message.file] if message.file else []
+        if not _text and not _files:
+            raise PermanentError('empty message')
+        _parts = [
+            ('sendMessage', {'chat_id': _id, 'text': _text[_start:_start + MAX_TEXT], **_reply}, None)
+            for _start in range(0, len(_text), MAX_TEXT)
+        ] + [('sendPhoto', {'chat_id': _id, **_reply}, {'photo': _file}) for _file in _files]
+
+        # 重试时从第一个未发送的部分继续; 第一次调用使用 _paced 已取得的令牌, 之后每次调用各取一个令牌
+        # Retries resume from the first unsent part; the first call uses the token _paced took already,
+        # every later call takes a token of its own
+        _ready = True
+        for _index in range(self.sent.get(message, 0), len(_parts)):
+            if not _ready:
+                await self.Adapter._throttle((_kind, _id))
+            _ready = False
+            await self.call(*_parts[_index])
+            self.sent[message] = _index + 1
+        self.sent.pop(message, None)
+        self.Adapter.client.msg_send_append()
+        return True
+
+    def stats(self) -> dict:
+        _stats = Default.stats(self.Adapter)
+        _stats['telegram'] = {
+            'offset': self.offset,
+            'floods': self.floods
+        }
+        return _stats
+
+    def isFriend(
+            self,
+            user
+    ) -> bool:
+        return True
+
+    def load_on(self) -> Default:
+        return self.Adapter
@@ -0,0 +1,201 @@
+"""
+中文:
+本地 Telegram Bot API 测试桩, 以 getUpdates 回放预先生成或从文件读取的更新, 并统计 sendMessage 与 sendPhoto 调用,
+用于不访问网络时压测 Telegram 适配器。机器人需要载入对每条消息都进行回复的插件, 并将 api 指向测试桩。
+适配器默认每个会话每秒只发送 1 条, 压测时应使用较多的会话, 或调高 target_rate_limit。
+在仓库根目录运行:
+    python -m adapters.adapter_telegram.stub --port 8081 --count 20000 --chats 2000
+
+English:
+Local Telegram Bot API stub, replays pre-generated or file-loaded updates through getUpdates and counts
+sendMessage and sendPhoto calls, used to load test the Telegram adapter without the network.
+The bot needs a plugin replying to every message, with api pointed at the stub.
+The adapter sends only 1 message per second per chat by default, so load tests should use many chats
+or raise target_rate_limit.
+Run from the repository root:
+    python -m adapters.adapter_telegram.stub --port 8081 --count 20000 --chats 2000
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import List
+
+from lib.adapters.http import HTTPError, read_request, write_response
+
+
+# 生成文本消息更新
+# Generate text message updates
+def generate(
+        count: int,
+        chats: int = 16
+) -> List[dict]:
+    _updates = []
+    for _i in range(count):
+        _chat = _i % chats
+        # 偶数会话为超级群组, 奇数会话为私聊
+        # Even chats are supergroups, odd chats are private chats
+        _chat_info = {'id': -1000000000000 - _chat, 'type': 'supergroup', 'title': f'group {_chat}'} \
+            if _chat % 2 == 0 else {'id': 100000 + _chat, 'type': 'private', 'first_name': f'user {_chat}'}
+        _updates.append({
+            'update_id': _i + 1,
+            'message': {
+                'message_id': _i + 1,
+                'from': {'id': 100000 + _chat, 'is_bot': False, 'first_name': f'user {_chat}'},
+                'chat': _chat_info,
+                'date': int(time.time()),
+                'text': f'echo {_i}'
+            }
+        })
+    return _updates
+
+
+# Bot API 测试桩
+# Bot API stub
+class Stub:
+    """
+    中文:
+    Bot API 测试桩, 按 offset 回放更新, 没有新的更新时按 timeout 挂起长轮询。
+    :param updates: 回放的更新。
+    :param flood: 每隔多少次发送返回一次 429, 为 0 时不返回。
+
+    English:
+    Bot API stub, replays updates by offset and holds long polls for timeout when no update is left.
+    :param updates: Updates to replay.
+    :param flood: Answer 429 once every this many sends, never if 0.
+    """
+
+    def __init__(
+            self,
+            updates: List[dict],
+            flood: int = 0
+    ) -> None:
+        self.updates = updates
+        self.flood = flood
+        self.position = 0
+        self.sent = 0
+        self.calls = 0
+        self.floods = 0
+        self.started = None
+        self.finished = None
+        self.done = asyncio.Event()
+        self.server = None
+
+    async def start(
+            self,
+            host: str = '127.0.0.1',
+            port: int = 8081
+    ) -> int:
+        self.server = await asyncio.start_server(self._handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        self.done.set()
+        if self.server is not None:
+            self.server.close()
+
+    # 处理一次 API 调用
+    # Handle an API call
+    async def _call(
+            self,
+            method: str,
+            params: dict
+    ) -> dict:
+        if method == 'getMe':
+            return {'ok': True, 'result': {'id': 1, 'is_bot': True, 'first_name': 'stub', 'username': 'stub_bot'}}
+
+        if method == 'getUpdates':
+            if self.started is None:
+                self.started = time.perf_counter()
+            # offset 之前的更新已被确认
+            # Updates before offset are acknowledged
+            while self.position < len(self.updates) \
+                    and self.updates[self.position]['update_id'] < int(params.get('offset') or 0):
+                self.position += 1
+            if self.position >= len(self.updates):
+                try:
+                    await asyncio.wait_for(self.done.wait(), float(params.get('timeout') or 0))
+                except asyncio.TimeoutError:
+                    pass
+                return {'ok': True, 'result': []}
+            _limit = min(int(params.get('limit') or 100), 100)
+            return {'ok': True, 'result': self.updates[self.position:self.position + _limit]}
+
+        if method in ('sendMessage', 'sendPhoto'):
+            self.calls += 1
+            if self.flood and self.calls % self.flood == 0:
+                self.floods += 1
+                return {
+                    'ok': False,
+                    'error_code': 429,
+                    'description': 'Too Many Requests: retry after 1',
+                    'parameters': {'retry_after': 1}
+                }
+            self.sent += str(params.get('text', '')).count('\n') + 1
+            if self.sent >= len(self.updates) and self.finished is None:
+                self.finished = time.perf_counter()
+                self.done.set()
+            return {'ok': True, 'result': {'message_id': self.calls, 'date': int(time.time())}}
+
+        return {'ok': False, 'error_code': 404, 'description': 'Not Found: method not found'}
+
+    async def _handle(
+            self,
+            reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                try:
+                    _request = await read_request(reader, 64 * 1024 * 1024)
+                except HTTPError as _error:
+                    write_response(writer, _error.status, keep_alive=False)
+                    await writer.drain()
+                    return
+                if _request is None:
+                    return
+                _method = _request.path.rsplit('/', 1)[-1]
+                # 上传文件时不解析 multipart, 只统计调用
+                # multipart bodies are not parsed, the call is only counted
+                try:
+                    _params = _request.json() if _request.body else { }
+                except ValueError:
+                    _params = { }
+                write_response(writer, 200, await self._call(_method, _params), _request.keep_alive)
+                await writer.drain()
+                if not _request.keep_alive:
+                    return
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            writer.close()
+
+
+async def main() -> None:
+    _parser = argparse.ArgumentParser(description='Local Telegram Bot API stub')
+    _parser.add_argument('--host', default='127.0.0.1')
+    _parser.add_argument('--port', type=int, default=8081)
+    _parser.add_argument('--count', type=int, default=20000, help='updates to generate')
+    _parser.add_argument('--chats', type=int, default=2000)
+    _parser.add_argument('--updates', default='', help='replay updates from a JSON array or JSON lines file')
+    _parser.add_argument('--flood', type=int, default=0, help='answer 429 once every this many sends')
+    _args = _parser.parse_args()
+
+    if _args.updates:
+        with open(_args.updates, encoding='utf-8') as _file:
+            _text = _file.read().strip()
+        _updates = json.loads(_text) if _text.startswith('[') else [json.loads(_line) for _line in _text.splitlines()]
+    else:
+        _updates = generate(_args.count, _args.chats)
+
+    _stub = Stub(_updates, _args.flood)
+    _port = await _stub.start(_args.host, _args.port)
+    print(f'listening on http://{_args.host}:{_port}, set api to this url')
+    await _stub.done.wait()
+    _elapsed = _stub.finished - _stub.started
+    print(f'{_stub.sent} replies in {_elapsed:.3f}s, {_stub.sent / _elapsed:.0f} msg/s, {_stub.floods} floods')
+    await _stub.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
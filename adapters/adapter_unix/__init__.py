@@ -0,0 +1,384 @@
+import asyncio
+import base64
+import itertools
+import json
+import os
+import stat
+import struct
+from typing import Dict, List
+
+from lib.adapters.adapter import Adapter as Default
+from lib.adapters.breaker import PermanentError
+
+# 帧头为 4 字节大端无符号整数, 表示之后的负载字节数
+# The frame header is a 4 byte big endian unsigned integer, the byte count of the payload that follows
+HEADER = struct.Struct('>I')
+
+# 每次从连接读取的字节数, 一次读取中的全部完整帧作为一批返回
+# Bytes read from the connection at a time, every complete frame in one read is returned as a batch
+READ_SIZE = 256 * 1024
+
+
+# 帧格式错误
+# Malformed frame
+class FrameError(Exception):
+    """
+    中文:
+    帧长度超过上限时抛出, 之后的数据无法再对齐帧边界, 连接需要断开。
+
+    English:
+    Raised when a frame is longer than the limit, later data can no longer be aligned to frame boundaries,
+    so the connection must be closed.
+    """
+
+
+# 长度前缀帧连接
+# Length-prefixed frame connection
+class Stream:
+    """
+    中文:
+    基于 asyncio 流的长度前缀帧连接, 每帧为 4 字节大端长度加负载。
+    读取时一次读入整块数据并解析其中全部完整帧, 高消息速率下单次唤醒即可取得一批帧。
+
+    属性:
+        reader: 流读取器
+        writer: 流写入器
+        max_frame: 单帧负载的最大字节数
+        closed: 连接是否已关闭
+
+    私有属性:
+        _buffer: 尚未解析的数据
+
+    方法:
+        recv_batch: 接收一批帧
+        send: 发送一帧
+        send_many: 发送多帧, 只等待一次写缓冲
+        close: 关闭连接
+
+    English:
+    Length-prefixed frame connection based on asyncio streams, every frame is a 4 byte big endian length
+    plus the payload.
+    Reads take a whole chunk and parse every complete frame in it, so one wake-up yields a batch of frames
+    at high message rates.
+
+    Attributes:
+        reader: Stream reader
+        writer: Stream writer
+        max_frame: Maximum payload bytes of a single frame
+        closed: Whether the connection is closed
+
+    Private attributes:
+        _buffer: Data not parsed yet
+
+    Methods:
+        recv_batch: Receive a batch of frames
+        send: Send a frame
+        send_many: Send multiple frames, waiting for the write buffer only once
+        close: Close the connection
+    """
+
+    def __init__(
+            self,
+            reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter,
+            max_frame: int = 16 * 1024 * 1024
+    ) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.max_frame = max_frame
+        self.closed = False
+        self._buffer = b''
+
+    async def recv_batch(self) -> List[bytes]:
+        """
+        中文:
+        接收一批帧, 至少返回一帧; 连接关闭时抛出 ConnectionError, 帧过长时抛出 FrameError。
+        :return: 帧负载列表(List[bytes])。
+
+        English:
+        Receive a batch of frames, at least one is returned; ConnectionError is raised when the connection
+        is closed, FrameError when a frame is too long.
+        :return: Frame payload list(List[bytes]).
+        """
+        while True:
+            _frames = []
+            _buffer = self._buffer
+            _position = 0
+            _end = len(_buffer)
+            while _end - _position >= HEADER.size:
+                (_length,) = HEADER.unpack_from(_buffer, _position)
+                if _length > self.max_frame:
+                    raise FrameError(f'frame of {_length} bytes exceeds {self.max_frame}')
+                _stop = _position + HEADER.size + _length
+                if _stop > _end:
+                    break
+                _frames.append(_buffer[_position + HEADER.size:_stop])
+                _position = _stop
+            self._buffer = _buffer[_position:]
+            if _frames:
+                return _frames
+
+            # 剩余帧较长时按其所需的字节数读取, 避免反复拼接缓冲
+            # Read as many bytes as a long pending frame needs, avoiding repeated buffer concatenation
+            _need = READ_SIZE
+            if len(self._buffer) >= HEADER.size:
+                _need = max(_need, HEADER.unpack_from(self._buffer)[0] + HEADER.size - len(self._buffer))
+            _data = await self.reader.read(_need)
+            if not _data:
+                self.closed = True
+                raise ConnectionError('connection closed by peer')
+            self._buffer = self._buffer + _data if self._buffer else _data
+
+    async def send(
+            self,
+            payload: bytes
+    ) -> None:
+        """
+        中文:
+        发送一帧。
+        :param payload: 帧负载。
+        :return: None.
+
+        English:
+        Send a frame.
+        :param payload: Frame payload.
+        :return: None.
+        """
+        await self.send_many([payload])
+
+    async def send_many(
+            self,
+            payloads: List[bytes]
+    ) -> None:
+        """
+        中文:
+        发送多帧, 全部写入缓冲后只等待一次 drain; 连接已关闭时抛出 ConnectionError。
+        :param payloads: 帧负载列表。
+        :return: None.
+
+        English:
+        Send multiple frames, waiting for drain only once after all of them are buffered;
+        ConnectionError is raised when the connection is closed.
+        :param payloads: Frame payload list.
+        :return: None.
+        """
+        if self.closed:
+            raise ConnectionError('connection closed')
+        self.writer.writelines(_part for _payload in payloads for _part in (HEADER.pack(len(_payload)), _payload))
+        await self.writer.drain()
+
+    async def close(self) -> None:
+        """
+        中文:
+        关闭连接。
+        :return: None.
+
+        English:
+        Close the connection.
+        :return: None.
+        """
+        if self.closed and self.writer.is_closing():
+            return
+        self.closed = True
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+
+
+# 基于 Unix 域套接字的本机适配器
+# Local adapter based on Unix domain sockets
+# noinspection PyMethodMayBeStatic
+class Adapter:
+    """
+    中文:
+    基于 Unix 域套接字的本机适配器, 供同一主机上的服务推送事件, 省去回环 HTTP 解析与 TCP 开销。
+    每帧为 4 字节大端长度加 UTF-8 JSON 负载, 负载为一条消息或消息数组, 字段与 Adapter._deal 读取的字段一致;
+    一次读取中的全部完整帧合并为一批放入接收队列, 接收队列已满时暂停读取该连接, 由套接字缓冲向生产者施加背压。
+    回复以同样格式的帧发送到收到原消息的连接, 该连接已断开时回复失败, 不会转给其他连接。
+    启动时会删除 path 处残留的套接字文件, 但不会删除其他类型的文件。
+    需要在 adapter.json 中为 unix-adapter 设置 enable 才会启动。
+
+    配置:
+        path: 套接字文件路径
+        permissions: 套接字文件权限, 八进制字符串, 为空时不修改
+        max_frame: 单帧负载的最大字节数, 超过时断开连接
+
+    English:
+    Local adapter based on Unix domain sockets, lets services on the same host push events without loopback
+    HTTP parsing and TCP overhead.
+    Every frame is a 4 byte big endian length plus a UTF-8 JSON payload, the payload is a message or a message
+    array with the fields read by Adapter._deal; every complete frame in one read is merged into a batch for
+    the receive queue, and reading from the connection pauses while the receive queue is full, so the socket
+    buffer applies backpressure to the producer.
+    Replies are sent as frames of the same format to the connection the original message arrived on, and fail
+    once that connection is closed instead of going to another one.
+    A stale socket file at path is removed on start, files of any other type are never removed.
+    It only starts once enable is set for unix-adapter in adapter.json.
+
+    Config:
+        path: Socket file path
+        permissions: Socket file permissions, an octal string, unchanged if empty
+        max_frame: Maximum payload bytes of a single frame, the connection is closed beyond it
+    """
+
+    def __init__(self) -> None:
+        self.connections: Dict[int, Stream] = { }
+        self.ids = itertools.count(1)
+        self.inbox = None
+        self.server = None
+        self.cfg = {
+            'path': './run/justrobot.sock',
+            'permissions': '660',
+            'max_frame': 16 * 1024 * 1024
+        }
+        self.Adapter = Default({
+            'name': 'unix-adapter',
+            'id': 'unix',
+            'version': '0.1.0',
+            'enable': False,
+            '_start': self._start,
+            '_recv_msg_batch': self._recv_msg_batch,
+            '_send': self._send,
+            'isFriend': self.isFriend
+        })
+
+    async def _start(self) -> None:
+        self.cfg.update(self.Adapter.cfg.get(self.Adapter.name, { }))
+        self.inbox = asyncio.Queue(maxsize=self.Adapter.queue_size)
+
+        _path = self.cfg['path']
+        _directory = os.path.dirname(_path)
+        if _directory:
+            os.makedirs(_directory, exist_ok=True)
+        # 只删除残留的套接字文件, 路径被其他文件占用时让监听失败
+        # Only remove a stale socket file, listening fails when another kind of file holds the path
+        try:
+            if stat.S_ISSOCK(os.stat(_path).st_mode):
+                os.unlink(_path)
+        except FileNotFoundError:
+            pass
+        self.server = await asyncio.start_unix_server(self._handle, _path)
+        if self.cfg['permissions']:
+            os.chmod(_path, int(str(self.cfg['permissions']), 8))
+        await self.Adapter.log.info(
+            {
+                'zh': f'[{self.Adapter.name}] 正在监听 unix:{_path}',
+                'en': f'[{self.Adapter.name}] Listening on unix:{_path}'
+            }
+        )
+
+    # 读取连接上的帧直到断开
+    # Read frames on a connection until it is closed
+    async def _handle(
+            self,
+            reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter
+    ) -> None:
+        _stream = Stream(reader, writer, self.cfg['max_frame'])
+        _id = next(self.ids)
+        self.connections[_id] = _stream
+        try:
+            while True:
+                _batch = []
+                for _frame in await _stream.recv_batch():
+                    _batch.extend(self._decode(_frame))
+                # 记录每条消息到达的连接, 回复只发回该连接; 覆盖消息自带的同名字段
+                # Record the connection every message arrived on, replies only go back there; a field of the same
+                # name sent by the peer is overwritten
+                for _msg in _batch:
+                    _msg['connection'] = _id
+                if _batch:
+                    await self.inbox.put(_batch)
+        except ConnectionError:
+            pass
+        except FrameError as _error:
+            await self.Adapter.log.warn(
+                {
+                    'zh': f'[{self.Adapter.name}] 帧过长, 断开连接: {_error}',
+                    'en': f'[{self.Adapter.name}] Frame too long, closing the connection: {_error}'
+                }
+            )
+        except Exception as _error:
+            await self.Adapter.log.error(
+                {
+                    'zh': f'[{self.Adapter.name}] 连接出错: {_error!r}',
+                    'en': f'[{self.Adapter.name}] Connection error: {_error!r}'
+                }
+            )
+        finally:
+            self.connections.pop(_id, None)
+            await _stream.close()
+
+    # 解析帧负载
+    # Decode a frame payload
+    def _decode(
+            self,
+            frame: bytes
+    ) -> List[dict]:
+        try:
+            _data = json.loads(frame)
+        except ValueError:
+            return []
+        if isinstance(_data, dict):
+            _data = [_data]
+        if not isinstance(_data, list):
+            return []
+        _batch = []
+        for _msg in _data:
+            if not isinstance(_msg, dict):
+                continue
+            if isinstance(_msg.get('file'), list):
+                try:
+                    _msg['file'] = [base64.b64decode(_file) for _file in _msg['file']]
+                except (ValueError, TypeError):
+                    continue
+            _batch.append(_msg)
+        return _batch
+
+    async def _recv_msg_batch(self) -> List[dict]:
+        return await self.inbox.get()
+
+    async def _send(
+            self,
+            message
+    ) -> bool:
+        _e = getattr(message, 'e', None)
+        _kind, _id = _e.target if hasattr(_e, 'target') else (None, None)
+        # 只在收到原消息的连接上回复, 该连接已断开时回复无法送达, 不会转给其他连接
+        # Only reply on the connection the original message arrived on, the reply cannot be delivered once it
+        # is closed and is never handed to another connection
+        _connection = (getattr(_e, '_raw', None) or { }).get('connection')
+        _stream = self.connections.get(_connection)
+        if _stream is None or _stream.closed:
+            raise PermanentError(f'connection {_connection} is closed')
+
+        _payload = {
+            'seq': getattr(_e, 'seq', None),
+            'notice': message.notice,
+            'msg': message.msg,
+            'at_sender': message.at_sender,
+            'operation': message.operation
+        }
+        if _kind:
+            _payload[_kind] = _id
+        if message.file:
+            _files = message.file if isinstance(message.file, list) else [message.file]
+            _payload['file'] = [base64.b64encode(_file).decode() for _file in _files]
+
+        try:
+            await _stream.send(json.dumps(_payload, ensure_ascii=False).encode('utf-8'))
+        except ConnectionError:
+            return False
+        self.Adapter.client.msg_send_append()
+        return True
+
+    def isFriend(
+            self,
+            user
+    ) -> bool:
+        return True
+
+    def load_on(self) -> Default:
+        return self.Adapter
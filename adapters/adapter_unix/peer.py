@@ -0,0 +1,89 @@
+"""
+中文:
+Unix 域套接字适配器的本地测试对端, 按长度前缀帧批量发送消息并统计收到的回复, 用于离线测吞吐。
+在仓库根目录运行:
+    python -m adapters.adapter_unix.peer --path ./run/justrobot.sock --count 100000
+机器人需要载入对每条消息都进行回复的插件, 例如 benchmarks/bench_websocket.py 中的回声插件。
+
+English:
+Local test peer of the Unix domain socket adapter, sends messages in batches as length-prefixed frames and counts
+the replies received, used to benchmark throughput offline.
+Run from the repository root:
+    python -m adapters.adapter_unix.peer --path ./run/justrobot.sock --count 100000
+The bot needs a plugin replying to every message, e.g. the echo plugin in benchmarks/bench_websocket.py.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from adapters.adapter_unix import Stream
+
+
+# 发送消息并等待全部回复
+# Send messages and wait for every reply
+async def drive(
+        stream: Stream,
+        count: int,
+        batch: int = 64,
+        users: int = 16
+) -> dict:
+    """
+    中文:
+    按批发送 count 条消息并等待全部回复, 合并发送的回复按行计数。
+    :param stream: 帧连接。
+    :param count: 消息条数。
+    :param batch: 每帧包含的消息条数。
+    :param users: 模拟的用户数。
+    :return: 统计结果(dict)。
+
+    English:
+    Send count messages in batches and wait for every reply, coalesced replies are counted by line.
+    :param stream: Frame connection.
+    :param count: Message count.
+    :param batch: Messages per frame.
+    :param users: Simulated user count.
+    :return: Statistics(dict).
+    """
+    async def _send() -> None:
+        for _start in range(0, count, batch):
+            await stream.send(json.dumps([
+                {
+                    'seq': _i,
+                    'notice': 'text',
+                    'msg': f'echo {_i}',
+                    'user': f'user-{_i % users}',
+                    'time': str(time.time())
+                } for _i in range(_start, min(_start + batch, count))
+            ]).encode('utf-8'))
+
+    _begin = time.perf_counter()
+    _sender = asyncio.create_task(_send())
+    _received = 0
+    while _received < count:
+        for _frame in await stream.recv_batch():
+            _received += str(json.loads(_frame).get('msg', '')).count('\n') + 1
+    _elapsed = time.perf_counter() - _begin
+    await _sender
+    return {
+        'messages': count,
+        'seconds': _elapsed,
+        'rate': count / _elapsed
+    }
+
+
+async def main() -> None:
+    _parser = argparse.ArgumentParser(description='Unix domain socket adapter test peer')
+    _parser.add_argument('--path', default='./run/justrobot.sock')
+    _parser.add_argument('--count', type=int, default=100000)
+    _parser.add_argument('--batch', type=int, default=64)
+    _args = _parser.parse_args()
+
+    _stream = Stream(*await asyncio.open_unix_connection(_args.path))
+    _result = await drive(_stream, _args.count, _args.batch)
+    print(f'{_result["messages"]} messages in {_result["seconds"]:.3f}s, {_result["rate"]:.0f} msg/s')
+    await _stream.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,288 @@
+import asyncio
+import base64
+import itertools
+import json
+import random
+import time
+from typing import Dict, List, Union
+
+from lib.adapters.adapter import Adapter as Default
+from lib.adapters.breaker import PermanentError
+from lib.adapters.websocket import ConnectionClosed, WebSocket, WebSocketError, accept, connect
+
+
+# 基于内建协议的 WebSocket 适配器
+# WebSocket adapter based on the builtin protocol
+# noinspection PyMethodMayBeStatic
+class Adapter:
+    """
+    中文:
+    基于内建协议的 WebSocket 适配器, 可作为服务端等待连接, 也可作为客户端主动连接并自动重连。
+    每个文本帧为一条 JSON 消息或 JSON 消息数组, 字段与 Adapter._deal 读取的字段一致;
+    回复以同样格式发送到收到原消息的连接, 该连接已断开时回复失败, 不会转给其他连接。
+    需要在 adapter.json 中为 websocket-adapter 设置 enable 才会启动。
+
+    配置:
+        mode: server 或 client
+        host: 服务端监听地址
+        port: 服务端监听端口
+        path: 服务端允许的路径
+        url: 客户端连接地址
+        access_token: 访问令牌, 为空时不校验
+        ping_interval: 发送 ping 的间隔(秒)
+        ping_timeout: 超过该时间(秒)未收到数据则断开
+        reconnect_delay: 首次重连的退避上限(秒), 之后每次翻倍
+        reconnect_max_delay: 重连退避上限的最大值(秒)
+
+    English:
+    WebSocket adapter based on the builtin protocol, works as a server waiting for connections,
+    or as a client connecting actively with automatic reconnection.
+    Every text frame is a JSON message or a JSON message array, with the fields read by Adapter._deal;
+    replies are sent in the same format to the connection the original message arrived on, and fail once that
+    connection is closed instead of going to another one.
+    It only starts once enable is set for websocket-adapter in adapter.json.
+
+    Config:
+        mode: server or client
+        host: Server listening host
+        port: Server listening port
+        path: Path allowed by the server
+        url: Client connection url
+        access_token: Access token, not checked if empty
+        ping_interval: Interval(seconds) to send pings
+        ping_timeout: Disconnect when nothing is received for this long(seconds)
+        reconnect_delay: Backoff cap(seconds) of the first reconnection, doubled every time
+        reconnect_max_delay: Maximum reconnection backoff cap(seconds)
+    """
+
+    def __init__(self) -> None:
+        self.connections: Dict[int, WebSocket] = { }
+        self.ids = itertools.count(1)
+        self.inbox = None
+        self.server = None
+        self.tasks = set()
+        self.cfg = {
+            'mode': 'server',
+            'host': '127.0.0.1',
+            'port': 8765,
+            'path': '/',
+            'url': 'ws://127.0.0.1:8765/',
+            'access_token': '',
+            'ping_interval': 20,
+            'ping_timeout': 60,
+            'reconnect_delay': 1,
+            'reconnect_max_delay': 60
+        }
+        self.Adapter = Default({
+            'name': 'websocket-adapter',
+            'id': 'websocket',
+            'version': '0.1.0',
+            'enable': False,
+            '_start': self._start,
+            '_recv_msg_batch': self._recv_msg_batch,
+            '_send': self._send,
+            'isFriend': self.isFriend
+        })
+
+    # 启动服务端或客户端
+    # Start the server or client
+    async def _start(self) -> None:
+        self.cfg.update(self.Adapter.cfg.get(self.Adapter.name, { }))
+        self.inbox = asyncio.Queue(maxsize=self.Adapter.queue_size)
+
+        if self.cfg['mode'] == 'client':
+            self._spawn(self._client())
+            return
+
+        self.server = await asyncio.start_server(self._handle, self.cfg['host'], self.cfg['port'])
+        await self.Adapter.log.info(
+            {
+                'zh': f'[{self.Adapter.name}] 正在监听 ws://{self.cfg["host"]}:{self.cfg["port"]}{self.cfg["path"]}',
+                'en': f'[{self.Adapter.name}] Listening on ws://{self.cfg["host"]}:{self.cfg["port"]}{self.cfg["path"]}'
+            }
+        )
+
+    def _spawn(self, coroutine) -> None:
+        _task = asyncio.create_task(coroutine)
+        self.tasks.add(_task)
+        _task.add_done_callback(self.tasks.discard)
+
+    # 服务端处理新连接
+    # Server handles a new connection
+    async def _handle(
+            self,
+            reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            _ws = await accept(reader, writer, self.cfg['path'], self.cfg['access_token'])
+        except (WebSocketError, ConnectionError, OSError) as _error:
+            await self.Adapter.log.warn(
+                {
+                    'zh': f'[{self.Adapter.name}] 握手失败: {_error!r}',
+                    'en': f'[{self.Adapter.name}] Handshake failed: {_error!r}'
+                }
+            )
+            writer.close()
+            return
+        await self._serve(_ws)
+
+    # 客户端连接并自动重连
+    # Client connects and reconnects automatically
+    async def _client(self) -> None:
+        _headers = { }
+        if self.cfg['access_token']:
+            _headers['Authorization'] = f'Bearer {self.cfg["access_token"]}'
+        _attempt = 0
+        while True:
+            try:
+                _ws = await connect(self.cfg['url'], _headers)
+            except (WebSocketError, ConnectionError, OSError, asyncio.TimeoutError) as _error:
+                _delay = random.uniform(0, min(self.cfg['reconnect_max_delay'], self.cfg['reconnect_delay'] * 2 ** _attempt))
+                _attempt += 1
+                await self.Adapter.log.warn(
+                    {
+                        'zh': f'[{self.Adapter.name}] 连接失败: {_error!r}, {_delay:.1f} 秒后重连',
+                        'en': f'[{self.Adapter.name}] Connection failed: {_error!r}, reconnecting in {_delay:.1f}s'
+                    }
+                )
+                await asyncio.sleep(_delay)
+                continue
+            _attempt = 0
+            await self._serve(_ws)
+
+    # 读取连接上的消息直到断开
+    # Read messages on a connection until it is closed
+    async def _serve(
+            self,
+            ws: WebSocket
+    ) -> None:
+        _id = next(self.ids)
+        self.connections[_id] = ws
+        _pinger = asyncio.create_task(self._ping(ws))
+        await self.Adapter.log.info(
+            {
+                'zh': f'[{self.Adapter.name}] 已连接: {ws.writer.get_extra_info("peername")}',
+                'en': f'[{self.Adapter.name}] Connected: {ws.writer.get_extra_info("peername")}'
+            }
+        )
+        try:
+            while True:
+                _batch = []
+                for _frame in await ws.recv_batch():
+                    _batch.extend(self._decode(_frame))
+                # 记录每条消息到达的连接, 回复只发回该连接; 覆盖消息自带的同名字段
+                # Record the connection every message arrived on, replies only go back there; a field of the same
+                # name sent by the peer is overwritten
+                for _msg in _batch:
+                    if isinstance(_msg, dict):
+                        _msg['connection'] = _id
+                if _batch:
+                    await self.inbox.put(_batch)
+        except ConnectionClosed:
+            pass
+        except Exception as _error:
+            await self.Adapter.log.error(
+                {
+                    'zh': f'[{self.Adapter.name}] 连接出错: {_error!r}',
+                    'en': f'[{self.Adapter.name}] Connection error: {_error!r}'
+                }
+            )
+        finally:
+            _pinger.cancel()
+            self.connections.pop(_id, None)
+            await ws.close()
+            await self.Adapter.log.info(
+                {
+                    'zh': f'[{self.Adapter.name}] 连接已断开: {ws.writer.get_extra_info("peername")}',
+                    'en': f'[{self.Adapter.name}] Disconnected: {ws.writer.get_extra_info("peername")}'
+                }
+            )
+
+    # 定时发送 ping, 超时未收到数据则断开
+    # Send pings periodically, disconnect when nothing is received in time
+    async def _ping(
+            self,
+            ws: WebSocket
+    ) -> None:
+        while not ws.closed:
+            await asyncio.sleep(self.cfg['ping_interval'])
+            if time.monotonic() - ws.last_seen > self.cfg['ping_timeout']:
+                await ws.close()
+                return
+            try:
+                await ws.ping()
+            except (ConnectionClosed, ConnectionError, OSError):
+                return
+
+    # 解析帧内容
+    # Decode frame content
+    def _decode(
+            self,
+            frame: Union[str, bytes]
+    ) -> List[dict]:
+        try:
+            _data = json.loads(frame)
+        except ValueError:
+            return [frame] if isinstance(frame, str) else []
+        if isinstance(_data, dict):
+            _data = [_data]
+        if not isinstance(_data, list):
+            return []
+        _batch = []
+        for _msg in _data:
+            # 文件无法解码时只丢弃这一条消息, 不影响同一连接上的其他消息
+            # A file that cannot be decoded only drops this message, other messages on the connection are kept
+            if isinstance(_msg, dict) and isinstance(_msg.get('file'), list):
+                try:
+                    _msg['file'] = [base64.b64decode(_file) for _file in _msg['file']]
+                except (ValueError, TypeError):
+                    continue
+            _batch.append(_msg)
+        return _batch
+
+    async def _recv_msg_batch(self) -> List[dict]:
+        return await self.inbox.get()
+
+    async def _send(
+            self,
+            message
+    ) -> bool:
+        _e = getattr(message, 'e', None)
+        _kind, _id = _e.target if hasattr(_e, 'target') else (None, None)
+        # 只在收到原消息的连接上回复, 该连接已断开时回复无法送达, 不会转给其他连接
+        # Only reply on the connection the original message arrived on, the reply cannot be delivered once it
+        # is closed and is never handed to another connection
+        _connection = (getattr(_e, '_raw', None) or { }).get('connection')
+        _ws = self.connections.get(_connection)
+        if _ws is None or _ws.closed:
+            raise PermanentError(f'connection {_connection} is closed')
+
+        _payload = {
+            'seq': getattr(_e, 'seq', None),
+            'notice': message.notice,
+            'msg': message.msg,
+            'at_sender': message.at_sender,
+            'operation': message.operation
+        }
+        if _kind:
+            _payload[_kind] = _id
+        if message.file:
+            _files = message.file if isinstance(message.file, list) else [message.file]
+            _payload['file'] = [base64.b64encode(_file).decode() for _file in _files]
+
+        try:
+            await _ws.send(json.dumps(_payload, ensure_ascii=False))
+        except ConnectionClosed:
+            return False
+        self.Adapter.client.msg_send_append()
+        return True
+
+    def isFriend(
+            self,
+            user
+    ) -> bool:
+        return True
+
+    def load_on(self) -> Default:
+        return self.Adapter
@@ -0,0 +1,111 @@
+"""
+中文:
+WebSocket 适配器的本地测试对端, 按内建协议批量发送消息并统计收到的回复, 用于离线测吞吐。
+对端作为客户端连接服务端模式的适配器:
+    python -m adapters.adapter_websocket.peer --connect ws://127.0.0.1:8765/ --count 100000
+对端作为服务端等待客户端模式的适配器连接:
+    python -m adapters.adapter_websocket.peer --listen 127.0.0.1:8765 --count 100000
+机器人需要载入对每条消息都进行回复的插件, 例如 benchmarks/bench_websocket.py 中的回声插件。
+
+English:
+Local test peer of the WebSocket adapter, sends messages in batches with the builtin protocol and counts the
+replies received, used to benchmark throughput offline.
+The peer connects as a client to an adapter in server mode:
+    python -m adapters.adapter_websocket.peer --connect ws://127.0.0.1:8765/ --count 100000
+The peer listens as a server for an adapter in client mode:
+    python -m adapters.adapter_websocket.peer --listen 127.0.0.1:8765 --count 100000
+The bot needs a plugin replying to every message, e.g. the echo plugin in benchmarks/bench_websocket.py.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from lib.adapters.websocket import WebSocket, accept, connect
+
+
+# 发送消息并等待全部回复
+# Send messages and wait for every reply
+async def drive(
+        ws: WebSocket,
+        count: int,
+        batch: int = 64,
+        users: int = 16
+) -> dict:
+    """
+    中文:
+    按批发送 count 条消息并等待全部回复, 合并发送的回复按行计数。
+    :param ws: WebSocket 连接。
+    :param count: 消息条数。
+    :param batch: 每帧包含的消息条数。
+    :param users: 模拟的用户数。
+    :return: 统计结果(dict)。
+
+    English:
+    Send count messages in batches and wait for every reply, coalesced replies are counted by line.
+    :param ws: WebSocket connection.
+    :param count: Message count.
+    :param batch: Messages per frame.
+    :param users: Simulated user count.
+    :return: Statistics(dict).
+    """
+    async def _send() -> None:
+        for _start in range(0, count, batch):
+            await ws.send(json.dumps([
+                {
+                    'seq': _i,
+                    'notice': 'text',
+                    'msg': f'echo {_i}',
+                    'user': f'user-{_i % users}',
+                    'time': str(time.time())
+                } for _i in range(_start, min(_start + batch, count))
+            ]))
+
+    _begin = time.perf_counter()
+    _sender = asyncio.create_task(_send())
+    _received = 0
+    while _received < count:
+        for _frame in await ws.recv_batch():
+            _received += str(json.loads(_frame).get('msg', '')).count('\n') + 1
+    _elapsed = time.perf_counter() - _begin
+    await _sender
+    return {
+        'messages': count,
+        'seconds': _elapsed,
+        'rate': count / _elapsed
+    }
+
+
+def _print(result: dict) -> None:
+    print(f'{result["messages"]} messages in {result["seconds"]:.3f}s, {result["rate"]:.0f} msg/s')
+
+
+async def main() -> None:
+    _parser = argparse.ArgumentParser(description='WebSocket adapter test peer')
+    _parser.add_argument('--connect', help='adapter url in server mode, e.g. ws://127.0.0.1:8765/')
+    _parser.add_argument('--listen', help='host:port to wait for an adapter in client mode')
+    _parser.add_argument('--count', type=int, default=100000)
+    _parser.add_argument('--batch', type=int, default=64)
+    _args = _parser.parse_args()
+
+    if _args.connect:
+        _ws = await connect(_args.connect)
+        _print(await drive(_ws, _args.count, _args.batch))
+        await _ws.close()
+        return
+
+    _host, _port = (_args.listen or '127.0.0.1:8765').rsplit(':', 1)
+    _done = asyncio.Event()
+
+    async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        _ws = await accept(reader, writer)
+        _print(await drive(_ws, _args.count, _args.batch))
+        await _ws.close()
+        _done.set()
+
+    async with await asyncio.start_server(_handle, _host, int(_port)):
+        await _done.wait()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
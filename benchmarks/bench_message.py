@@ -0,0 +1,155 @@
+"""
+中文:
+消息实例构建微基准, 对比每条消息构建成本与内存占用。
+在仓库根目录运行: python -m benchmarks.bench_message
+
+English:
+Message instance construction microbenchmark, compares per-message construction cost and memory.
+Run from the repository root: python -m benchmarks.bench_message
+"""
+import timeit
+import tracemalloc
+
+from lib.core.message import Message, MessagePool
+
+# 测试参数
+# Benchmark parameters
+NUMBER = 200000
+LIVE = 10000
+
+BASE = {
+    'adapter': 'bench-adapter',
+    'bot': None
+}
+RAW = {
+    'seq': 1,
+    'notice': 'text',
+    'msg': '#帮助',
+    'file': None,
+    'user': 'user',
+    'group': 'group',
+    'time': '0'
+}
+# 改动前 Adapter._deal 传入的参数, 实体已提前解析
+# Parameters passed by Adapter._deal before the change, entities resolved eagerly
+LEGACY_PARAMETER = {
+    'adapter': 'bench-adapter',
+    'seq': 1,
+    'notice': 'text',
+    'msg': '#帮助',
+    'file': None,
+    'isFriend': False,
+    'isMaster': False,
+    'user': 'user',
+    'group': 'group',
+    'channel': None,
+    'guild': None,
+    'time': '0',
+    'reply': None
+}
+# 现在 Adapter._deal 传入的参数, 实体在首次访问时解析
+# Parameters passed by Adapter._deal now, entities resolved on first access
+PARAMETER = {
+    'adapter': 'bench-adapter',
+    'seq': 1,
+    'notice': 'text',
+    'msg': '#帮助',
+    'file': None,
+    'time': '0',
+    'reply': None,
+    'raw': RAW,
+    'resolver': None
+}
+
+
+# 改动前的消息实现: 类属性默认值 + setattr 列表推导式
+# Message implementation before the change: class attribute defaults + setattr list comprehensions
+class LegacyMessage:
+    user = None
+    group = None
+    channel = None
+    guild = None
+    isBot = False
+    isFriend = False
+    isPrivate = False
+    isGroup = False
+    isGuild = False
+    isMaster = False
+
+    def __init__(
+            self,
+            parameter: dict
+    ) -> None:
+        [setattr(self, _key, _info) for _key, _info in parameter.items()]
+
+    def load(
+            self,
+            parameter: dict
+    ) -> None:
+        [setattr(self, _key, _value) for _key, _value in parameter.items()]
+        if self.group and (not self.guild):
+            self.isGroup = True
+        if (not self.group) and self.guild:
+            self.isGuild = True
+        if (not self.group) and (not self.guild):
+            self.isPrivate = True
+
+
+def legacy() -> object:
+    e = LegacyMessage(BASE)
+    e.load(LEGACY_PARAMETER)
+    return e
+
+
+def slots() -> object:
+    e = Message(BASE)
+    e.load(PARAMETER)
+    return e
+
+
+POOL = MessagePool(BASE, 256)
+
+
+def pooled() -> object:
+    e = POOL.acquire(PARAMETER)
+    POOL.release(e)
+    return e
+
+
+def memory(
+        fnc
+) -> float:
+    """
+    中文:
+    统计同时存活 LIVE 个实例时每个实例的平均内存占用。
+    :param fnc: 构建函数。
+    :return: 每个实例的字节数(float)。
+
+    English:
+    Measure average memory per instance while LIVE instances are alive at the same time.
+    :param fnc: Construction function.
+    :return: Bytes per instance(float).
+    """
+    tracemalloc.start()
+    _before = tracemalloc.take_snapshot()
+    _live = [fnc() for _ in range(LIVE)]
+    _after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    _size = sum(_stat.size_diff for _stat in _after.compare_to(_before, 'filename'))
+    del _live
+    return (_size - LIVE * 8) / LIVE
+
+
+def main() -> None:
+    print(f'{"case":<28}{"ns / message":>16}{"bytes / live message":>24}')
+    for _name, _fnc, _live in [
+        ('before: dict + setattr', legacy, legacy),
+        ('after: __slots__', slots, slots),
+        ('after: __slots__ + pool', pooled, slots)
+    ]:
+        _time = min(timeit.repeat(_fnc, number=NUMBER, repeat=5)) / NUMBER * 1e9
+        print(f'{_name:<28}{_time:>16.1f}{memory(_live):>24.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+中文:
+Unix 域套接字适配器端到端吞吐基准, 在本机启动适配器与回声插件, 由测试对端批量发送并等待回复,
+随后以相同参数运行 WebSocket 适配器作为对照。
+在仓库根目录运行: python -m benchmarks.bench_unix
+
+English:
+Unix domain socket adapter end-to-end throughput benchmark, starts the adapter with an echo plugin locally,
+and the test peer sends in batches and waits for the replies; the WebSocket adapter then runs with the same
+parameters for comparison.
+Run from the repository root: python -m benchmarks.bench_unix
+"""
+import asyncio
+import os
+import tempfile
+
+from adapters.adapter_unix import Adapter, Stream
+from adapters.adapter_unix.peer import drive
+from adapters.adapter_websocket import Adapter as WebSocketAdapter
+from adapters.adapter_websocket.peer import drive as drive_websocket
+from benchmarks.bench_websocket import BATCH, COUNT, Echo, PORT
+from lib.adapters.websocket import connect
+from lib.core.core import Core
+from lib.core.log import Log
+from lib.plugins.index import Index
+
+
+async def bench(
+        wrapper,
+        cfg: dict
+) -> asyncio.Task:
+    _core = Core(Log({'level': 1, 'lang': 'en'}), {'language': 'en', 'master': { }})
+    _adapter = wrapper.load_on()
+    await _adapter.load(_core, {_adapter.name: {'enable': True, 'retry_num': 0, **cfg}})
+
+    _plugins = {'echo': Echo()}
+    _core.adapter_name_list = [_adapter.name]
+    _core.plugin_name_list = ['echo']
+    _core.update_route({ })
+    _core.load({'translators': { }, 'plugins': _plugins, 'plugin_index': Index(_plugins)})
+
+    _task = asyncio.create_task(_adapter.run())
+    await asyncio.sleep(0.2)
+    return _task
+
+
+async def main() -> None:
+    _path = os.path.join(tempfile.mkdtemp(), 'bench.sock')
+    _task = await bench(Adapter(), {'path': _path})
+    _stream = Stream(*await asyncio.open_unix_connection(_path))
+    _result = await drive(_stream, COUNT, BATCH)
+    print(f'unix: {_result["messages"]} messages in {_result["seconds"]:.3f}s, {_result["rate"]:.0f} msg/s')
+    await _stream.close()
+    await asyncio.sleep(0.1)
+    _task.cancel()
+
+    _task = await bench(WebSocketAdapter(), {'port': PORT})
+    _ws = await connect(f'ws://127.0.0.1:{PORT}/')
+    _result = await drive_websocket(_ws, COUNT, BATCH)
+    print(f'websocket: {_result["messages"]} messages in {_result["seconds"]:.3f}s, {_result["rate"]:.0f} msg/s')
+    await _ws.close()
+    await asyncio.sleep(0.1)
+    _task.cancel()
+    os.unlink(_path)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
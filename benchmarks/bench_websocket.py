@@ -0,0 +1,67 @@
+"""
+中文:
+WebSocket 适配器端到端吞吐基准, 在本机启动服务端模式的适配器与回声插件, 由测试对端批量发送并等待回复。
+在仓库根目录运行: python -m benchmarks.bench_websocket
+
+English:
+WebSocket adapter end-to-end throughput benchmark, starts the adapter in server mode with an echo plugin
+locally, and the test peer sends in batches and waits for the replies.
+Run from the repository root: python -m benchmarks.bench_websocket
+"""
+import asyncio
+
+from adapters.adapter_websocket import Adapter
+from adapters.adapter_websocket.peer import drive
+from lib.adapters.websocket import connect
+from lib.core.core import Core
+from lib.core.log import Log
+from lib.core.message import ReplyMessage
+from lib.plugins.index import Index
+
+# 测试参数
+# Benchmark parameters
+COUNT = 50000
+BATCH = 64
+PORT = 18765
+
+
+# 回声插件
+# Echo plugin
+class Echo:
+    name = 'echo'
+    pri = 1
+    dsc = [{'reg': '^echo', 'fnc': 'echo'}]
+
+    async def echo(
+            self,
+            e: object
+    ) -> None:
+        await ReplyMessage(e).reply(msg=e.msg)
+
+
+async def main() -> None:
+    _core = Core(Log({'level': 1, 'lang': 'en'}), {'language': 'en', 'master': { }})
+    _adapter = Adapter().load_on()
+    await _adapter.load(_core, {_adapter.name: {'enable': True, 'port': PORT, 'retry_num': 0}})
+
+    _plugins = {'echo': Echo()}
+    _core.adapter_name_list = [_adapter.name]
+    _core.plugin_name_list = ['echo']
+    _core.update_route({ })
+    _core.load({'translators': { }, 'plugins': _plugins, 'plugin_index': Index(_plugins)})
+
+    _task = asyncio.create_task(_adapter.run())
+    await asyncio.sleep(0.2)
+
+    _ws = await connect(f'ws://127.0.0.1:{PORT}/')
+    _result = await drive(_ws, COUNT, BATCH)
+    print(f'{_result["messages"]} messages in {_result["seconds"]:.3f}s, {_result["rate"]:.0f} msg/s')
+    await _ws.close()
+    # 等待服务端处理完关闭帧
+    # Wait for the server to handle the close frame
+    await asyncio.sleep(0.1)
+    _task.cancel()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
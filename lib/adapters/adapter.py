@@ -1,9 +1,17 @@
 import asyncio
-from typing import Union
-
+import copy
+import random
+import time
+from functools import partial
+from typing import Callable, List, Union
+
+from .breaker import CircuitBreaker, PermanentError, UnconfirmedError
+from .capture import Capture
+from .cache import Cache
+from .limiter import TokenBucket
 from ..core.client import Baseclient as client
 from ..core.client import Channel, Group, Guild, User
-from ..core.message import Message as message
+from ..core.message import MessagePool
 
 
 # 适配器基类
@@ -24,7 +32,37 @@ class Adapter:
         bot: bot 实例
         cfg: 适配器配置
         log: 日志实例
-        basemessage: 消息实例
+        enable: 是否启用, 未启用时 run 直接返回
+        messagepool: 消息实例池
+        message_pool_size: 消息实例池保留的空闲实例数, 为 0 时不复用实例
+        entitycache: User、Group、Channel、Guild 实例缓存
+        queue_size: 接收队列长度
+        worker_num: 消息处理协程数
+        shard_num: 按会话分片的接收队列数, 为 0 时不分片
+        sender_num: 发送协程数, 为 0 时直接发送
+        send_window: 合并同一目标文本回复的时间窗口(秒), 为 0 时不合并
+        rate_limit: 适配器每秒发送数, 为 0 时不限速
+        rate_burst: 适配器允许的突发发送数
+        target_rate_limit: 每个目标每秒发送数, 为 0 时不限速
+        target_rate_burst: 每个目标允许的突发发送数
+        retry_num: 发送失败后的重试次数
+        retry_delay: 首次重试的退避上限(秒), 之后每次翻倍
+        retry_max_delay: 退避上限的最大值(秒)
+        breaker: 发送熔断器
+        capture: 流量采样记录, 未开启时为 None
+
+    私有属性:
+        _queues: 接收队列
+        _workers: 消息处理协程
+        _outboxes: 按目标分片的发送队列
+        _senders: 发送协程
+        _pending: 等待合并的文本回复
+        _bucket: 适配器令牌桶
+        _target_buckets: 各目标的令牌桶
+        _deferred: 等待目标令牌或等待重试的回复批次
+        _rate: 限速等待统计
+        _retries: 累计重试次数
+        _capture_cfg: 流量采样记录配置
 
     方法:
         load: 导入适配器
@@ -43,11 +81,32 @@ class Adapter:
         update_guild_list: 更新服务器列表
         reply: 必须方法，用于调用进行消息发送
         isFriend: 判断是否为好友
+        invalidate: 使缓存的实体实例失效
+        stats: 获取运行时统计
+        close: 关闭适配器持有的后台资源
         run: 具体消息接收逻辑后调用deal进行消息处理(简单示例)
 
     私有方法:
+        _start: 开始接收前调用, 用于建立连接或启动服务
         _recv_msg: 接收消息的逻辑示例
+        _recv_msg_batch: 批量接收消息, 未实现时回退到 _recv_msg
+        _accept: 校验、计数并记录一批接收到的消息
+        _shard: 获取消息所属会话的接收队列
+        _worker: 从接收队列取出消息进行处理
         _deal: 进行消息格式转换等
+        _outbox: 获取回复目标的发送队列
+        _coalescable: 判断回复是否可以合并
+        _flush: 将等待合并的回复放入发送队列
+        _sender: 从发送队列取出回复进行发送
+        _defer: 目标尚无令牌时暂存回复批次
+        _hold: 暂存回复批次一段时间
+        _undefer: 将暂存的回复批次放回发送队列
+        _waited: 记录限速等待时间
+        _throttle: 按适配器与目标限速, 超出速率时等待
+        _attempt: 限速后调用一次发送方法并记录熔断器结果
+        _backoff: 计算重试前的退避时间
+        _failed: 记录发送失败
+        _paced: 限速后调用发送方法, 失败时退避重试
         _send: 发送消息的逻辑示例
         _send_user: 发送消息给用户
         _send_group: 发送消息给群
@@ -64,7 +123,37 @@ class Adapter:
         bot: Bot instance
         cfg: Adapter config
         log: Log instance
-        basemessage: Message instance
+        enable: Whether it is enabled, run returns at once if not
+        messagepool: Message instance pool
+        message_pool_size: Free instances kept by the message instance pool, instances are not reused if 0
+        entitycache: User, Group, Channel and Guild instance cache
+        queue_size: Receive queue size
+        worker_num: Number of message worker coroutines
+        shard_num: Number of receive queues sharded by conversation, no sharding if 0
+        sender_num: Number of sender coroutines, send directly if 0
+        send_window: Time window(seconds) to coalesce text replies to the same target, no coalescing if 0
+        rate_limit: Sends per second of the adapter, no limit if 0
+        rate_burst: Sends allowed in a burst by the adapter
+        target_rate_limit: Sends per second of every target, no limit if 0
+        target_rate_burst: Sends allowed in a burst by every target
+        retry_num: Retries after a failed send
+        retry_delay: Backoff cap(seconds) of the first retry, doubled every retry
+        retry_max_delay: Maximum backoff cap(seconds)
+        breaker: Send circuit breaker
+        capture: Traffic sampling capture, None if not enabled
+
+    Private Attribute:
+        _queues: Receive queues
+        _workers: Message worker coroutines
+        _outboxes: Send queues sharded by target
+        _senders: Sender coroutines
+        _pending: Text replies waiting to be coalesced
+        _bucket: Adapter token bucket
+        _target_buckets: Token buckets of every target
+        _deferred: Reply batches waiting for their target's token or for a retry
+        _rate: Rate limit waiting statistics
+        _retries: Total retries
+        _capture_cfg: Traffic sampling capture config
 
     Method:
         load: Loading Adapter
@@ -83,11 +172,32 @@ class Adapter:
         update_guild_list: Update guild list
         reply: Must method, used to call for message sending
         isFriend: Determine whether it is a friend
+        invalidate: Invalidate cached entity instances
+        stats: Get runtime statistics
+        close: Close the background resources held by the adapter
         run: Example for receiving message
 
     Private Method:
+        _start: Called before receiving starts, used to connect or start servers
         _recv_msg: Example for receiving message
+        _recv_msg_batch: Receive messages in batch, fall back to _recv_msg if not implemented
+        _accept: Validate, count and log a batch of received messages
+        _shard: Get the receive queue of the conversation a message belongs to
+        _worker: Take messages from the receive queue and deal with them
         _deal: Translate message type
+        _outbox: Get the send queue of a reply target
+        _coalescable: Determine whether a reply can be coalesced
+        _flush: Put replies waiting to be coalesced into the send queue
+        _sender: Take replies from the send queue and send them
+        _defer: Hold a reply batch back while its target has no token
+        _hold: Hold a reply batch back for a while
+        _undefer: Put held back reply batches into the send queue again
+        _waited: Record rate limit waiting time
+        _throttle: Pace by adapter and target, wait when over the rate
+        _attempt: Call the send method once after pacing and record the outcome in the breaker
+        _backoff: Compute the backoff before a retry
+        _failed: Record a failed send
+        _paced: Call the send method after pacing, retry with backoff on failure
         _send: Example for sending message
         _send_user: Send message to user
         _send_group: Send message to group
@@ -170,6 +280,9 @@ class Adapter:
         """
         if not uid:
             return None
+        DefaultUser = self.entitycache.get(('user', uid))
+        if DefaultUser:
+            return DefaultUser
         DefaultUser = User(
             {
                 'id': uid,
@@ -178,9 +291,10 @@ class Adapter:
         )
         DefaultUser.load(
             {
-                'send': self._send_user
+                'send': partial(self._paced, ('user', uid), self._send_user)
             }
         )
+        self.entitycache.put(('user', uid), DefaultUser)
         return DefaultUser
 
     # 获取 Group 实例
@@ -202,6 +316,9 @@ class Adapter:
         """
         if not grid:
             return None
+        DefaultGroup = self.entitycache.get(('group', grid))
+        if DefaultGroup:
+            return DefaultGroup
         DefaultGroup = Group(
             {
                 'id': grid,
@@ -210,9 +327,10 @@ class Adapter:
         )
         DefaultGroup.load(
             {
-                'send': self._send_group
+                'send': partial(self._paced, ('group', grid), self._send_group)
             }
         )
+        self.entitycache.put(('group', grid), DefaultGroup)
         return DefaultGroup
 
     # 获取 Channel 实例
@@ -253,6 +371,9 @@ class Adapter:
             return None
         if (not cid) and (not guid):
             return None
+        DefaultChannel = self.entitycache.get(('channel', guid, cid))
+        if DefaultChannel:
+            return DefaultChannel
         DefaultChannel = Channel(
             {
                 'id': cid,
@@ -261,9 +382,10 @@ class Adapter:
         )
         DefaultChannel.load(
             {
-                'send': self._send_channel
+                'send': partial(self._paced, ('channel', cid), self._send_channel)
             }
         )
+        self.entitycache.put(('channel', guid, cid), DefaultChannel)
         return DefaultChannel
 
     # 获取 Guild 实例
@@ -283,6 +405,9 @@ class Adapter:
         """
         if not guid:
             return None
+        DefaultGuild = self.entitycache.get(('guild', guid))
+        if DefaultGuild:
+            return DefaultGuild
         DefaultGuild = Guild(
             {
                 'id': guid,
@@ -290,6 +415,7 @@ class Adapter:
             }
         )
         DefaultGuild.load({ })
+        self.entitycache.put(('guild', guid), DefaultGuild)
         return DefaultGuild
 
     # 获取用户列表
@@ -437,7 +563,9 @@ class Adapter:
         """
         # 默认参数
         # default parameters
-        self.basemessage = None
+        self.messagepool = None
+        self.message_pool_size = 0
+        self.entitycache = Cache()
         self.name = 'default-name-adapter'
         self.client = None
         self.version = 'default_version'
@@ -445,6 +573,36 @@ class Adapter:
         self.bot = None
         self.cfg = None
         self.log = None
+        self.enable = True
+        self.queue_size = 1024
+        self.worker_num = 4
+        self.shard_num = 0
+        self.sender_num = 2
+        self.send_window = 0
+        self._queues = []
+        self._workers = []
+        self._outboxes = []
+        self._senders = []
+        self._pending = { }
+        self.rate_limit = 0
+        self.rate_burst = 5
+        self.target_rate_limit = 0
+        self.target_rate_burst = 5
+        self._bucket = TokenBucket(0)
+        self._target_buckets = Cache(1024)
+        self._deferred = { }
+        self._rate = {
+            'waits': 0,
+            'wait_time': 0.0,
+            'max_wait': 0.0
+        }
+        self.retry_num = 2
+        self.retry_delay = 0.5
+        self.retry_max_delay = 10
+        self.breaker = CircuitBreaker()
+        self._retries = 0
+        self.capture = None
+        self._capture_cfg = { }
 
         # 根据传入配置信息更新属性
         # Update properties by passed config
@@ -475,6 +633,40 @@ class Adapter:
         self.bot = bot
         self.log = bot.log
 
+        # 读取该适配器的配置项
+        # Read the config entry of this adapter
+        _cfg = cfg.get(self.name, { })
+        self.enable = _cfg.get('enable', self.enable)
+        self.queue_size = _cfg.get('queue_size', self.queue_size)
+        self.worker_num = _cfg.get('worker_num', self.worker_num)
+        self.shard_num = _cfg.get('shard_num', self.shard_num)
+        self.sender_num = _cfg.get('sender_num', self.sender_num)
+        self.send_window = _cfg.get('send_window', self.send_window)
+        self.entitycache = Cache(_cfg.get('entity_cache_size', self.entitycache.size))
+        self.message_pool_size = _cfg.get('message_pool_size', self.message_pool_size)
+        self.rate_limit = _cfg.get('rate_limit', self.rate_limit)
+        self.rate_burst = _cfg.get('rate_burst', self.rate_burst)
+        self.target_rate_limit = _cfg.get('target_rate_limit', self.target_rate_limit)
+        self.target_rate_burst = _cfg.get('target_rate_burst', self.target_rate_burst)
+        self._bucket = TokenBucket(self.rate_limit, self.rate_burst)
+        self._target_buckets = Cache(self.entitycache.size)
+        self.retry_num = _cfg.get('retry_num', self.retry_num)
+        self.retry_delay = _cfg.get('retry_delay', self.retry_delay)
+        self.retry_max_delay = _cfg.get('retry_max_delay', self.retry_max_delay)
+        self.breaker = CircuitBreaker(
+            _cfg.get('breaker_threshold', self.breaker.threshold),
+            _cfg.get('breaker_timeout', self.breaker.timeout)
+        )
+        self._capture_cfg = {
+            'directory': _cfg.get('capture_dir', './capture'),
+            'sample': _cfg.get('capture_sample', 0),
+            'replies': _cfg.get('capture_replies', False),
+            'redact': _cfg.get('capture_redact', []),
+            'max_bytes': _cfg.get('capture_max_bytes', 64 * 1024 * 1024),
+            'backups': _cfg.get('capture_backups', 10),
+            'compression': _cfg.get('capture_compression', 'gzip')
+        }
+
         _uin = {
             'name': self.name,
             'id': self.id,
@@ -497,17 +689,21 @@ class Adapter:
                 'update_user_list': self.update_user_list,
                 'update_group_list': self.update_group_list,
                 'update_channel_list': self.update_channel_list,
-                'update_guild_list': self.update_guild_list
+                'update_guild_list': self.update_guild_list,
+                'invalidate': self.invalidate,
+                'stats': self.stats,
+                'close': self.close
             }
         )
 
         self.bot.append(_uin, self.client)
 
-        self.basemessage = message(
+        self.messagepool = MessagePool(
             {
                 "adapter": self.name,
                 "bot": self.bot
-            }
+            },
+            self.message_pool_size
         )
 
     # 类继承写法下导入类实例
@@ -526,6 +722,23 @@ class Adapter:
         """
         return self
 
+    # 开始接收前调用
+    # Called before receiving starts
+    async def _start(
+            self
+    ) -> None:
+        """
+        中文:
+        开始接收前调用, 此时接收与发送队列已创建, 网络适配器应在此建立连接或启动服务。
+        :return: None.
+
+        English:
+        Called before receiving starts, the receive and send queues exist by then,
+        network adapters should connect or start their servers here.
+        :return: None.
+        """
+        return None
+
     # 接收消息的逻辑示例
     # Example for receiving message
     async def _recv_msg(
@@ -542,6 +755,123 @@ class Adapter:
         """
         return { }
 
+    # 批量接收消息
+    # Receive messages in batch
+    async def _recv_msg_batch(
+            self
+    ) -> List[dict]:
+        """
+        中文:
+        批量接收消息, 天然按批次收到消息的协议应实现该方法, 默认回退到 _recv_msg。
+        :return: 接收到的消息列表(list)。
+
+        English:
+        Receive messages in batch, protocols that naturally deliver messages in batches should implement it,
+        falls back to _recv_msg by default.
+        :return: Received message list(list).
+        """
+        return [await self._recv_msg()]
+
+    # 校验、计数并记录一批接收到的消息
+    # Validate, count and log a batch of received messages
+    async def _accept(
+            self,
+            batch: List[dict]
+    ) -> List[dict]:
+        """
+        中文:
+        校验、计数并记录一批接收到的消息, 整批只写入一次日志。
+        :param batch: 接收到的消息列表(list)。
+        :return: 校验通过的消息列表(list)。
+
+        English:
+        Validate, count and log a batch of received messages, the whole batch is logged at once.
+        :param batch: Received message list(list).
+        :return: Valid message list(list).
+        """
+        _batch = [
+            _message for _message in batch
+            if isinstance(_message, dict) and isinstance(_message.get('msg'), str)
+        ]
+        if len(_batch) < len(batch):
+            await self.log.warn(
+                {
+                    'zh': f'[{self.name}] 丢弃 {len(batch) - len(_batch)} 条格式错误的消息',
+                    'en': f'[{self.name}] Dropped {len(batch) - len(_batch)} malformed messages'
+                }
+            )
+        if not _batch:
+            return _batch
+
+        self.client.msg_recv_append(len(_batch))
+        if self.capture is not None:
+            self.capture.record('in', _batch)
+        adapter_name_initial = self.name.replace('-adapter', '')
+        await self.log.info(
+            [
+                {
+                    'zh': f'[{adapter_name_initial}] 收到消息: ' + _message['msg'],
+                    'en': f'[{adapter_name_initial}] Message received: ' + _message['msg']
+                } for _message in _batch
+            ]
+        )
+        return _batch
+
+    # 获取消息所属会话的接收队列
+    # Get the receive queue of the conversation a message belongs to
+    def _shard(
+            self,
+            _message: dict
+    ) -> asyncio.Queue:
+        """
+        中文:
+        获取消息所属会话的接收队列, 同一群聊、频道或私聊的消息总是进入同一队列。
+        :param _message: 接收到的消息(dict)。
+        :return: 接收队列。
+
+        English:
+        Get the receive queue of the conversation a message belongs to,
+        messages of the same group, channel or private chat always enter the same queue.
+        :param _message: Received message(dict).
+        :return: Receive queue.
+        """
+        if len(self._queues) == 1:
+            return self._queues[0]
+        _key = _message.get('group') or _message.get('channel') or _message.get('user')
+        return self._queues[hash(_key) % len(self._queues)]
+
+    # 从接收队列取出消息进行处理
+    # Take messages from the receive queue and deal with them
+    async def _worker(
+            self,
+            queue: asyncio.Queue
+    ) -> None:
+        """
+        中文:
+        从接收队列取出消息进行处理, 单条消息处理出错不影响后续消息。
+        :param queue: 接收队列。
+        :return: None.
+
+        English:
+        Take messages from the receive queue and deal with them,
+        an error while dealing one message does not affect the following ones.
+        :param queue: Receive queue.
+        :return: None.
+        """
+        while True:
+            _message = await queue.get()
+            try:
+                await self._deal(_message)
+            except Exception as _error:
+                await self.log.error(
+                    {
+                        'zh': f'[{self.name}] 消息处理出错: {_error!r}',
+                        'en': f'[{self.name}] Error while dealing message: {_error!r}'
+                    }
+                )
+            finally:
+                queue.task_done()
+
     # 进行消息格式转换并进入处理层
     # Translate message type
     async def _deal(
@@ -550,46 +880,37 @@ class Adapter:
     ) -> None:
         """
         中文:
-        进行消息格式转换并进入处理层。
+        进行消息格式转换并进入处理层, 消息应已经过 _accept 校验与记录。
         :param _message: 接收到的消息(dict)。
         :return: None.
 
         English:
-        Translate message type then enter the processing layer.
+        Translate message type then enter the processing layer, the message should be accepted by _accept already.
         :param _message: Received message(dict).
         :return: None.
         """
-        self.client.msg_recv_append()
-        adapter_name_initial = self.name.replace('-adapter', '')
-        await self.log.info(
-            {
-                'zh': f'[{adapter_name_initial}] 收到消息: ' + _message['msg'],
-                'en': f'[{adapter_name_initial}] Message received: ' + _message['msg']
-            }
-        )
-        e = self.basemessage
-
-        e.load(
+        # 每条消息使用独立的消息实例, 开启实例池时处理完成后回收; 实体与好友、主人判断在首次访问时解析
+        # Every message uses its own message instance, released once processed when the pool is enabled;
+        # entities, friend and master checks are resolved on first access
+        e = self.messagepool.acquire(
             {
                 'adapter': self.name,
                 'seq': _message.get("seq"),
                 'notice': _message.get('notice'),
                 'msg': _message.get('msg'),
                 'file': _message.get('file'),
-                'isFriend': self.isFriend(_message.get('user')),
-                'isMaster': self.bot.isMaster(self.name, _message.get('user')),
-                'user': self.client.pickUser(_message.get('user')),
-                "group": self.client.pickGroup(_message.get('group')),
-                'channel': self.client.pickChannel(_message.get('channel'), _message.get('guild')),
-                'guild': self.client.pickGuild(_message.get('guild')),
                 "time": _message.get('time'),
-                'reply': self.reply
+                'reply': self.reply,
+                'raw': _message,
+                'resolver': self
             }
         )
         try:
             await self.bot.deal(e)
         except SystemExit:
             exit()
+        finally:
+            self.messagepool.release(e)
 
     # 发送消息的逻辑示例
     # Example for sending message
@@ -611,6 +932,417 @@ class Adapter:
         self.client.msg_send_append()
         return True
 
+    # 获取回复目标的发送队列
+    # Get the send queue of a reply target
+    def _outbox(
+            self,
+            target: tuple
+    ) -> asyncio.Queue:
+        """
+        中文:
+        获取回复目标的发送队列, 同一目标的回复总是进入同一队列, 保证发送顺序。
+        :param target: 回复目标。
+        :return: 发送队列。
+
+        English:
+        Get the send queue of a reply target, replies to the same target always enter the same queue,
+        keeping them in order.
+        :param target: Reply target.
+        :return: Send queue.
+        """
+        return self._outboxes[hash(target) % len(self._outboxes)]
+
+    # 判断回复是否可以合并
+    # Determine whether a reply can be coalesced
+    def _coalescable(
+            self,
+            _e: object
+    ) -> bool:
+        """
+        中文:
+        判断回复是否可以合并, 只有不带文件、at 与操作的纯文本回复可以合并。
+        :param _e: 消息实例。
+        :return: bool: 是否可以合并。
+
+        English:
+        Determine whether a reply can be coalesced, only plain text replies without file, at or operation can.
+        :param _e: Message instance.
+        :return: bool: Whether it can be coalesced.
+        """
+        return (
+                getattr(_e, 'notice', None) == 'text'
+                and isinstance(getattr(_e, 'msg', None), str)
+                and not getattr(_e, 'file', None)
+                and not getattr(_e, 'at_sender', False)
+                and not getattr(_e, 'operation', None)
+        )
+
+    # 将等待合并的回复放入发送队列
+    # Put replies waiting to be coalesced into the send queue
+    def _flush(
+            self,
+            target: tuple
+    ) -> None:
+        """
+        中文:
+        合并窗口结束后, 将等待合并的回复整批放入发送队列。
+        :param target: 回复目标。
+        :return: None.
+
+        English:
+        Put the replies waiting to be coalesced into the send queue as one batch once the window ends.
+        :param target: Reply target.
+        :return: None.
+        """
+        self._outbox(target).put_nowait((target, self._pending.pop(target), 0))
+
+    # 从发送队列取出回复进行发送
+    # Take replies from the send queue and send them
+    async def _sender(
+            self,
+            queue: asyncio.Queue
+    ) -> None:
+        """
+        中文:
+        从发送队列取出一批回复, 多条文本回复合并为一次发送。
+        目标尚无令牌的批次与发送失败后等待重试的批次都暂存起来, 不阻塞同一发送队列中的其他目标,
+        只有适配器令牌桶会在此等待。
+        合并发送成功后补齐发送计数, 使计数仍为回复条数。
+        :param queue: 发送队列。
+        :return: None.
+
+        English:
+        Take a batch of replies from the send queue, multiple text replies are sent as one.
+        Batches whose target has no token yet and failed batches waiting for a retry are held back without
+        blocking other targets in the same queue, only the adapter token bucket is waited for here.
+        The send counting is topped up after a coalesced send, so it still counts replies.
+        :param queue: Send queue.
+        :return: None.
+        """
+        while True:
+            _target, _batch, _attempt = await queue.get()
+            if self._defer(_target, _batch, _attempt):
+                queue.task_done()
+                continue
+            try:
+                _e = _batch[0][0]
+                if len(_batch) > 1:
+                    _e = copy.copy(_e)
+                    _e.msg = '\n'.join(_reply.msg for _reply, _ in _batch)
+                _result, _error, _retry = False, None, False
+                if self.breaker.allow():
+                    _result, _error, _retry = await self._attempt(_target, self._send, _e)
+                # 退避期间暂存该批次, 发送协程继续处理其他目标
+                # Hold the batch back during the backoff, the sender goes on with other targets
+                if not _result and _retry and _attempt < self.retry_num:
+                    self._retries += 1
+                    self._hold(_target, _batch, _attempt + 1, self._backoff(_attempt))
+                    continue
+                if not _result:
+                    await self._failed(_target, _error)
+                elif len(_batch) > 1:
+                    self.client.msg_send_append(len(_batch) - 1)
+                for _, _future in _batch:
+                    if not _future.done():
+                        _future.set_result(_result)
+            except Exception as _error:
+                for _, _future in _batch:
+                    if not _future.done():
+                        _future.set_exception(_error)
+            finally:
+                queue.task_done()
+
+    # 目标尚无令牌时暂存回复批次
+    # Hold a reply batch back while its target has no token
+    def _defer(
+            self,
+            target: tuple,
+            batch: list,
+            attempt: int
+    ) -> bool:
+        """
+        中文:
+        目标尚无令牌或已有暂存批次时暂存该批次, 在令牌可用时放回发送队列, 保持同一目标的发送顺序。
+        :param target: 回复目标。
+        :param batch: 回复批次。
+        :param attempt: 已失败的发送次数。
+        :return: 是否已暂存(bool)。
+
+        English:
+        Hold the batch back when its target has no token or already has held back batches, and put it into
+        the send queue again once the token is available, keeping the order of the target.
+        :param target: Reply target.
+        :param batch: Reply batch.
+        :param attempt: Failed send count so far.
+        :return: Whether it was held back(bool).
+        """
+        if target in self._deferred:
+            self._deferred[target].append((batch, attempt))
+            return True
+        _bucket = self._target_buckets.get(target) if self.target_rate_limit > 0 else None
+        _delay = _bucket.delay() if _bucket is not None else 0
+        if _delay <= 0:
+            return False
+        self._waited(_delay)
+        self._hold(target, batch, attempt, _delay)
+        return True
+
+    # 暂存回复批次一段时间
+    # Hold a reply batch back for a while
+    def _hold(
+            self,
+            target: tuple,
+            batch: list,
+            attempt: int,
+            delay: float
+    ) -> None:
+        """
+        中文:
+        暂存该目标的回复批次 delay 秒, 期间该目标之后的批次排在其后暂存。
+        同一目标只由一个发送协程处理, 调用时该目标没有其他暂存批次。
+        :param target: 回复目标。
+        :param batch: 回复批次。
+        :param attempt: 已失败的发送次数。
+        :param delay: 暂存的秒数。
+        :return: None.
+
+        English:
+        Hold the reply batch of the target back for delay seconds, later batches of the target are held back
+        behind it meanwhile.
+        A target is only handled by one sender, so it has no other held back batches when this is called.
+        :param target: Reply target.
+        :param batch: Reply batch.
+        :param attempt: Failed send count so far.
+        :param delay: Seconds to hold it back.
+        :return: None.
+        """
+        self._deferred[target] = [(batch, attempt)]
+        asyncio.get_running_loop().call_later(delay, self._undefer, target)
+
+    # 将暂存的回复批次放回发送队列
+    # Put held back reply batches into the send queue again
+    def _undefer(
+            self,
+            target: tuple
+    ) -> None:
+        """
+        中文:
+        将目标暂存的回复批次按顺序放回发送队列, 其中第一批会取得令牌, 之后的批次再次暂存。
+        :param target: 回复目标。
+        :return: None.
+
+        English:
+        Put the held back batches of the target into the send queue again in order, the first takes the token
+        and the later ones are held back again.
+        :param target: Reply target.
+        :return: None.
+        """
+        _outbox = self._outbox(target)
+        for _batch, _attempt in self._deferred.pop(target, []):
+            _outbox.put_nowait((target, _batch, _attempt))
+
+    # 记录限速等待时间
+    # Record rate limit waiting time
+    def _waited(
+            self,
+            wait: float
+    ) -> None:
+        """
+        中文:
+        记录限速等待时间。
+        :param wait: 等待的秒数。
+        :return: None.
+
+        English:
+        Record rate limit waiting time.
+        :param wait: Seconds waited.
+        :return: None.
+        """
+        if wait > 0:
+            self._rate['waits'] += 1
+            self._rate['wait_time'] += wait
+            self._rate['max_wait'] = max(self._rate['max_wait'], wait)
+
+    # 按适配器与目标限速
+    # Pace by adapter and target
+    async def _throttle(
+            self,
+            target: tuple
+    ) -> float:
+        """
+        中文:
+        按适配器与目标限速, 超出速率时按顺序等待令牌, 并记录等待时间。
+        先取目标令牌, 经发送队列发送时目标令牌已由 _defer 确认可用, 不会在此等待。
+        :param target: 发送目标。
+        :return: 等待的秒数(float)。
+
+        English:
+        Pace by adapter and target, wait for tokens in order when over the rate, and record the waiting time.
+        The target token is taken first, sends through the send queue had it confirmed by _defer already
+        and do not wait for it here.
+        :param target: Send target.
+        :return: Seconds waited(float).
+        """
+        _wait = 0.0
+        if self.target_rate_limit > 0:
+            _bucket = self._target_buckets.get(target)
+            if _bucket is None:
+                _bucket = TokenBucket(self.target_rate_limit, self.target_rate_burst)
+                self._target_buckets.put(target, _bucket)
+            _wait += await _bucket.acquire()
+
+        _wait += await self._bucket.acquire()
+        self._waited(_wait)
+        return _wait
+
+    # 限速后调用一次发送方法
+    # Call the send method once after pacing
+    async def _attempt(
+            self,
+            target: tuple,
+            send: Callable,
+            _e: object
+    ) -> tuple:
+        """
+        中文:
+        限速后调用一次发送方法, 并将结果记录到熔断器; PermanentError 不计入熔断器, UnconfirmedError 不可重试。
+        :param target: 发送目标。
+        :param send: 发送方法。
+        :param _e: 消息实例。
+        :return: (发送结果, 错误, 是否可以重试)。
+
+        English:
+        Call the send method once after pacing and record the outcome in the breaker; PermanentError is not
+        counted by the breaker and UnconfirmedError may not be retried.
+        :param target: Send target.
+        :param send: Send method.
+        :param _e: Message instance.
+        :return: (Send result, error, whether it may be retried).
+        """
+        _result, _error, _retry = False, None, True
+        _counted = False
+        try:
+            await self._throttle(target)
+            try:
+                _result = await send(_e)
+            except PermanentError:
+                raise
+            except UnconfirmedError as _exception:
+                # 请求可能已经送达, 重试可能重复发送
+                # The request may have arrived already, a retry could deliver it twice
+                _result, _error, _retry = False, _exception, False
+            except Exception as _exception:
+                _result, _error = False, _exception
+            _counted = True
+        except PermanentError as _exception:
+            # 针对单个目标的永久失败不重试, 也不计入熔断器
+            # A permanent failure of one target is neither retried nor counted by the breaker
+            return False, _exception, False
+        finally:
+            # 永久失败或被取消时没有结果, 释放试探名额, 熔断器不会停留在半开状态
+            # Permanent failures and cancellations have no outcome, the probe is released so the breaker
+            # does not stay half open
+            if not _counted:
+                self.breaker.release()
+        if _result:
+            self.breaker.success()
+            return _result, None, False
+        self.breaker.failure()
+        return False, _error, _retry
+
+    # 计算重试前的退避时间
+    # Compute the backoff before a retry
+    def _backoff(
+            self,
+            attempt: int
+    ) -> float:
+        """
+        中文:
+        计算带抖动的指数退避时间。
+        :param attempt: 已失败的发送次数减一。
+        :return: 退避的秒数(float)。
+
+        English:
+        Compute the jittered exponential backoff.
+        :param attempt: Failed send count so far minus one.
+        :return: Seconds to back off(float).
+        """
+        return random.uniform(0, min(self.retry_max_delay, self.retry_delay * 2 ** attempt))
+
+    # 记录发送失败
+    # Record a failed send
+    async def _failed(
+            self,
+            target: tuple,
+            error: Union[Exception, None]
+    ) -> None:
+        """
+        中文:
+        记录重试后仍然失败的发送。
+        :param target: 发送目标。
+        :param error: 最后一次的错误。
+        :return: None.
+
+        English:
+        Record a send that still failed after retrying.
+        :param target: Send target.
+        :param error: The last error.
+        :return: None.
+        """
+        await self.log.warn(
+            {
+                'zh': f'[{self.name}] 发送失败: {target}, 熔断器: {self.breaker.state}, 错误: {error!r}',
+                'en': f'[{self.name}] Send failed: {target}, breaker: {self.breaker.state}, error: {error!r}'
+            }
+        )
+
+    # 限速后调用发送方法, 失败时退避重试
+    # Call the send method after pacing, retry with backoff on failure
+    async def _paced(
+            self,
+            target: tuple,
+            send: Callable,
+            _e: object
+    ) -> bool:
+        """
+        中文:
+        限速后调用发送方法, 用于直接发送的 _send 与 User、Group、Channel 实例的发送方法, 退避在调用方的协程中等待;
+        经发送队列的回复由 _sender 暂存重试, 不在此等待。
+        发送失败或抛出异常时按带抖动的指数退避重试, 熔断器断开时直接返回失败; PermanentError 不重试也不计入熔断器,
+        UnconfirmedError 计入熔断器但不重试。
+        :param target: 发送目标。
+        :param send: 发送方法。
+        :param _e: 消息实例。
+        :return: bool: 发送是否成功。
+
+        English:
+        Call the send method after pacing, used by _send when sending directly and by the send methods of User,
+        Group and Channel instances, the backoff is waited for in the caller's coroutine; replies through the send
+        queue are held back for retries by _sender instead of waiting here.
+        Failed or raising sends are retried with jittered exponential backoff, and fail at once while the breaker
+        is open; PermanentError is neither retried nor counted by the breaker, UnconfirmedError is counted but
+        not retried.
+        :param target: Send target.
+        :param send: Send method.
+        :param _e: Message instance.
+        :return: bool: Whether the sending is successful.
+        """
+        _error = None
+        for _attempt in range(self.retry_num + 1):
+            if not self.breaker.allow():
+                break
+            _result, _error, _retry = await self._attempt(target, send, _e)
+            if _result:
+                return _result
+            if not _retry:
+                break
+            if _attempt < self.retry_num:
+                self._retries += 1
+                await asyncio.sleep(self._backoff(_attempt))
+
+        await self._failed(target, _error)
+        return False
+
     # 必须方法，用于调用进行消息发送
     # Must method, used to call for message sending
     async def reply(
@@ -620,10 +1352,48 @@ class Adapter:
         """
         中文:
         必须方法，用于调用进行消息发送。
+        适配器运行时回复进入发送队列, 开启合并窗口时同一目标的文本回复会被合并发送。
         :param _e: 消息实例。
         :return: bool: 发送是否成功。
+
+        English:
+        Must method, used to call for message sending.
+        Replies enter the send queue while the adapter is running, text replies to the same target are coalesced
+        when the window is enabled.
+        :param _e: Message instance.
+        :return: bool: Whether the sending is successful.
         """
-        return await self._send(_e)
+        _message = getattr(_e, 'e', None)
+        _target = _message.target if hasattr(_message, 'target') else (None, None)
+        if self.capture is not None and self.capture.replies:
+            self.capture.record(
+                'out',
+                [
+                    {
+                        'seq': getattr(_message, 'seq', None),
+                        'target': list(_target),
+                        'notice': getattr(_e, 'notice', None),
+                        'msg': getattr(_e, 'msg', None),
+                        'at_sender': getattr(_e, 'at_sender', None),
+                        'operation': getattr(_e, 'operation', None),
+                        'time': str(time.time())
+                    }
+                ]
+            )
+
+        if not self._outboxes:
+            return await self._paced(_target, self._send, _e)
+        _future = asyncio.get_running_loop().create_future()
+
+        if self.send_window > 0 and self._coalescable(_e):
+            if _target not in self._pending:
+                self._pending[_target] = []
+                asyncio.get_running_loop().call_later(self.send_window, self._flush, _target)
+            self._pending[_target].append((_e, _future))
+        else:
+            self._outbox(_target).put_nowait((_target, [(_e, _future)], 0))
+
+        return await _future
 
     # 判断是否为好友
     # Determine whether it is a friend
@@ -651,19 +1421,132 @@ class Adapter:
     ) -> None:
         """
         中文:
-        具体消息接收逻辑后调用deal进行消息处理(简单示例)。
+        按批次接收消息, 校验后放入接收队列, 由消息处理协程调用deal进行消息处理。
         :return: None.
 
         English:
-        Example for receiving message(Basic example).
+        Receive messages in batches and put them into the receive queue after validation,
+        worker coroutines call deal to process them.
         :return: None.
         """
-        # 简单示例
-        # Basic example
+        if not self.enable:
+            await self.log.info(
+                {
+                    'zh': f'[{self.name}] 适配器未启用',
+                    'en': f'[{self.name}] Adapter is not enabled'
+                }
+            )
+            return
+
+        # 分片模式下每个会话分片一个队列一个协程, 保证会话内消息顺序
+        # In shard mode every shard has one queue and one worker, keeping messages in a conversation ordered
+        if self.shard_num > 0:
+            _size = max(self.queue_size // self.shard_num, 1)
+            self._queues = [asyncio.Queue(maxsize=_size) for _ in range(self.shard_num)]
+            self._workers = [asyncio.create_task(self._worker(_queue)) for _queue in self._queues]
+        else:
+            self._queues = [asyncio.Queue(maxsize=self.queue_size)]
+            self._workers = [asyncio.create_task(self._worker(self._queues[0])) for _ in range(self.worker_num)]
+
+        self._outboxes = [asyncio.Queue() for _ in range(self.sender_num)]
+        self._senders = [asyncio.create_task(self._sender(_queue)) for _queue in self._outboxes]
+
+        # 采样记录在后台线程写入, 不占用事件循环
+        # Captures are written on a background thread, off the event loop
+        if self._capture_cfg.get('sample', 0) > 0 and self.capture is None:
+            self.capture = Capture(name=self.name, **self._capture_cfg)
+            self.capture.start()
+
+        await self._start()
+
+        # 接收队列已满时等待, 对 _recv_msg 形成背压
+        # Wait while the receive queue is full, applying backpressure to _recv_msg
         while True:
-            msg = await self._recv_msg()
+            for msg in await self._accept(await self._recv_msg_batch()):
+                await self._shard(msg).put(msg)
 
-            try:
-                _ = asyncio.create_task(self._deal(msg))
-            except SystemExit:
-                exit()
+    # 使缓存的实体实例失效
+    # Invalidate cached entity instances
+    def invalidate(
+            self,
+            kind: str = None,
+            *eid: str
+    ) -> None:
+        """
+        中文:
+        使缓存的实体实例失效, 实体信息变化后应调用。
+        不传参时清空全部缓存, 仅传入类型时清空该类型, 传入 id 时仅移除对应实例。
+        :param kind: 实体类型, 为 user、group、channel 或 guild。
+        :param eid: 实体 id, 频道为 (服务器 id, 子频道 id)。
+        :return: None.
+
+        English:
+        Invalidate cached entity instances, should be called after entity info changes.
+        Clear all without arguments, clear the type if only it is passed in, remove the instance if ids are passed in.
+        :param kind: Entity type, user, group, channel or guild.
+        :param eid: Entity id, (guild id, channel id) for channels.
+        :return: None.
+        """
+        if eid:
+            self.entitycache.pop((kind, *eid))
+        else:
+            self.entitycache.clear(kind)
+
+    # 获取运行时统计
+    # Get runtime statistics
+    def stats(
+            self
+    ) -> dict:
+        """
+        中文:
+        获取运行时统计。
+        :return: 运行时统计(dict)。
+
+        English:
+        Get runtime statistics.
+        :return: Runtime statistics(dict).
+        """
+        return {
+            'queue_size': self.queue_size,
+            'queue_depth': sum(_queue.qsize() for _queue in self._queues),
+            'worker_num': len(self._workers),
+            'shard_num': self.shard_num,
+            'sender_num': len(self._senders),
+            'outbox_depth': sum(_queue.qsize() for _queue in self._outboxes),
+            'pending_targets': len(self._pending),
+            'deferred_targets': len(self._deferred),
+            'rate_limit': {
+                'rate': self.rate_limit,
+                'target_rate': self.target_rate_limit,
+                'waits': self._rate['waits'],
+                'wait_time': self._rate['wait_time'],
+                'max_wait': self._rate['max_wait']
+            },
+            'retries': self._retries,
+            'breaker': self.breaker.stats(),
+            'capture': self.capture.stats() if self.capture is not None else None,
+            'entity_cache': {
+                'size': len(self.entitycache),
+                'hits': self.entitycache.hits,
+                'misses': self.entitycache.misses
+            }
+        }
+
+    # 关闭后台资源
+    # Close background resources
+    def close(
+            self
+    ) -> None:
+        """
+        中文:
+        关闭适配器持有的后台资源, 写入流量采样记录中剩余的记录并停止其后台线程。
+        :return: None.
+
+        English:
+        Close the background resources held by the adapter, writing the remaining records of the traffic
+        sampling capture and stopping its background thread.
+        :return: None.
+        """
+        if self.capture is not None:
+            self.capture.close()
+            self.capture = None
@@ -0,0 +1,229 @@
+import time
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+# 针对单个目标的永久发送失败
+# Permanent send failure of a single target
+class PermanentError(Exception):
+    """
+    中文:
+    针对单个目标的永久发送失败, 例如未知的回复路由、用户已屏蔽机器人或平台返回 4xx。
+    由 _send 等发送方法抛出, 不会重试, 也不计入熔断器, 少数失效的目标不会使全部目标熔断。
+
+    English:
+    Permanent send failure of a single target, e.g. an unknown reply route, the user blocked the bot or the
+    platform answered 4xx.
+    Raised by send methods such as _send, it is neither retried nor counted by the breaker, so a few dead
+    targets do not open the breaker for every target.
+    """
+
+
+# 结果未知的发送
+# Send with an unknown outcome
+class UnconfirmedError(Exception):
+    """
+    中文:
+    请求已经写出但没有得到确认, 例如写出后超时或连接被重置, 平台可能已经处理了该请求。
+    计入熔断器但不会重试, 避免不幂等的发送 (例如聊天消息或回调 POST) 重复送达。
+
+    English:
+    The request was written but never confirmed, e.g. a timeout or a connection reset after writing it,
+    so the platform may have handled it already.
+    It is counted by the breaker but never retried, so sends that are not idempotent, such as chat messages
+    or callback POSTs, are not delivered twice.
+    """
+
+
+# 熔断器
+# Circuit breaker
+class CircuitBreaker:
+    """
+    中文:
+    熔断器, 连续发送失败达到阈值后断开, 断开期间发送直接失败而不再等待平台接口。
+    断开超过恢复时间后进入半开状态, 只放行一次试探发送, 成功则闭合, 失败则重新断开。
+
+    属性:
+        threshold: 断开前允许的连续失败次数, 为 0 时不熔断
+        timeout: 断开后进入半开状态前的秒数
+        failures: 当前连续失败次数
+        opened: 累计断开次数
+        rejected: 断开期间被拒绝的发送数
+
+    私有属性:
+        _state: 当前状态
+        _opened_at: 最近一次断开的时间点
+        _probing: 半开状态下是否已有试探发送
+
+    方法:
+        state: 获取当前状态
+        allow: 判断是否允许发送
+        success: 记录一次发送成功
+        failure: 记录一次发送失败
+        release: 放弃没有结果的试探发送
+        stats: 获取熔断器统计
+
+    English:
+    Circuit breaker, opens after the consecutive send failures reach the threshold, sends fail at once
+    while it is open instead of waiting on the platform API.
+    It turns half open after the timeout and lets a single probe send through, closing on success
+    and opening again on failure.
+
+    Attributes:
+        threshold: Consecutive failures allowed before opening, no breaking if 0
+        timeout: Seconds before turning half open after opening
+        failures: Current consecutive failure count
+        opened: Total times opened
+        rejected: Sends rejected while open
+
+    Private attributes:
+        _state: Current state
+        _opened_at: Time point of the last opening
+        _probing: Whether a probe send is in flight while half open
+
+    Methods:
+        state: Get the current state
+        allow: Determine whether a send is allowed
+        success: Record a successful send
+        failure: Record a failed send
+        release: Give up a probe send that has no outcome
+        stats: Get breaker statistics
+    """
+
+    def __init__(
+            self,
+            threshold: int = 5,
+            timeout: float = 30
+    ) -> None:
+        """
+        中文:
+        初始化熔断器, 初始为闭合状态。
+        :param threshold: 断开前允许的连续失败次数。
+        :param timeout: 断开后进入半开状态前的秒数。
+        :return: None.
+
+        English:
+        Initialize the circuit breaker, it starts closed.
+        :param threshold: Consecutive failures allowed before opening.
+        :param timeout: Seconds before turning half open after opening.
+        :return: None.
+        """
+        self.threshold = threshold
+        self.timeout = timeout
+        self.failures = 0
+        self.opened = 0
+        self.rejected = 0
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def state(
+            self
+    ) -> str:
+        """
+        中文:
+        获取当前状态, 断开超过恢复时间时转为半开。
+        :return: 当前状态(str)。
+
+        English:
+        Get the current state, turns half open once the timeout has passed.
+        :return: Current state(str).
+        """
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.timeout:
+            self._state = HALF_OPEN
+            self._probing = False
+        return self._state
+
+    def allow(
+            self
+    ) -> bool:
+        """
+        中文:
+        判断是否允许发送, 半开状态下只允许一次试探发送。
+        :return: 是否允许(bool)。
+
+        English:
+        Determine whether a send is allowed, only one probe send is allowed while half open.
+        :return: Whether it is allowed(bool).
+        """
+        _state = self.state
+        if _state == CLOSED:
+            return True
+        if _state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        self.rejected += 1
+        return False
+
+    def success(
+            self
+    ) -> None:
+        """
+        中文:
+        记录一次发送成功, 闭合熔断器。
+        :return: None.
+
+        English:
+        Record a successful send, close the breaker.
+        :return: None.
+        """
+        self.failures = 0
+        self._state = CLOSED
+        self._probing = False
+
+    def failure(
+            self
+    ) -> None:
+        """
+        中文:
+        记录一次发送失败, 达到阈值或试探失败时断开。
+        :return: None.
+
+        English:
+        Record a failed send, open when the threshold is reached or the probe fails.
+        :return: None.
+        """
+        self.failures += 1
+        if self.threshold <= 0:
+            return
+        if self._state == HALF_OPEN or self.failures >= self.threshold:
+            if self._state != OPEN:
+                self.opened += 1
+            self._state = OPEN
+            self._opened_at = time.monotonic()
+            self._probing = False
+
+    def release(
+            self
+    ) -> None:
+        """
+        中文:
+        放弃没有结果的试探发送, 例如被取消或永久失败, 允许之后的发送再次试探。
+        :return: None.
+
+        English:
+        Give up a probe send that has no outcome, e.g. cancelled or failed permanently, letting a later send
+        probe again.
+        :return: None.
+        """
+        self._probing = False
+
+    def stats(
+            self
+    ) -> dict:
+        """
+        中文:
+        :return: 熔断器统计(dict)。
+
+        English:
+        :return: Breaker statistics(dict).
+        """
+        return {
+            'state': self.state,
+            'failures': self.failures,
+            'opened': self.opened,
+            'rejected': self.rejected
+        }
@@ -0,0 +1,161 @@
+from collections import OrderedDict
+from typing import Hashable, Union
+
+
+# 实体缓存
+# Entity cache
+class Cache:
+    """
+    中文:
+    LRU 实体缓存, 用于复用 User、Group、Channel、Guild 实例。
+    键为 (实体类型, id...) 元组, 超出容量时淘汰最久未使用的实例。
+
+    属性:
+        size: 缓存容量
+        hits: 命中次数
+        misses: 未命中次数
+
+    私有属性:
+        _data: 缓存数据
+
+    方法:
+        get: 获取缓存实例
+        put: 存入实例
+        pop: 移除单个实例
+        clear: 清空缓存, 可选仅清空某一实体类型
+
+    English:
+    LRU entity cache, used to reuse User, Group, Channel and Guild instances.
+    Keys are (entity type, id...) tuples, the least recently used instance is evicted when full.
+
+    Attributes:
+        size: Cache capacity
+        hits: Hit count
+        misses: Miss count
+
+    Private attributes:
+        _data: Cached data
+
+    Methods:
+        get: Get a cached instance
+        put: Put an instance
+        pop: Remove a single instance
+        clear: Clear the cache, optionally only one entity type
+    """
+
+    def __init__(
+            self,
+            size: int = 1024
+    ) -> None:
+        """
+        中文:
+        初始化实体缓存。
+        :param size: 缓存容量。
+        :return: None.
+
+        English:
+        Initialize the entity cache.
+        :param size: Cache capacity.
+        :return: None.
+        """
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def __len__(
+            self
+    ) -> int:
+        """
+        中文:
+        :return: 缓存实例数(int)。
+
+        English:
+        :return: Number of cached instances(int).
+        """
+        return len(self._data)
+
+    def get(
+            self,
+            key: tuple
+    ) -> Union[object, None]:
+        """
+        中文:
+        获取缓存实例并标记为最近使用。
+        :param key: 缓存键。
+        :return: 缓存实例, 不存在时返回 None。
+
+        English:
+        Get a cached instance and mark it as recently used.
+        :param key: Cache key.
+        :return: Cached instance, None if it does not exist.
+        """
+        try:
+            _value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return _value
+
+    def put(
+            self,
+            key: tuple,
+            value: object
+    ) -> None:
+        """
+        中文:
+        存入实例, 超出容量时淘汰最久未使用的实例。
+        :param key: 缓存键。
+        :param value: 实例。
+        :return: None.
+
+        English:
+        Put an instance, evict the least recently used one when full.
+        :param key: Cache key.
+        :param value: Instance.
+        :return: None.
+        """
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.size:
+            self._data.popitem(last=False)
+
+    def pop(
+            self,
+            key: tuple
+    ) -> None:
+        """
+        中文:
+        移除单个实例。
+        :param key: 缓存键。
+        :return: None.
+
+        English:
+        Remove a single instance.
+        :param key: Cache key.
+        :return: None.
+        """
+        self._data.pop(key, None)
+
+    def clear(
+            self,
+            kind: Hashable = None
+    ) -> None:
+        """
+        中文:
+        清空缓存, 传入实体类型时仅清空该类型。
+        :param kind: 实体类型。
+        :return: None.
+
+        English:
+        Clear the cache, only the entity type if it is passed in.
+        :param kind: Entity type.
+        :return: None.
+        """
+        if kind is None:
+            self._data.clear()
+            return
+        for _key in [_key for _key in self._data if _key[0] == kind]:
+            del self._data[_key]
@@ -0,0 +1,376 @@
+import gzip
+import hashlib
+import json
+import os
+import queue
+import random
+import threading
+import time
+from typing import Dict, Iterable, List
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 流量采样记录
+# Traffic sampling capture
+class Capture:
+    """
+    中文:
+    流量采样记录, 按采样率将接收到的原始消息与可选的回复写入滚动的压缩 JSONL 文件。
+    接收消息写入 <适配器名称>.in.<时间>.<序号>.jsonl.gz, 格式与 _recv_msg 返回的消息相同, 可直接交给回放适配器;
+    回复写入 <适配器名称>.out.<时间>.<序号>.jsonl.gz。
+    每批记录压缩为一个独立的 gzip 成员或 zstd 帧追加到文件末尾, 进程中断时已写入的批次仍可读取。
+    record 只做采样并放入队列, 脱敏、编码、压缩与写入都在后台线程按 flush_interval 间隔批量完成,
+    避免每批消息都唤醒线程争抢 GIL, 队列已满时丢弃记录而不等待。
+    需要脱敏的字段在任意嵌套层级都替换为其哈希值, 同一值脱敏后仍然相同, 回放时会话关系保持不变; bytes 内容写为 null。
+
+    属性:
+        directory: 输出目录
+        name: 文件名前缀
+        sample: 采样率, 0 到 1
+        replies: 是否记录回复
+        redact: 需要脱敏的字段
+        max_bytes: 单个文件的最大字节数, 超过后滚动
+        backups: 每类保留的文件数
+        compression: 压缩方式, 为 gzip 或 zstd
+        flush_interval: 后台线程写入的间隔(秒)
+        records: 已写入的记录数
+        dropped: 队列已满时丢弃的记录数
+        files: 已创建的文件数
+
+    私有属性:
+        _queue: 等待写入的记录
+        _thread: 后台写入线程
+        _stopping: 停止后台线程的事件
+        _files: 各类记录当前的文件路径
+        _compressor: zstd 压缩器
+
+    方法:
+        start: 启动后台写入线程
+        record: 采样并记录一批消息
+        close: 写入剩余记录并停止后台线程
+        stats: 获取记录统计
+
+    English:
+    Traffic sampling capture, writes sampled raw inbound messages and optionally replies to rotating
+    compressed JSONL files.
+    Inbound messages go to <adapter name>.in.<time>.<number>.jsonl.gz, shaped like the messages returned by _recv_msg,
+    so they can be given to the replay adapter as is; replies go to <adapter name>.out.<time>.<number>.jsonl.gz.
+    Every batch of records is compressed as an independent gzip member or zstd frame appended to the file,
+    so batches written before the process stops stay readable.
+    record only samples and enqueues, redaction, encoding, compression and writing all happen in bulk on the
+    background thread every flush_interval, so batches do not each wake the thread to contend for the GIL;
+    records are dropped instead of waiting when the queue is full.
+    Redacted fields are replaced by their hash at any nesting level, equal values stay equal after redaction so
+    conversations keep their shape on replay; bytes contents are written as null.
+
+    Attributes:
+        directory: Output directory
+        name: File name prefix
+        sample: Sampling rate, 0 to 1
+        replies: Whether to capture replies
+        redact: Fields to redact
+        max_bytes: Maximum bytes of a single file, rotated beyond it
+        backups: Files kept per kind
+        compression: Compression, gzip or zstd
+        flush_interval: Interval between writes of the background thread(seconds)
+        records: Records written
+        dropped: Records dropped while the queue was full
+        files: Files created
+
+    Private attributes:
+        _queue: Records waiting to be written
+        _thread: Background writer thread
+        _stopping: Event stopping the background thread
+        _files: Current file path of every kind of record
+        _compressor: zstd compressor
+
+    Methods:
+        start: Start the background writer thread
+        record: Sample and capture a batch of messages
+        close: Write the remaining records and stop the background thread
+        stats: Get capture statistics
+    """
+
+    def __init__(
+            self,
+            directory: str,
+            name: str,
+            sample: float = 1,
+            replies: bool = False,
+            redact: Iterable[str] = (),
+            max_bytes: int = 64 * 1024 * 1024,
+            backups: int = 10,
+            compression: str = 'gzip',
+            queue_size: int = 65536,
+            flush_interval: float = 0.5
+    ) -> None:
+        """
+        中文:
+        初始化流量采样记录, 使用 zstd 时需要安装 zstandard。
+        :param directory: 输出目录。
+        :param name: 文件名前缀。
+        :param sample: 采样率。
+        :param replies: 是否记录回复。
+        :param redact: 需要脱敏的字段。
+        :param max_bytes: 单个文件的最大字节数。
+        :param backups: 每类保留的文件数。
+        :param compression: 压缩方式。
+        :param queue_size: 等待写入的批次数上限。
+        :param flush_interval: 后台线程写入的间隔(秒)。
+        :return: None.
+
+        English:
+        Initialize the traffic sampling capture, zstandard must be installed to use zstd.
+        :param directory: Output directory.
+        :param name: File name prefix.
+        :param sample: Sampling rate.
+        :param replies: Whether to capture replies.
+        :param redact: Fields to redact.
+        :param max_bytes: Maximum bytes of a single file.
+        :param backups: Files kept per kind.
+        :param compression: Compression.
+        :param queue_size: Maximum batches waiting to be written.
+        :param flush_interval: Interval between writes of the background thread(seconds).
+        :return: None.
+        """
+        if compression == 'zstd' and zstandard is None:
+            raise ValueError('zstd compression requires the zstandard package')
+        self.directory = directory
+        self.name = name
+        self.sample = sample
+        self.replies = replies
+        self.redact = frozenset(redact)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.compression = compression
+        self.records = 0
+        self.dropped = 0
+        self.files = 0
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._stopping = threading.Event()
+        self._files: Dict[str, str] = { }
+        self._compressor = zstandard.ZstdCompressor() if compression == 'zstd' else None
+
+    def start(
+            self
+    ) -> None:
+        """
+        中文:
+        启动后台写入线程。
+        :return: None.
+
+        English:
+        Start the background writer thread.
+        :return: None.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._write, name=f'capture-{self.name}', daemon=True)
+        self._thread.start()
+
+    def record(
+            self,
+            kind: str,
+            batch: List[dict]
+    ) -> None:
+        """
+        中文:
+        按采样率记录一批消息, 只放入队列, 不会阻塞调用方。
+        :param kind: 记录类型, 为 in 或 out。
+        :param batch: 消息列表。
+        :return: None.
+
+        English:
+        Capture a batch of messages by the sampling rate, only enqueued, never blocks the caller.
+        :param kind: Record kind, in or out.
+        :param batch: Message list.
+        :return: None.
+        """
+        if kind == 'out' and not self.replies:
+            return
+        _sampled = batch if self.sample >= 1 else [_message for _message in batch if random.random() < self.sample]
+        if not _sampled:
+            return
+        try:
+            # 浅拷贝后再交给后台线程, 避免写入时消息已被修改
+            # Shallow copy before handing over to the thread, so later changes to the messages are not written
+            self._queue.put_nowait((kind, [dict(_message) for _message in _sampled]))
+        except queue.Full:
+            self.dropped += len(_sampled)
+
+    def close(
+            self
+    ) -> None:
+        """
+        中文:
+        写入剩余记录并停止后台线程。
+        :return: None.
+
+        English:
+        Write the remaining records and stop the background thread.
+        :return: None.
+        """
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join()
+        self._thread = None
+
+    def stats(
+            self
+    ) -> dict:
+        """
+        中文:
+        :return: 记录统计(dict)。
+
+        English:
+        :return: Capture statistics(dict).
+        """
+        return {
+            'sample': self.sample,
+            'records': self.records,
+            'dropped': self.dropped,
+            'pending': self._queue.qsize(),
+            'files': self.files
+        }
+
+    def _redact(
+            self,
+            value
+    ):
+        """
+        中文:
+        将需要脱敏的字段替换为哈希值, 逐层处理嵌套的字典与列表, 例如 raw 与 sender 中的字段。
+        回复记录的 target 为 [类型, id], 类型是需要脱敏的字段时 id 按该字段脱敏, 与接收消息中的值保持一致。
+        :param value: 消息或其中的值。
+        :return: 脱敏后的值。
+
+        English:
+        Replace the fields to redact with their hash, nested dicts and lists are walked, e.g. fields in raw and
+        sender.
+        The target of a reply record is [kind, id], the id is redacted as that field when the kind is a field to
+        redact, so it stays equal to the value in inbound messages.
+        :param value: Message or a value in it.
+        :return: Redacted value.
+        """
+        if not self.redact:
+            return value
+        if isinstance(value, dict):
+            _redacted = {
+                _key: self._hash(_value) if _key in self.redact else self._redact(_value)
+                for _key, _value in value.items()
+            }
+            _target = _redacted.get('target')
+            if isinstance(_target, list) and len(_target) == 2 and _target[0] in self.redact:
+                _redacted['target'] = [_target[0], self._hash(_target[1])]
+            return _redacted
+        if isinstance(value, (list, tuple)):
+            return [self._redact(_value) for _value in value]
+        return value
+
+    def _hash(
+            self,
+            value
+    ):
+        """
+        中文:
+        将值替换为哈希值, 字典与列表逐个替换其中的值, None 保持不变。
+        :param value: 值。
+        :return: 哈希后的值。
+
+        English:
+        Replace a value with its hash, values inside dicts and lists are replaced one by one, None is kept.
+        :param value: Value.
+        :return: Hashed value.
+        """
+        if value is None:
+            return None
+        if isinstance(value, dict):
+            return {_key: self._hash(_value) for _key, _value in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [self._hash(_value) for _value in value]
+        return f'sha256:{hashlib.sha256(str(value).encode()).hexdigest()[:16]}'
+
+    def _path(
+            self,
+            kind: str,
+            size: int
+    ) -> str:
+        """
+        中文:
+        获取写入路径, 当前文件写入后将超过 max_bytes 时滚动到新文件并删除多余的旧文件。
+        :param kind: 记录类型。
+        :param size: 即将写入的字节数。
+        :return: 文件路径(str)。
+
+        English:
+        Get the path to write, rolling over to a new file and deleting extra old files when the current one
+        would exceed max_bytes.
+        :param kind: Record kind.
+        :param size: Bytes about to be written.
+        :return: File path(str).
+        """
+        _path = self._files.get(kind)
+        if _path is not None and os.path.exists(_path) and os.path.getsize(_path) + size <= self.max_bytes:
+            return _path
+
+        _prefix = f'{self.name}.{kind}.'
+        _suffix = '.jsonl.zst' if self.compression == 'zstd' else '.jsonl.gz'
+        _stamp = time.strftime('%Y%m%d-%H%M%S')
+        # 时间之后带序号, 同一秒内多次滚动时文件名仍按时间排序
+        # A number follows the time, so file names stay sorted by time when rolling over within a second
+        _index = 0
+        _path = os.path.join(self.directory, f'{_prefix}{_stamp}.{_index:03d}{_suffix}')
+        while os.path.exists(_path):
+            _index += 1
+            _path = os.path.join(self.directory, f'{_prefix}{_stamp}.{_index:03d}{_suffix}')
+        self._files[kind] = _path
+        self.files += 1
+
+        _old = sorted(_file for _file in os.listdir(self.directory) if _file.startswith(_prefix))
+        for _file in _old[:max(len(_old) - self.backups + 1, 0)]:
+            os.remove(os.path.join(self.directory, _file))
+        return _path
+
+    def _write(
+            self
+    ) -> None:
+        """
+        中文:
+        后台写入线程, 每隔 flush_interval 取出队列中的全部记录, 按类型各压缩为一个成员或帧写入, 停止前再写入一次。
+        :return: None.
+
+        English:
+        Background writer thread, takes every queued record each flush_interval and writes one member or frame
+        per kind, writing once more before stopping.
+        :return: None.
+        """
+        while True:
+            _stop = self._stopping.wait(self.flush_interval)
+            _lines: Dict[str, List[str]] = { }
+            while True:
+                try:
+                    _kind, _batch = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                _lines.setdefault(_kind, []).extend(
+                    json.dumps(self._redact(_message), ensure_ascii=False, default=lambda _value: None)
+                    for _message in _batch
+                )
+
+            for _kind, _kind_lines in _lines.items():
+                _data = ('\n'.join(_kind_lines) + '\n').encode('utf-8')
+                _data = self._compressor.compress(_data) if self._compressor else gzip.compress(_data, 6)
+                try:
+                    with open(self._path(_kind, len(_data)), 'ab') as _file:
+                        _file.write(_data)
+                except OSError:
+                    self.dropped += len(_kind_lines)
+                    continue
+                self.records += len(_kind_lines)
+            if _stop:
+                return
@@ -0,0 +1,594 @@
+import asyncio
+import json
+import uuid
+from typing import Dict, List, Tuple, Union
+from urllib.parse import urlsplit
+
+from .breaker import UnconfirmedError
+
+# 常用状态码的原因短语
+# Reason phrases of common status codes
+REASONS = {
+    200: 'OK',
+    204: 'No Content',
+    400: 'Bad Request',
+    401: 'Unauthorized',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    408: 'Request Timeout',
+    413: 'Payload Too Large',
+    431: 'Request Header Fields Too Large',
+    500: 'Internal Server Error',
+    503: 'Service Unavailable'
+}
+
+
+# HTTP 错误
+# HTTP error
+class HTTPError(Exception):
+    """
+    中文:
+    请求或响应不合规时抛出, status 为应返回给对端的状态码。
+
+    English:
+    Raised when a request or response is malformed, status is the status code to answer the peer with.
+    """
+
+    def __init__(
+            self,
+            status: int,
+            reason: str = ''
+    ) -> None:
+        """
+        中文:
+        :param status: 状态码。
+        :param reason: 原因, 为空时使用状态码的原因短语。
+        :return: None.
+
+        English:
+        :param status: Status code.
+        :param reason: Reason, the reason phrase of the status code if empty.
+        :return: None.
+        """
+        super().__init__(f'{status} {reason or REASONS.get(status, "")}')
+        self.status = status
+
+
+# 请求已写出但没有收到完整响应
+# The request was written but no complete response was received
+class ResponseLost(ConnectionError, UnconfirmedError):
+    """
+    中文:
+    请求已写出后超时、断开或收到不合规的响应, 对端可能已经处理了该请求, 发送时不会重试。
+
+    English:
+    A timeout, a disconnection or a malformed response after the request was written, the peer may have handled
+    the request already, so sends do not retry it.
+    """
+
+
+# HTTP 请求
+# HTTP request
+class Request:
+    """
+    中文:
+    服务端收到的 HTTP 请求。
+
+    属性:
+        method: 请求方法
+        path: 请求路径
+        query: 查询字符串
+        version: HTTP 版本
+        headers: 请求头, 键为小写
+        body: 请求体
+        keep_alive: 响应后是否保持连接
+
+    方法:
+        json: 按 JSON 解析请求体
+
+    English:
+    HTTP request received by the server.
+
+    Attributes:
+        method: Request method
+        path: Request path
+        query: Query string
+        version: HTTP version
+        headers: Request headers, keys are lower case
+        body: Request body
+        keep_alive: Whether to keep the connection after responding
+
+    Methods:
+        json: Parse the request body as JSON
+    """
+
+    def __init__(
+            self,
+            method: str,
+            target: str,
+            version: str,
+            headers: Dict[str, str],
+            body: bytes
+    ) -> None:
+        """
+        中文:
+        :param method: 请求方法。
+        :param target: 请求目标, 包含路径与查询字符串。
+        :param version: HTTP 版本。
+        :param headers: 请求头。
+        :param body: 请求体。
+        :return: None.
+
+        English:
+        :param method: Request method.
+        :param target: Request target, with path and query string.
+        :param version: HTTP version.
+        :param headers: Request headers.
+        :param body: Request body.
+        :return: None.
+        """
+        _target = urlsplit(target)
+        self.method = method
+        self.path = _target.path
+        self.query = _target.query
+        self.version = version
+        self.headers = headers
+        self.body = body
+        _connection = headers.get('connection', '').lower()
+        self.keep_alive = _connection != 'close' if version == 'HTTP/1.1' else _connection == 'keep-alive'
+
+    def json(
+            self
+    ) -> object:
+        """
+        中文:
+        :return: 按 JSON 解析的请求体。
+
+        English:
+        :return: Request body parsed as JSON.
+        """
+        return json.loads(self.body)
+
+
+# 读取 HTTP 头
+# Read HTTP headers
+async def read_head(
+        reader: asyncio.StreamReader
+) -> Union[Tuple[str, Dict[str, str]], None]:
+    """
+    中文:
+    读取起始行与头部, 连接在请求之间正常关闭时返回 None。
+    :param reader: 流读取器。
+    :return: (起始行, 小写键的头部字典), 连接关闭时为 None。
+
+    English:
+    Read the start line and headers, None if the connection closes cleanly between requests.
+    :param reader: Stream reader.
+    :return: (Start line, header dict with lower case keys), None if the connection is closed.
+    """
+    try:
+        _head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError as _error:
+        if not _error.partial.strip():
+            return None
+        raise HTTPError(400)
+    except asyncio.LimitOverrunError:
+        raise HTTPError(431)
+    _lines = _head.decode('latin-1').split('\r\n')
+    _headers = { }
+    for _line in _lines[1:]:
+        if ':' in _line:
+            _key, _value = _line.split(':', 1)
+            _headers[_key.strip().lower()] = _value.strip()
+    return _lines[0], _headers
+
+
+# 读取消息体
+# Read the message body
+async def read_body(
+        reader: asyncio.StreamReader,
+        headers: Dict[str, str],
+        max_size: int
+) -> bytes:
+    """
+    中文:
+    按 Content-Length 或分块编码读取消息体, 超过上限时抛出 413。
+    :param reader: 流读取器。
+    :param headers: 头部字典。
+    :param max_size: 消息体最大字节数。
+    :return: 消息体(bytes)。
+
+    English:
+    Read the body by Content-Length or chunked encoding, raise 413 when it exceeds the limit.
+    :param reader: Stream reader.
+    :param headers: Header dict.
+    :param max_size: Maximum body bytes.
+    :return: Body(bytes).
+    """
+    try:
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            _chunks = []
+            _size = 0
+            while True:
+                _length = int((await reader.readuntil(b'\r\n')).split(b';', 1)[0], 16)
+                _size += _length
+                if _size > max_size:
+                    raise HTTPError(413)
+                if _length == 0:
+                    # 最后一块没有数据, 跳过尾部头直到空行
+                    # The last chunk has no data, skip trailer headers up to the empty line
+                    while (await reader.readuntil(b'\r\n')) != b'\r\n':
+                        pass
+                    return b''.join(_chunk[:-2] for _chunk in _chunks)
+                _chunks.append(await reader.readexactly(_length + 2))
+
+        _length = int(headers.get('content-length', 0))
+        if _length > max_size:
+            raise HTTPError(413)
+        return await reader.readexactly(_length) if _length else b''
+    except (ValueError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+        raise HTTPError(400)
+
+
+# 读取一个请求
+# Read a request
+async def read_request(
+        reader: asyncio.StreamReader,
+        max_size: int = 1024 * 1024,
+        head: Tuple[str, Dict[str, str]] = None
+) -> Union[Request, None]:
+    """
+    中文:
+    从连接读取一个请求, 流水线请求按顺序逐个读取。
+    :param reader: 流读取器。
+    :param max_size: 请求体最大字节数。
+    :param head: 已由 read_head 读取的起始行与头部, 为空时先读取。
+    :return: 请求实例, 连接在请求之间关闭时为 None。
+
+    English:
+    Read one request from the connection, pipelined requests are read one by one in order.
+    :param reader: Stream reader.
+    :param max_size: Maximum request body bytes.
+    :param head: Start line and headers already read by read_head, read first if empty.
+    :return: Request instance, None if the connection closes between requests.
+    """
+    _head = head or await read_head(reader)
+    if _head is None:
+        return None
+    _line, _headers = _head
+    _parts = _line.split(' ')
+    if len(_parts) != 3:
+        raise HTTPError(400)
+    return Request(_parts[0], _parts[1], _parts[2], _headers, await read_body(reader, _headers, max_size))
+
+
+# 写入响应
+# Write a response
+def write_response(
+        writer: asyncio.StreamWriter,
+        status: int,
+        body: Union[bytes, str, dict, list] = b'',
+        keep_alive: bool = True,
+        headers: Dict[str, str] = None
+) -> None:
+    """
+    中文:
+    写入响应, dict 与 list 按 JSON 编码; 只写入缓冲, 由调用方决定何时等待写出。
+    :param writer: 流写入器。
+    :param status: 状态码。
+    :param body: 响应体。
+    :param keep_alive: 是否保持连接。
+    :param headers: 额外的响应头。
+    :return: None.
+
+    English:
+    Write a response, dict and list are JSON encoded; only the buffer is written, the caller decides when to drain.
+    :param writer: Stream writer.
+    :param status: Status code.
+    :param body: Response body.
+    :param keep_alive: Whether to keep the connection.
+    :param headers: Extra response headers.
+    :return: None.
+    """
+    _headers = dict(headers or { })
+    if isinstance(body, (dict, list)):
+        body = json.dumps(body, ensure_ascii=False)
+        _headers.setdefault('Content-Type', 'application/json')
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    _headers['Content-Length'] = str(len(body))
+    _headers['Connection'] = 'keep-alive' if keep_alive else 'close'
+    _head = f'HTTP/1.1 {status} {REASONS.get(status, "")}\r\n' + ''.join(
+        f'{_name}: {_value}\r\n' for _name, _value in _headers.items()
+    ) + '\r\n'
+    writer.write(_head.encode('latin-1') + body)
+
+
+# 编码 multipart/form-data 请求体
+# Encode a multipart/form-data body
+def multipart(
+        fields: Dict[str, object],
+        files: Dict[str, Union[bytes, Tuple[str, bytes]]]
+) -> Tuple[bytes, str]:
+    """
+    中文:
+    编码 multipart/form-data 请求体, 用于上传文件。
+    :param fields: 普通字段, 值按 str 编码。
+    :param files: 文件字段, 值为文件内容或 (文件名, 文件内容), 只有内容时以字段名作为文件名。
+    :return: (请求体, Content-Type)。
+
+    English:
+    Encode a multipart/form-data body, used to upload files.
+    :param fields: Plain fields, values are encoded as str.
+    :param files: File fields, values are file contents or (file name, file content), the field name is used
+        as the file name if only the content is given.
+    :return: (Body, Content-Type).
+    """
+    _boundary = uuid.uuid4().hex
+    _parts = []
+    for _name, _value in fields.items():
+        _parts.append(
+            f'--{_boundary}\r\nContent-Disposition: form-data; name="{_name}"\r\n\r\n{_value}\r\n'.encode('utf-8')
+        )
+    for _name, _file in files.items():
+        _filename, _data = _file if isinstance(_file, tuple) else (_name, _file)
+        _parts.append(
+            f'--{_boundary}\r\nContent-Disposition: form-data; name="{_name}"; filename="{_filename}"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\n'.encode('utf-8') + _data + b'\r\n'
+        )
+    _parts.append(f'--{_boundary}--\r\n'.encode('utf-8'))
+    return b''.join(_parts), f'multipart/form-data; boundary={_boundary}'
+
+
+# HTTP 客户端
+# HTTP client
+class Client:
+    """
+    中文:
+    带连接池的 HTTP/1.1 客户端, 按 (主机, 端口, 是否加密) 复用保持连接的空闲连接。
+
+    属性:
+        pool_size: 每个主机保留的空闲连接数
+        timeout: 单次请求超时(秒)
+        max_size: 响应体最大字节数
+
+    私有属性:
+        _idle: 空闲连接
+
+    方法:
+        request: 发送请求
+        post_json: 以 JSON 发送 POST 请求并解析 JSON 响应
+        close: 关闭全部空闲连接
+
+    English:
+    HTTP/1.1 client with a connection pool, reuses kept-alive idle connections per (host, port, secure).
+
+    Attributes:
+        pool_size: Idle connections kept per host
+        timeout: Timeout(seconds) of a single request
+        max_size: Maximum response body bytes
+
+    Private attributes:
+        _idle: Idle connections
+
+    Methods:
+        request: Send a request
+        post_json: Send a POST request as JSON and parse the JSON response
+        close: Close every idle connection
+    """
+
+    def __init__(
+            self,
+            pool_size: int = 8,
+            timeout: float = 30,
+            max_size: int = 16 * 1024 * 1024
+    ) -> None:
+        """
+        中文:
+        :param pool_size: 每个主机保留的空闲连接数。
+        :param timeout: 单次请求超时(秒)。
+        :param max_size: 响应体最大字节数。
+        :return: None.
+
+        English:
+        :param pool_size: Idle connections kept per host.
+        :param timeout: Timeout(seconds) of a single request.
+        :param max_size: Maximum response body bytes.
+        :return: None.
+        """
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.max_size = max_size
+        self._idle: Dict[tuple, List[tuple]] = { }
+
+    async def _open(
+            self,
+            key: tuple
+    ) -> tuple:
+        """
+        中文:
+        取出一个空闲连接, 没有可用连接时新建。
+        :param key: (主机, 端口, 是否加密)。
+        :return: (流读取器, 流写入器)。
+
+        English:
+        Take an idle connection, open a new one if none is available.
+        :param key: (Host, port, secure).
+        :return: (Stream reader, stream writer).
+        """
+        _idle = self._idle.get(key, [])
+        while _idle:
+            _reader, _writer = _idle.pop()
+            if not _writer.is_closing() and not _reader.at_eof():
+                return _reader, _writer
+            _writer.close()
+        return await asyncio.open_connection(key[0], key[1], ssl=key[2] or None)
+
+    def _release(
+            self,
+            key: tuple,
+            connection: tuple
+    ) -> None:
+        """
+        中文:
+        归还连接, 空闲连接已满时关闭。
+        :param key: (主机, 端口, 是否加密)。
+        :param connection: (流读取器, 流写入器)。
+        :return: None.
+
+        English:
+        Return a connection, close it when the idle connections are full.
+        :param key: (Host, port, secure).
+        :param connection: (Stream reader, stream writer).
+        :return: None.
+        """
+        _idle = self._idle.setdefault(key, [])
+        if len(_idle) < self.pool_size:
+            _idle.append(connection)
+        else:
+            connection[1].close()
+
+    async def request(
+            self,
+            method: str,
+            url: str,
+            body: bytes = b'',
+            headers: Dict[str, str] = None
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        """
+        中文:
+        发送请求, 复用的空闲连接在收到任何响应数据之前被对端关闭时自动换用新连接重试一次。
+        只有长度确定且保持连接的响应才会把连接放回连接池。
+        :param method: 请求方法。
+        :param url: 请求地址。
+        :param body: 请求体。
+        :param headers: 额外的请求头。
+        :return: (状态码, 小写键的响应头, 响应体)。
+
+        English:
+        Send a request, retried once on a new connection when a reused idle connection was closed by the peer
+        before any response data was received. The connection only returns to the pool when the response body
+        was length delimited and the response keeps the connection alive.
+        :param method: Request method.
+        :param url: Request url.
+        :param body: Request body.
+        :param headers: Extra request headers.
+        :return: (Status code, response headers with lower case keys, response body).
+        """
+        _url = urlsplit(url)
+        _secure = _url.scheme == 'https'
+        _key = (_url.hostname, _url.port or (443 if _secure else 80), _secure)
+        _path = (_url.path or '/') + (f'?{_url.query}' if _url.query else '')
+        _head = (
+                f'{method} {_path} HTTP/1.1\r\nHost: {_url.netloc}\r\nContent-Length: {len(body)}\r\n'
+                + ''.join(f'{_name}: {_value}\r\n' for _name, _value in (headers or { }).items())
+                + '\r\n'
+        ).encode('latin-1')
+
+        for _attempt in range(2):
+            _reused = bool(self._idle.get(_key))
+            _connection = await asyncio.wait_for(self._open(_key), self.timeout)
+            _reader, _writer = _connection
+            # 只有在收到响应的第一个字节之前断开才重试, 超时或已收到响应时对端可能已经处理了请求
+            # Only retry when the connection drops before the first response byte, after a timeout or once
+            # a response has started the peer may already have handled the request
+            try:
+                _writer.write(_head + body)
+                await _writer.drain()
+                _first = await asyncio.wait_for(_reader.readexactly(1), self.timeout)
+            except asyncio.TimeoutError as _error:
+                _writer.close()
+                raise ResponseLost('no response within the timeout') from _error
+            except (ConnectionError, OSError, asyncio.IncompleteReadError) as _error:
+                _writer.close()
+                if _reused and _attempt == 0:
+                    continue
+                raise ResponseLost('connection closed') from _error
+            try:
+                _response = await asyncio.wait_for(read_head(_reader), self.timeout)
+                if _response is None:
+                    raise ConnectionResetError('connection closed')
+                _line, _headers = _response
+                _line = _first.decode('latin-1') + _line
+                _version, _status = _line.split(' ')[0], int(_line.split(' ')[1])
+                # 没有 Content-Length 也不是分块编码的响应体一直读到连接关闭
+                # A body without Content-Length or chunked encoding is read until the connection closes
+                _empty = method == 'HEAD' or _status in (204, 304) or 100 <= _status < 200
+                _delimited = _empty or 'content-length' in _headers \
+                    or 'chunked' in _headers.get('transfer-encoding', '').lower()
+                if _empty:
+                    _body = b''
+                elif _delimited:
+                    _body = await asyncio.wait_for(read_body(_reader, _headers, self.max_size), self.timeout)
+                else:
+                    _body = b''
+                    while len(_body) <= self.max_size:
+                        _chunk = await asyncio.wait_for(_reader.read(self.max_size + 1 - len(_body)), self.timeout)
+                        if not _chunk:
+                            break
+                        _body += _chunk
+                    if len(_body) > self.max_size:
+                        raise HTTPError(413)
+            except (ConnectionError, OSError, HTTPError, ValueError, IndexError, asyncio.TimeoutError) as _error:
+                _writer.close()
+                raise ResponseLost(repr(_error)) from _error
+            # 只有长度确定且保持连接的响应才放回连接池
+            # Only return the connection to the pool when the body was length delimited and the response keeps
+            # the connection alive
+            _connection_header = _headers.get('connection', '').lower()
+            _keep_alive = _connection_header != 'close' if _version == 'HTTP/1.1' \
+                else _connection_header == 'keep-alive'
+            if _delimited and _keep_alive:
+                self._release(_key, _connection)
+            else:
+                _writer.close()
+            return _status, _headers, _body
+
+    async def post_json(
+            self,
+            url: str,
+            data: object,
+            headers: Dict[str, str] = None
+    ) -> Tuple[int, object]:
+        """
+        中文:
+        以 JSON 发送 POST 请求并解析 JSON 响应, 响应不是 JSON 时返回原始内容。
+        :param url: 请求地址。
+        :param data: 请求数据。
+        :param headers: 额外的请求头。
+        :return: (状态码, 响应数据)。
+
+        English:
+        Send a POST request as JSON and parse the JSON response, the raw content is returned if it is not JSON.
+        :param url: Request url.
+        :param data: Request data.
+        :param headers: Extra request headers.
+        :return: (Status code, response data).
+        """
+        _status, _, _body = await self.request(
+            'POST',
+            url,
+            json.dumps(data, ensure_ascii=False).encode('utf-8'),
+            {'Content-Type': 'application/json', **(headers or { })}
+        )
+        try:
+            return _status, json.loads(_body) if _body else None
+        except ValueError:
+            return _status, _body
+
+    async def close(
+            self
+    ) -> None:
+        """
+        中文:
+        关闭全部空闲连接。
+        :return: None.
+
+        English:
+        Close every idle connection.
+        :return: None.
+        """
+        for _connections in self._idle.values():
+            for _, _writer in _connections:
+                _writer.close()
+        self._idle.clear()
@@ -0,0 +1,104 @@
+import asyncio
+import time
+
+
+# 令牌桶限速器
+# Token bucket rate limiter
+class TokenBucket:
+    """
+    中文:
+    令牌桶限速器, 用于控制发送速率。
+    超出速率的发送按调用顺序预约令牌并等待, 而不是直接失败。
+
+    属性:
+        rate: 每秒补充的令牌数, 为 0 时不限速
+        burst: 桶容量, 即允许的突发发送数
+
+    私有属性:
+        _ready: 下一个令牌可用的时间点, 由容量向前折算
+
+    方法:
+        acquire: 获取一个令牌, 返回等待的秒数
+        delay: 获取下一个令牌可用前的秒数, 不预约令牌
+
+    English:
+    Token bucket rate limiter, used to pace sending.
+    Sends over the rate reserve a token in call order and wait, instead of failing.
+
+    Attributes:
+        rate: Tokens refilled per second, no limit if 0
+        burst: Bucket capacity, i.e. the number of sends allowed in a burst
+
+    Private attributes:
+        _ready: Time point when the next token is available, offset forward by the capacity
+
+    Methods:
+        acquire: Get a token, return the seconds waited
+        delay: Get the seconds until the next token is available, without reserving it
+    """
+
+    def __init__(
+            self,
+            rate: float,
+            burst: int = 1
+    ) -> None:
+        """
+        中文:
+        初始化令牌桶, 初始时桶是满的。
+        :param rate: 每秒补充的令牌数。
+        :param burst: 桶容量。
+        :return: None.
+
+        English:
+        Initialize the token bucket, it starts full.
+        :param rate: Tokens refilled per second.
+        :param burst: Bucket capacity.
+        :return: None.
+        """
+        self.rate = rate
+        self.burst = max(int(burst), 1)
+        self._ready = 0.0
+
+    async def acquire(
+            self
+    ) -> float:
+        """
+        中文:
+        获取一个令牌, 桶为空时预约下一个令牌并等待。
+        :return: 等待的秒数(float)。
+
+        English:
+        Get a token, reserve the next one and wait when the bucket is empty.
+        :return: Seconds waited(float).
+        """
+        if self.rate <= 0:
+            return 0.0
+
+        _now = time.monotonic()
+        _interval = 1 / self.rate
+        # 桶满时最多累积 burst 个令牌
+        # At most burst tokens are accumulated when the bucket is full
+        _ready = max(self._ready, _now - (self.burst - 1) * _interval)
+        self._ready = _ready + _interval
+
+        _wait = _ready - _now
+        if _wait <= 0:
+            return 0.0
+        await asyncio.sleep(_wait)
+        return _wait
+
+    def delay(
+            self
+    ) -> float:
+        """
+        中文:
+        获取下一个令牌可用前的秒数, 不预约令牌, 为 0 时 acquire 不会等待。
+        :return: 等待的秒数(float)。
+
+        English:
+        Get the seconds until the next token is available without reserving it, acquire does not wait if 0.
+        :return: Seconds to wait(float).
+        """
+        if self.rate <= 0:
+            return 0.0
+        return max(self._ready - time.monotonic(), 0.0)
@@ -0,0 +1,637 @@
+import asyncio
+import base64
+import hashlib
+import os
+import struct
+import time
+from typing import Dict, List, Tuple, Union
+from urllib.parse import urlsplit
+
+# 握手时用于计算 Sec-WebSocket-Accept 的固定 GUID
+# Fixed GUID used to compute Sec-WebSocket-Accept during the handshake
+GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+# 每次从连接读取的字节数, 一次读取中的全部完整帧作为一批返回
+# Bytes read from the connection at a time, every complete frame in one read is returned as a batch
+READ_SIZE = 65536
+
+
+# 连接已关闭
+# Connection closed
+class ConnectionClosed(Exception):
+    """
+    中文:
+    连接已关闭, 对端关闭、读到 EOF 或写入失败时抛出。
+
+    English:
+    Connection closed, raised when the peer closes, EOF is read or writing fails.
+    """
+
+
+# 握手或协议错误
+# Handshake or protocol error
+class WebSocketError(Exception):
+    """
+    中文:
+    握手失败或收到不合规的帧时抛出, 收到不合规的帧时连接以 code 关闭。
+
+    属性:
+        code: 关闭状态码
+
+    English:
+    Raised when the handshake fails or a malformed frame is received, the connection is closed with code
+    on malformed frames.
+
+    Attributes:
+        code: Close status code
+    """
+
+    def __init__(
+            self,
+            message: str = '',
+            code: int = 1002
+    ) -> None:
+        super().__init__(message)
+        self.code = code
+
+
+# WebSocket 连接
+# WebSocket connection
+class WebSocket:
+    """
+    中文:
+    基于 asyncio 流的 WebSocket 连接, 自行处理分帧、掩码、分片与控制帧。
+    读取时一次读入整块数据并解析其中全部完整帧, 高消息速率下单次唤醒即可取得一批消息。
+
+    属性:
+        reader: 流读取器
+        writer: 流写入器
+        client: 是否为客户端, 客户端发送的帧需要掩码
+        path: 握手路径
+        headers: 握手请求或响应头, 键为小写
+        max_size: 单条消息的最大字节数
+        closed: 连接是否已关闭
+        close_code: 对端发送的关闭状态码, 未收到 close 帧时为 None
+        last_seen: 最近一次收到数据的时间点
+
+    私有属性:
+        _buffer: 尚未解析的数据
+        _position: 缓冲中已解析到的位置
+        _fragments: 分片消息的已收到部分
+        _size: 分片消息已收到的字节数
+        _opcode: 分片消息的类型
+
+    方法:
+        recv_batch: 接收一批消息
+        send: 发送一条消息
+        send_many: 发送多条消息, 只等待一次写缓冲
+        ping: 发送 ping
+        close: 关闭连接
+
+    私有方法:
+        _frame: 构建帧
+        _parse: 从缓冲中解析一个完整帧
+        _control: 处理控制帧
+
+    English:
+    WebSocket connection based on asyncio streams, handles framing, masking, fragmentation and control frames itself.
+    Reads take a whole chunk and parse every complete frame in it, so one wake-up yields a batch of messages
+    at high message rates.
+
+    Attributes:
+        reader: Stream reader
+        writer: Stream writer
+        client: Whether it is a client, frames sent by clients must be masked
+        path: Handshake path
+        headers: Handshake request or response headers, keys are lower case
+        max_size: Maximum bytes of a single message
+        closed: Whether the connection is closed
+        close_code: Close status code sent by the peer, None if no close frame was received
+        last_seen: Time point of the last received data
+
+    Private attributes:
+        _buffer: Data not parsed yet
+        _position: Position parsed so far in the buffer
+        _fragments: Received parts of a fragmented message
+        _size: Bytes received so far of a fragmented message
+        _opcode: Type of the fragmented message
+
+    Methods:
+        recv_batch: Receive a batch of messages
+        send: Send a message
+        send_many: Send multiple messages, waiting for the write buffer only once
+        ping: Send a ping
+        close: Close the connection
+
+    Private methods:
+        _frame: Build a frame
+        _parse: Parse one complete frame from the buffer
+        _control: Handle a control frame
+    """
+
+    def __init__(
+            self,
+            reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter,
+            client: bool,
+            path: str = '/',
+            headers: Dict[str, str] = None,
+            max_size: int = 16 * 1024 * 1024
+    ) -> None:
+        """
+        中文:
+        初始化 WebSocket 连接, 握手应已完成。
+        :param reader: 流读取器。
+        :param writer: 流写入器。
+        :param client: 是否为客户端。
+        :param path: 握手路径。
+        :param headers: 握手请求或响应头。
+        :param max_size: 单条消息的最大字节数。
+        :return: None.
+
+        English:
+        Initialize the WebSocket connection, the handshake should be done already.
+        :param reader: Stream reader.
+        :param writer: Stream writer.
+        :param client: Whether it is a client.
+        :param path: Handshake path.
+        :param headers: Handshake request or response headers.
+        :param max_size: Maximum bytes of a single message.
+        :return: None.
+        """
+        self.reader = reader
+        self.writer = writer
+        self.client = client
+        self.path = path
+        self.headers = headers or { }
+        self.max_size = max_size
+        self.closed = False
+        self.close_code = None
+        self.last_seen = time.monotonic()
+        self._buffer = bytearray()
+        self._position = 0
+        self._fragments = []
+        self._size = 0
+        self._opcode = None
+
+    def _frame(
+            self,
+            opcode: int,
+            payload: bytes
+    ) -> bytes:
+        """
+        中文:
+        构建帧, 客户端发送的帧使用随机掩码。
+        :param opcode: 帧类型。
+        :param payload: 帧内容。
+        :return: 帧数据(bytes)。
+
+        English:
+        Build a frame, frames sent by clients use a random mask.
+        :param opcode: Frame type.
+        :param payload: Frame content.
+        :return: Frame data(bytes).
+        """
+        _length = len(payload)
+        _mask_bit = 0x80 if self.client else 0
+        if _length < 126:
+            _header = struct.pack('!BB', 0x80 | opcode, _mask_bit | _length)
+        elif _length < 65536:
+            _header = struct.pack('!BBH', 0x80 | opcode, _mask_bit | 126, _length)
+        else:
+            _header = struct.pack('!BBQ', 0x80 | opcode, _mask_bit | 127, _length)
+        if not self.client:
+            return _header + payload
+        _mask = os.urandom(4)
+        return _header + _mask + _xor(payload, _mask)
+
+    def _parse(
+            self
+    ) -> Union[Tuple[bool, int, bytes], None]:
+        """
+        中文:
+        从缓冲中解析一个完整帧, 数据不足时返回 None。
+        :return: (是否为最后分片, 帧类型, 帧内容), 数据不足时为 None。
+
+        English:
+        Parse one complete frame from the buffer, None if the data is not enough.
+        :return: (Whether it is the final fragment, frame type, frame content), None if the data is not enough.
+        """
+        _buffer = self._buffer
+        _start = self._position
+        if len(_buffer) - _start < 2:
+            return None
+        _first, _second = _buffer[_start], _buffer[_start + 1]
+        _length = _second & 0x7F
+        _offset = _start + 2
+        if _length == 126:
+            if len(_buffer) - _start < 4:
+                return None
+            _length = struct.unpack_from('!H', _buffer, _start + 2)[0]
+            _offset = _start + 4
+        elif _length == 127:
+            if len(_buffer) - _start < 10:
+                return None
+            _length = struct.unpack_from('!Q', _buffer, _start + 2)[0]
+            _offset = _start + 10
+        if _length > self.max_size:
+            raise WebSocketError(f'frame too large: {_length}', 1009)
+
+        # 客户端发送的帧必须掩码, 服务端发送的帧不能掩码
+        # Frames sent by clients must be masked and frames sent by servers must not
+        _masked = _second & 0x80
+        if bool(_masked) == self.client:
+            raise WebSocketError('masked server frame' if self.client else 'unmasked client frame')
+        _end = _offset + (4 if _masked else 0) + _length
+        if len(_buffer) < _end:
+            return None
+        if _masked:
+            _mask = bytes(_buffer[_offset:_offset + 4])
+            _payload = _xor(bytes(_buffer[_offset + 4:_end]), _mask)
+        else:
+            _payload = bytes(_buffer[_offset:_end])
+        self._position = _end
+        return bool(_first & 0x80), _first & 0x0F, _payload
+
+    async def _control(
+            self,
+            opcode: int,
+            payload: bytes
+    ) -> None:
+        """
+        中文:
+        处理控制帧, 收到 ping 时回复 pong, 收到 close 时回复 close 并关闭连接。
+        :param opcode: 帧类型。
+        :param payload: 帧内容。
+        :return: None.
+
+        English:
+        Handle a control frame, answer ping with pong, answer close with close and close the connection.
+        :param opcode: Frame type.
+        :param payload: Frame content.
+        :return: None.
+        """
+        if opcode == OP_PING:
+            self.writer.write(self._frame(OP_PONG, payload))
+        elif opcode == OP_CLOSE:
+            self.close_code = struct.unpack('!H', payload[:2])[0] if len(payload) >= 2 else 1005
+            await self.close(payload[:2] or struct.pack('!H', 1000))
+
+    async def recv_batch(
+            self
+    ) -> List[Union[str, bytes]]:
+        """
+        中文:
+        接收一批消息, 返回当前已读入的全部完整消息, 至少包含一条。
+        文本消息返回 str, 二进制消息返回 bytes, 连接关闭后抛出 ConnectionClosed。
+        收到不合规的帧时以对应状态码关闭连接并抛出 WebSocketError: 未按要求掩码为 1002,
+        消息超过 max_size (含分片累计) 为 1009, 文本不是合法的 UTF-8 为 1007。
+        :return: 消息列表(list)。
+
+        English:
+        Receive a batch of messages, return every complete message read so far, at least one.
+        Text messages are returned as str and binary messages as bytes, ConnectionClosed is raised once closed.
+        Malformed frames close the connection with the matching status code and raise WebSocketError:
+        1002 for wrong masking, 1009 for messages over max_size (fragments included), 1007 for text that is not
+        valid UTF-8.
+        :return: Message list(list).
+        """
+        _messages = []
+        while True:
+            try:
+                while (_frame := self._parse()) is not None:
+                    _fin, _opcode, _payload = _frame
+                    if _opcode >= OP_CLOSE:
+                        await self._control(_opcode, _payload)
+                        if self.closed:
+                            break
+                        continue
+                    if _opcode != OP_CONTINUATION:
+                        self._opcode = _opcode
+                        self._fragments = []
+                        self._size = 0
+                    # 分片累计的长度同样受 max_size 限制
+                    # The accumulated length of fragments is limited by max_size as well
+                    self._size += len(_payload)
+                    if self._size > self.max_size:
+                        raise WebSocketError(f'message too large: {self._size}', 1009)
+                    self._fragments.append(_payload)
+                    if not _fin:
+                        continue
+                    _data = b''.join(self._fragments)
+                    self._fragments = []
+                    self._size = 0
+                    if self._opcode == OP_TEXT:
+                        try:
+                            _data = _data.decode('utf-8')
+                        except UnicodeDecodeError:
+                            raise WebSocketError('invalid utf-8 text', 1007)
+                    _messages.append(_data)
+            except WebSocketError as _error:
+                await self.close(struct.pack('!H', _error.code))
+                raise
+            # 整批解析完后一次性丢弃已解析的数据
+            # Drop the parsed data at once after the whole batch is parsed
+            del self._buffer[:self._position]
+            self._position = 0
+            if _messages:
+                return _messages
+            if self.closed:
+                raise ConnectionClosed('closed')
+
+            try:
+                _chunk = await self.reader.read(READ_SIZE)
+            except (ConnectionError, OSError) as _error:
+                self.closed = True
+                raise ConnectionClosed(repr(_error))
+            if not _chunk:
+                self.closed = True
+                raise ConnectionClosed('eof')
+            self.last_seen = time.monotonic()
+            self._buffer += _chunk
+
+    async def send(
+            self,
+            data: Union[str, bytes]
+    ) -> None:
+        """
+        中文:
+        发送一条消息, str 作为文本帧, bytes 作为二进制帧。
+        :param data: 消息内容。
+        :return: None.
+
+        English:
+        Send a message, str as a text frame and bytes as a binary frame.
+        :param data: Message content.
+        :return: None.
+        """
+        await self.send_many([data])
+
+    async def send_many(
+            self,
+            data: List[Union[str, bytes]]
+    ) -> None:
+        """
+        中文:
+        发送多条消息, 全部写入后只等待一次写缓冲。
+        :param data: 消息内容列表。
+        :return: None.
+
+        English:
+        Send multiple messages, waiting for the write buffer only once after writing all of them.
+        :param data: Message content list.
+        :return: None.
+        """
+        if self.closed:
+            raise ConnectionClosed('closed')
+        self.writer.writelines(
+            self._frame(OP_TEXT, _data.encode('utf-8')) if isinstance(_data, str) else self._frame(OP_BINARY, _data)
+            for _data in data
+        )
+        try:
+            await self.writer.drain()
+        except (ConnectionError, OSError) as _error:
+            self.closed = True
+            raise ConnectionClosed(repr(_error))
+
+    async def ping(
+            self,
+            payload: bytes = b''
+    ) -> None:
+        """
+        中文:
+        发送 ping。
+        :param payload: ping 内容。
+        :return: None.
+
+        English:
+        Send a ping.
+        :param payload: Ping content.
+        :return: None.
+        """
+        if self.closed:
+            raise ConnectionClosed('closed')
+        self.writer.write(self._frame(OP_PING, payload))
+        await self.writer.drain()
+
+    async def close(
+            self,
+            code: bytes = struct.pack('!H', 1000)
+    ) -> None:
+        """
+        中文:
+        发送 close 帧并关闭连接, 重复调用无效果。
+        :param code: 关闭状态码。
+        :return: None.
+
+        English:
+        Send a close frame and close the connection, repeated calls have no effect.
+        :param code: Close status code.
+        :return: None.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.writer.write(self._frame(OP_CLOSE, code))
+            await self.writer.drain()
+        except (ConnectionError, OSError):
+            pass
+        self.writer.close()
+
+
+# 按 4 字节掩码异或
+# XOR with a 4-byte mask
+def _xor(
+        data: bytes,
+        mask: bytes
+) -> bytes:
+    """
+    中文:
+    按 4 字节掩码异或, 整块转为整数运算以避免逐字节循环。
+    :param data: 数据。
+    :param mask: 掩码。
+    :return: 异或后的数据(bytes)。
+
+    English:
+    XOR with a 4-byte mask, the whole block is computed as an integer to avoid a per-byte loop.
+    :param data: Data.
+    :param mask: Mask.
+    :return: XORed data(bytes).
+    """
+    if not data:
+        return data
+    _length = len(data)
+    _mask = (mask * (_length // 4 + 1))[:_length]
+    return (int.from_bytes(data, 'little') ^ int.from_bytes(_mask, 'little')).to_bytes(_length, 'little')
+
+
+# 读取 HTTP 头
+# Read HTTP headers
+async def _read_head(
+        reader: asyncio.StreamReader
+) -> Tuple[str, Dict[str, str]]:
+    """
+    中文:
+    读取 HTTP 起始行与头部。
+    :param reader: 流读取器。
+    :return: (起始行, 小写键的头部字典)。
+
+    English:
+    Read the HTTP start line and headers.
+    :param reader: Stream reader.
+    :return: (Start line, header dict with lower case keys).
+    """
+    try:
+        _head = await reader.readuntil(b'\r\n\r\n')
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError) as _error:
+        raise WebSocketError(f'bad handshake: {_error!r}')
+    _lines = _head.decode('latin-1').split('\r\n')
+    _headers = { }
+    for _line in _lines[1:]:
+        if ':' in _line:
+            _key, _value = _line.split(':', 1)
+            _headers[_key.strip().lower()] = _value.strip()
+    return _lines[0], _headers
+
+
+# 计算 Sec-WebSocket-Accept
+# Compute Sec-WebSocket-Accept
+def _accept_key(
+        key: str
+) -> str:
+    """
+    中文:
+    :param key: 客户端的 Sec-WebSocket-Key。
+    :return: 对应的 Sec-WebSocket-Accept(str)。
+
+    English:
+    :param key: Sec-WebSocket-Key of the client.
+    :return: Matching Sec-WebSocket-Accept(str).
+    """
+    return base64.b64encode(hashlib.sha1((key + GUID).encode()).digest()).decode()
+
+
+# 服务端握手
+# Server handshake
+async def accept(
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        path: str = None,
+        token: str = None,
+        max_size: int = 16 * 1024 * 1024
+) -> WebSocket:
+    """
+    中文:
+    服务端握手, 路径或令牌不符时返回错误响应并抛出 WebSocketError。
+    令牌可通过 Authorization: Bearer 头或 access_token 查询参数传入。
+    :param reader: 流读取器。
+    :param writer: 流写入器。
+    :param path: 允许的路径, 为空时不限制。
+    :param token: 访问令牌, 为空时不校验。
+    :param max_size: 单条消息的最大字节数。
+    :return: WebSocket 连接。
+
+    English:
+    Server handshake, answer with an error response and raise WebSocketError when the path or token mismatches.
+    The token can be passed by the Authorization: Bearer header or the access_token query parameter.
+    :param reader: Stream reader.
+    :param writer: Stream writer.
+    :param path: Allowed path, no restriction if empty.
+    :param token: Access token, not checked if empty.
+    :param max_size: Maximum bytes of a single message.
+    :return: WebSocket connection.
+    """
+    _line, _headers = await _read_head(reader)
+    _parts = _line.split(' ')
+    _target = urlsplit(_parts[1] if len(_parts) > 1 else '/')
+
+    _status = None
+    if len(_parts) < 3 or _parts[0] != 'GET':
+        _status = '405 Method Not Allowed'
+    elif path and _target.path.rstrip('/') != path.rstrip('/'):
+        _status = '404 Not Found'
+    elif 'websocket' not in _headers.get('upgrade', '').lower() or 'sec-websocket-key' not in _headers:
+        _status = '426 Upgrade Required'
+    elif token and token not in (
+            _headers.get('authorization', '').removeprefix('Bearer ').strip(),
+            dict(_item.partition('=')[::2] for _item in _target.query.split('&')).get('access_token')
+    ):
+        _status = '401 Unauthorized'
+
+    if _status:
+        writer.write(f'HTTP/1.1 {_status}\r\nContent-Length: 0\r\nConnection: close\r\n\r\n'.encode())
+        await writer.drain()
+        writer.close()
+        raise WebSocketError(f'handshake rejected: {_status}')
+
+    writer.write(
+        (
+            'HTTP/1.1 101 Switching Protocols\r\n'
+            'Upgrade: websocket\r\n'
+            'Connection: Upgrade\r\n'
+            f'Sec-WebSocket-Accept: {_accept_key(_headers["sec-websocket-key"])}\r\n\r\n'
+        ).encode()
+    )
+    await writer.drain()
+    return WebSocket(reader, writer, False, _target.path, _headers, max_size)
+
+
+# 客户端连接并握手
+# Client connection and handshake
+async def connect(
+        url: str,
+        headers: Dict[str, str] = None,
+        timeout: float = 10,
+        max_size: int = 16 * 1024 * 1024
+) -> WebSocket:
+    """
+    中文:
+    连接到 ws:// 或 wss:// 地址并完成客户端握手。
+    :param url: 连接地址。
+    :param headers: 额外的请求头。
+    :param timeout: 连接与握手超时(秒)。
+    :param max_size: 单条消息的最大字节数。
+    :return: WebSocket 连接。
+
+    English:
+    Connect to a ws:// or wss:// url and complete the client handshake.
+    :param url: Url to connect.
+    :param headers: Extra request headers.
+    :param timeout: Connection and handshake timeout(seconds).
+    :param max_size: Maximum bytes of a single message.
+    :return: WebSocket connection.
+    """
+    _url = urlsplit(url)
+    _secure = _url.scheme == 'wss'
+    _port = _url.port or (443 if _secure else 80)
+    _path = (_url.path or '/') + (f'?{_url.query}' if _url.query else '')
+    _key = base64.b64encode(os.urandom(16)).decode()
+
+    async def _handshake() -> WebSocket:
+        _reader, _writer = await asyncio.open_connection(_url.hostname, _port, ssl=_secure or None, limit=READ_SIZE * 4)
+        _request = [
+            f'GET {_path} HTTP/1.1',
+            f'Host: {_url.hostname}:{_port}',
+            'Upgrade: websocket',
+            'Connection: Upgrade',
+            f'Sec-WebSocket-Key: {_key}',
+            'Sec-WebSocket-Version: 13'
+        ] + [f'{_name}: {_value}' for _name, _value in (headers or { }).items()]
+        _writer.write(('\r\n'.join(_request) + '\r\n\r\n').encode())
+        await _writer.drain()
+
+        _line, _headers = await _read_head(_reader)
+        if ' 101 ' not in f'{_line} ' or _headers.get('sec-websocket-accept') != _accept_key(_key):
+            _writer.close()
+            raise WebSocketError(f'handshake failed: {_line}')
+        return WebSocket(_reader, _writer, True, _url.path or '/', _headers, max_size)
+
+    return await asyncio.wait_for(_handshake(), timeout)
@@ -80,7 +80,7 @@ class JustRobot:
     ) -> list:
         _return = []
         for _cfg in cfg:
-            _return.append({ _i['name']: _i.pop('name') for _i in _cfg })
+            _return.append({ _i.pop('name'): _i for _i in _cfg })
         return _return
 
     def run(
@@ -82,6 +82,9 @@ class Config:
                 ]
             },
             "log_level": 4,
+            "plugin_concurrent": False,
+            "plugin_thread_num": 4,
+            "plugin_process_num": 2,
             "translator_api": {
                 "name": "aliyun",
                 "token": {
@@ -105,7 +108,31 @@ class Config:
                 'enable_plugin': [
                     '',
                     ''
-                ]
+                ],
+                'enable': True,
+                'queue_size': 1024,
+                'worker_num': 4,
+                'shard_num': 0,
+                'entity_cache_size': 1024,
+                'message_pool_size': 0,
+                'sender_num': 2,
+                'send_window': 0,
+                'rate_limit': 0,
+                'rate_burst': 5,
+                'target_rate_limit': 0,
+                'target_rate_burst': 5,
+                'retry_num': 2,
+                'retry_delay': 0.5,
+                'retry_max_delay': 10,
+                'breaker_threshold': 5,
+                'breaker_timeout': 30,
+                'capture_sample': 0,
+                'capture_dir': './capture',
+                'capture_replies': False,
+                'capture_redact': [],
+                'capture_max_bytes': 67108864,
+                'capture_backups': 10,
+                'capture_compression': 'gzip'
             }
         ]
         self._config_translator = [
@@ -250,6 +277,7 @@ class Config:
         """
         中文:
         更新配置文件。
+        适配器、转译器、插件配置以 name 为目标键, 更新后重建机器人路由表。
         :param bot: Bot 实例。
         :param cfg: 配置文件名称。
         :param key: 配置文件目标键。
@@ -258,6 +286,8 @@ class Config:
 
         English:
         Update configuration file.
+        Adapter, translator and plugin configs use name as the target key,
+        the routing table of the bot is rebuilt after updating.
         :param bot: Bot instance.
         :param cfg: Configuration file name.
         :param key: Configuration file target key.
@@ -267,12 +297,19 @@ class Config:
         with open(getattr(self, f'_config_{cfg}_path'), 'r') as _f:
             _cfg = json.load(_f)
 
-        setattr(_cfg, key, value)
+        if cfg == 'bot':
+            _cfg[key] = value
+        else:
+            _cfg = [_i for _i in _cfg if _i.get('name') != key]
+            _cfg.append(dict(value, name=key))
         with open(getattr(self, f'_config_{cfg}_path'), 'w') as _f:
             json.dump(obj=_cfg, fp=_f, indent=2)
 
-        # noinspection PyProtectedMember
-        setattr(bot._config[cfg], key, value)
+        if cfg == 'bot':
+            # noinspection PyProtectedMember
+            bot._config[key] = value
+        else:
+            bot.update_route({ cfg: { _i['name']: _i for _i in _cfg } })
 
     # 初始化配置文件
     # Initialize configuration file
@@ -106,7 +106,8 @@ class Bot:
         self.bot.load(
             {
                 'translators': self.translators,
-                'plugins': self.plugins
+                'plugins': self.plugins,
+                'plugin_index': self._loader.plugin_index
             }
         )
 
@@ -726,6 +726,9 @@ class Baseclient:
         update_group_list: 更新群聊列表
         update_channel_list: 更新频道列表
         update_guild_list: 更新服务器列表
+        invalidate: 使缓存的实体实例失效
+        stats: 获取运行时统计
+        close: 关闭适配器持有的后台资源
 
     English:
     Adapter function base class
@@ -751,6 +754,9 @@ class Baseclient:
         update_group_list: Update group list
         update_channel_list: Update channel list
         update_guild_list: Update guild list
+        invalidate: Invalidate cached entity instances
+        stats: Get runtime statistics
+        close: Close the background resources held by the adapter
     """
 
     # 适配器名称
@@ -893,32 +899,38 @@ class Baseclient:
         return self._msg_send
 
     def msg_recv_append(
-            self
+            self,
+            num: int = 1
             ) -> None:
         """
         中文:
-        消息接收计数 +1。
+        消息接收计数增加, 默认 +1。
+        :param num: 增加的数量。
         :return: None.
 
         English:
-        Message receive counting +1.
+        Message receive counting increase, +1 by default.
+        :param num: Increased number.
         :return: None.
         """
-        self._msg_recv += 1
+        self._msg_recv += num
 
     def msg_send_append(
-            self
+            self,
+            num: int = 1
             ) -> None:
         """
         中文:
-        消息发送计数 +1。
+        消息发送计数增加, 默认 +1。
+        :param num: 增加的数量。
         :return: None.
 
         English:
-        Message send counting +1.
+        Message send counting increase, +1 by default.
+        :param num: Increased number.
         :return: None.
         """
-        self._msg_send += 1
+        self._msg_send += num
 
     async def get_user_list(
             self
@@ -1016,3 +1028,53 @@ class Baseclient:
         :return: None.
         """
         pass
+
+    def invalidate(
+            self,
+            kind: str = None,
+            *eid: str
+            ) -> None:
+        """
+        中文:
+        使缓存的实体实例失效。
+        :param kind: 实体类型。
+        :param eid: 实体 id。
+        :return: None.
+
+        English:
+        Invalidate cached entity instances.
+        :param kind: Entity type.
+        :param eid: Entity id.
+        :return: None.
+        """
+        pass
+
+    def stats(
+            self
+            ) -> dict:
+        """
+        中文:
+        获取运行时统计。
+        :return: 运行时统计(dict)。
+
+        English:
+        Get runtime statistics.
+        :return: Runtime statistics(dict).
+        """
+        return { }
+
+    # 关闭后台资源
+    # Close background resources
+    def close(
+            self
+            ) -> None:
+        """
+        中文:
+        关闭适配器持有的后台资源。
+        :return: None.
+
+        English:
+        Close the background resources held by the adapter.
+        :return: None.
+        """
+        pass
@@ -1,7 +1,56 @@
 import asyncio
-
+import inspect
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import groupby
 from typing import Union
 
+from .message import ReplyMessage
+from .route import Route
+from ..plugins.plugin import STOP
+
+
+def _process_invoke(
+        plugin_cls: type,
+        fnc: str,
+        cfg: dict,
+        log: object,
+        e
+        ) -> tuple:
+    """
+    中文:
+    在进程池中构建插件实例并调用插件方法。
+    实例只有 cfg、replymessage 与 log, bot 为 None, 因为机器人实例无法传入子进程。
+
+    :param plugin_cls: 插件类。
+    :param fnc: 插件方法名。
+    :param cfg: 插件配置信息。
+    :param log: 日志实例。
+    :param e: 消息快照。
+    :return: 插件方法的返回值与记录了回复的消息快照。
+
+    English:
+    Build the plugin instance and invoke the plugin method in the process pool.
+    The instance only has cfg, replymessage and log, bot is None as the bot instance can not be passed to
+    the worker process.
+
+    :param plugin_cls: Plugin class.
+    :param fnc: Plugin method name.
+    :param cfg: Plugin configuration.
+    :param log: Log instance.
+    :param e: Message snapshot.
+    :return: The return value of the plugin method and the message snapshot with recorded replies.
+    """
+    _plugin = plugin_cls()
+    _plugin.cfg = cfg
+    _plugin.replymessage = ReplyMessage
+    _plugin.log = log
+    _plugin.bot = None
+
+    _result = getattr(_plugin, fnc)(e)
+    if inspect.iscoroutine(_result):
+        _result = asyncio.run(_result)
+    return _result, e
+
 
 class Translator:
     """
@@ -69,11 +118,10 @@ class Translator:
 
         :return: None.
         """
-        for _, _translator in self.translators.items():
-
-            msg_allow_deal = (e.adapter in _translator.tree[_translator.name]) if _translator.use_tree else True
+        for _name in self.bot.route.translators(e.adapter):
+            _translator = self.translators[_name]
 
-            if _translator.matching(e) and msg_allow_deal:
+            if _translator.matching(e):
                 _translator.deal(e)
 
 
@@ -84,44 +132,169 @@ class Plugin:
 
     属性:
         plugins (dict): 包含插件的字典。
+        index: 插件匹配索引。
+        concurrent (bool): 是否并发执行同一优先级的插件。
+        executor: 执行同步插件方法的线程池。
+        process_executor: 执行 executor = "process" 插件方法的进程池, 首次使用时创建。
         bot (可选): 机器人实例。
 
     方法:
         deal: 进行消息处理。
+        shutdown: 关闭线程池与进程池。
+
+    私有方法:
+        _invoke: 调用插件方法。
+        _invoke_process: 在进程池中调用插件方法。
+        _error: 记录插件执行出错。
 
     English:
     Plugin class for handling plugin operations.
 
     Attributes:
         plugins (dict): A dictionary containing plugins.
+        index: Plugin dispatch index.
+        concurrent (bool): Whether plugins with the same priority run concurrently.
+        executor: The thread pool running synchronous plugin methods.
+        process_executor: The process pool running executor = "process" plugin methods, created on first use.
         bot (optional): The robot instance.
 
     Methods:
         deal: Deal message.
+        shutdown: Shut down the thread pool and the process pool.
+
+    Private Methods:
+        _invoke: Invoke the plugin method.
+        _invoke_process: Invoke the plugin method in the process pool.
+        _error: Log a plugin error.
     """
 
     def __init__(
             self,
             plugins: dict,
-            bot: object
+            index: object,
+            bot: object,
+            concurrent: bool = False,
+            thread_num: int = 4,
+            process_num: int = 2
             ) -> None:
         """
         中文:
         初始化 Plugin 类。
 
         :param plugins: 包含插件的字典。
+        :param index: 插件匹配索引。
         :param bot: 机器人实例。
+        :param concurrent: 是否并发执行同一优先级的插件。
+        :param thread_num: 执行同步插件方法的线程数。
+        :param process_num: 执行 executor = "process" 插件方法的进程数。
         :return: None.
 
         English:
         Initializes the Plugin class.
 
         :param plugins: A dictionary containing plugins.
+        :param index: Plugin dispatch index.
         :param bot: The robot instance.
+        :param concurrent: Whether plugins with the same priority run concurrently.
+        :param thread_num: The number of threads running synchronous plugin methods.
+        :param process_num: The number of processes running executor = "process" plugin methods.
         :return: None.
         """
         self.plugins = plugins
+        self.index = index
         self.bot = bot
+        self.concurrent = concurrent
+        self.executor = ThreadPoolExecutor(max_workers=thread_num, thread_name_prefix='plugin')
+        self.process_executor = None
+        self._process_num = process_num
+
+    async def _invoke(
+            self,
+            entry: dict,
+            e
+            ) -> object:
+        """
+        中文:
+        调用插件方法。
+        协程方法直接等待, 同步方法交由线程池执行, 避免阻塞事件循环;
+        声明 executor = "process" 的方法交由进程池执行。
+
+        :param entry: 匹配索引条目。
+        :param e: 需要被处理的消息。
+        :return: 插件方法的返回值。
+
+        English:
+        Invoke the plugin method.
+        Coroutine methods are awaited directly, synchronous methods run in the thread pool
+        so they can not block the event loop;
+        methods declaring executor = "process" run in the process pool.
+
+        :param entry: Dispatch index entry.
+        :param e: The message to be dealt.
+        :return: The return value of the plugin method.
+        """
+        _handler = entry['handler']
+
+        if _handler is None:
+            await self.bot.log.error(
+                {
+                    'zh': f'[{entry["plugin"].name}] 未找到对应方法，跳过处理',
+                    'en': f'[{entry["plugin"].name}] Skipped as no corresponding method'
+                }
+            )
+            return None
+
+        if entry['executor'] == 'process':
+            return await self._invoke_process(entry, e)
+
+        if entry['coroutine']:
+            return await _handler(e)
+
+        _result = await asyncio.get_running_loop().run_in_executor(self.executor, _handler, e)
+        if inspect.isawaitable(_result):
+            _result = await _result
+        return _result
+
+    async def _invoke_process(
+            self,
+            entry: dict,
+            e
+            ) -> object:
+        """
+        中文:
+        在进程池中调用插件方法, 传入消息快照, 并由主进程发送插件记录的回复。
+
+        :param entry: 匹配索引条目。
+        :param e: 需要被处理的消息。
+        :return: 插件方法的返回值。
+
+        English:
+        Invoke the plugin method in the process pool with a message snapshot,
+        the replies recorded by the plugin are sent by the main process.
+
+        :param entry: Dispatch index entry.
+        :param e: The message to be dealt.
+        :return: The return value of the plugin method.
+        """
+        if self.process_executor is None:
+            self.process_executor = ProcessPoolExecutor(max_workers=self._process_num)
+
+        _plugin = entry['plugin']
+        _result, _snapshot = await asyncio.get_running_loop().run_in_executor(
+            self.process_executor,
+            _process_invoke,
+            type(_plugin),
+            entry['fnc'],
+            getattr(_plugin, 'cfg', None),
+            self.bot.log,
+            e.snapshot()
+        )
+
+        for _reply in _snapshot.restore(e):
+            _sent = e.reply(_reply)
+            if inspect.isawaitable(_sent):
+                await _sent
+        return _result
 
     async def deal(
             self,
@@ -130,40 +303,89 @@ class Plugin:
         """
         中文:
         匹配并处理消息。
+        按优先级依次执行插件, 并发模式下同一优先级的插件并发执行。
+        插件返回 STOP 时不再执行后续优先级的插件。
 
         :param e: 需要被处理的消息。
         :return: None
 
         English:
         Match then deal with the message.
+        Plugins run in priority order, plugins with the same priority run concurrently in concurrent mode.
+        Plugins with lower priority are skipped once a plugin returns STOP.
 
         :param e: The message to be dealt.
         :return: None
         """
-        for _, _plugin in self.plugins.items():
+        _allow = self.bot.route.plugins(e.adapter, e.translator.name if e.translator else None)
+        _entries = [_entry for _entry in self.index.match(e.msg, _allow) if _entry['fnc']]
 
-            if hasattr(e, 'translator'):
-                msg_allow_deal = (
-                        (e.adapter in _plugin.tree['adapter']) and (e.translators in _plugin.tree['translator'])
-                ) if _plugin.use_tree else True
-            else:
-                msg_allow_deal = (e.adapter in _plugin.tree['adapter']) if _plugin.use_tree else True
+        if not self.concurrent:
+            for _entry in _entries:
+                try:
+                    _result = await self._invoke(_entry, e)
+                except Exception as _error:
+                    await self._error(_entry, _error)
+                    continue
+                if _result is STOP:
+                    return
+            return
+
+        for _, _tier in groupby(_entries, key=lambda _entry: _entry['pri']):
+            _tier = list(_tier)
+            _results = await asyncio.gather(*(self._invoke(_entry, e) for _entry in _tier), return_exceptions=True)
+
+            for _entry, _result in zip(_tier, _results):
+                if isinstance(_result, Exception):
+                    await self._error(_entry, _result)
+
+            if any(_result is STOP for _result in _results):
+                return
+
+    async def _error(
+            self,
+            entry: dict,
+            error: Exception
+            ) -> None:
+        """
+        中文:
+        记录插件执行出错, 不影响后续插件。
 
-            _fnc = await _plugin.matching(e)
-            if _fnc and msg_allow_deal:
+        :param entry: 匹配索引条目。
+        :param error: 插件抛出的异常。
+        :return: None
 
-                try:
+        English:
+        Log a plugin error without affecting later plugins.
 
-                    getattr(_plugin, _fnc)(e)
+        :param entry: Dispatch index entry.
+        :param error: Exception raised by the plugin.
+        :return: None
+        """
+        await self.bot.log.error(
+            {
+                'zh': f'[{entry["plugin"].name}] 插件执行出错: {error!r}',
+                'en': f'[{entry["plugin"].name}] Plugin raised an error: {error!r}'
+            }
+        )
+
+    def shutdown(
+            self
+            ) -> None:
+        """
+        中文:
+        关闭线程池与进程池, 不等待正在执行的插件方法。
 
-                except AttributeError:
+        :return: None
 
-                    self.bot.log.error(
-                        {
-                            'zh': f'[{_plugin.name}] 未找到对应方法，跳过处理',
-                            'en': f'[{_plugin.name}] Skipped as no corresponding method'
-                        }
-                    )
+        English:
+        Shut down the thread pool and the process pool without waiting for running plugin methods.
+
+        :return: None
+        """
+        self.executor.shutdown(wait=False)
+        if self.process_executor is not None:
+            self.process_executor.shutdown(wait=False, cancel_futures=True)
 
 
 # 机器人实例
@@ -180,6 +402,7 @@ class Core:
         client (字典): 用于存储适配器 ID 及其对应功能实例的字典。
         log: 用于记录消息的日志对象。
         loop: 用于异步操作的事件循环。
+        route: 消息路由表。
         adapter_name_list (列表): 适配器名称的列表。
         translator_name_list (列表): 翻译器名称的列表。
         plugin_name_list (列表): 插件名称的列表。
@@ -188,6 +411,7 @@ class Core:
         _config: 配置对象。
         _translators: 翻译器对象。
         _plugins: 插件对象。
+        _route_cfg: 路由表配置。
         _msg_recv (整数): 接收到的消息数量。
         _msg_send (整数): 发送的消息数量。
         _user_list (列表): 用户ID的列表。
@@ -198,9 +422,11 @@ class Core:
     方法:
         load: 加载翻译器和插件。
         append: 添加用户ID及其对应信息。
+        update_route: 重建路由表。
         deal: 处理消息。
         msg_recv_append: 接收到的消息数量加一。
         msg_send_append: 发送的消息数量加一。
+        stats: 获取各适配器的运行时统计。
         isMaster: 判断用户是否为主人。
         get_user_list: 获取用户ID的列表。
         get_group_list: 获取群组ID的列表。
@@ -235,6 +461,7 @@ class Core:
         client (dict): The dictionary for storing adapter IDs and their corresponding functional instances.
         log: The logging object used for logging messages.
         loop: The event loop for asynchronous operations.
+        route: The message routing table.
         adapter_name_list (list): The list of adapter names.
         translator_name_list (list): The list of translator names.
         plugin_name_list (list): The list of plugin names.
@@ -243,6 +470,7 @@ class Core:
         _config: The configuration object.
         _translators: The Translator object.
         _plugins: The Plugin object.
+        _route_cfg: The routing table config.
         _msg_recv (int): The number of messages received.
         _msg_send (int): The number of messages sent.
         _user_list (list): The list of user IDs.
@@ -253,9 +481,11 @@ class Core:
     Methods:
         load: Load translators and plugins.
         append: Append user ID and its corresponding information.
+        update_route: Rebuild the routing table.
         deal: Deal message.
         msg_recv_append: Append the number of messages received.
         msg_send_append: Append the number of messages sent.
+        stats: Get the runtime statistics of every adapter.
         isMaster: Determine whether the user is the master.
         get_user_list: Get the list of user IDs.
         get_group_list: Get the list of group IDs.
@@ -304,6 +534,7 @@ class Core:
         self.client = { }
         self.log = log
         self.loop = None
+        self.route = Route({ }, [], [], [])
         self.adapter_name_list = []
         self.translator_name_list = []
         self.plugin_name_list = []
@@ -312,6 +543,11 @@ class Core:
         self.lang = cfg['language']
         self._translators = None
         self._plugins = None
+        self._route_cfg = {
+            'adapter': { },
+            'translator': { },
+            'plugin': { }
+        }
 
         self._msg_recv = 0
         self._msg_send = 0
@@ -329,17 +565,24 @@ class Core:
         中文:
         载入导入成功的翻译器和插件。
 
-        :param instances: 包含翻译器和插件的字典。
+        :param instances: 包含翻译器、插件和插件匹配索引的字典。
         :return: None.
 
         English:
         Load the successfully imported translators and plugins.
 
-        :param instances: The dictionary containing translators and plugins.
+        :param instances: The dictionary containing translators, plugins and plugin dispatch index.
         :return: None.
         """
         self._translators = Translator(translators=instances['translators'], bot=self)
-        self._plugins = Plugin(plugins=instances['plugins'], bot=self)
+        self._plugins = Plugin(
+            plugins=instances['plugins'],
+            index=instances['plugin_index'],
+            bot=self,
+            concurrent=self._config.get('plugin_concurrent', False),
+            thread_num=self._config.get('plugin_thread_num', 4),
+            process_num=self._config.get('plugin_process_num', 2)
+        )
 
     def append(
             self,
@@ -364,6 +607,28 @@ class Core:
         self.uin[_id['id']] = _id
         self.client[_id['id']] = _client
 
+    def update_route(
+            self,
+            cfg: dict
+    ) -> None:
+        """
+        中文:
+        使用新的配置重建路由表, 构建完成后整体替换, 处理中的消息不受影响。
+
+        :param cfg: 需要更新的配置, 键为 adapter、translator 或 plugin。
+        :return: None.
+
+        English:
+        Rebuild the routing table with the new config, the table is swapped as a whole once built,
+        messages being processed are not affected.
+
+        :param cfg: Config to be updated, keyed by adapter, translator or plugin.
+        :return: None.
+        """
+        _route_cfg = dict(self._route_cfg, **cfg)
+        self.route = Route(_route_cfg, self.adapter_name_list, self.translator_name_list, self.plugin_name_list)
+        self._route_cfg = _route_cfg
+
     async def deal(
             self,
             e
@@ -407,13 +672,21 @@ class Core:
             ) -> None:
         """
         中文:
-        向全部协程发送取消信号，等待其全部取消后关闭机器人。
+        向全部协程发送取消信号，等待其全部取消后关闭各适配器的后台资源并关闭机器人。
 
         English:
-        Send a cancel signal to all coroutines, wait for them to be cancelled then shut down the bot.
+        Send a cancel signal to all coroutines, wait for them to be cancelled, close the background resources of
+        every adapter then shut down the bot.
         """
-        [_task.cancel() for _task in list(asyncio.Task.all_tasks())]
-        await asyncio.gather(*asyncio.Task.all_tasks(), return_exceptions=True)
+        if self._plugins:
+            self._plugins.shutdown()
+        _tasks = [_task for _task in asyncio.all_tasks() if _task is not asyncio.current_task()]
+        [_task.cancel() for _task in _tasks]
+        await asyncio.gather(*_tasks, return_exceptions=True)
+        # 协程全部取消后不会再有新记录, 此时写入采样记录中剩余的记录
+        # No new records arrive once every coroutine is cancelled, the remaining capture records are written now
+        for _client in self.client.values():
+            _client.close()
 
     @property
     def msg_recv(
@@ -441,6 +714,19 @@ class Core:
         """
         return sum(_client.msg_send for _, _client in self.client.items())
 
+    @property
+    def stats(
+            self
+            ) -> dict:
+        """
+        中文:
+        返回各适配器的运行时统计。
+
+        English:
+        Return the runtime statistics of every adapter.
+        """
+        return { _id: _client.stats() for _id, _client in self.client.items() }
+
     def msg_recv_append(
             self
             ) -> None:
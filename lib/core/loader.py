@@ -15,6 +15,7 @@ class Loader:
         adapters: 适配器对象
         translators: 翻译器对象
         plugins: 插件对象
+        plugin_index: 插件匹配索引
         cfg: 配置文件
 
     私有属性:
@@ -34,6 +35,7 @@ class Loader:
         adapters: Adapter object
         translators: Translator object
         plugins: Plugin object
+        plugin_index: Plugin dispatch index
         cfg: Configuration file
 
     Private attributes:
@@ -69,6 +71,7 @@ class Loader:
         self.adapters: dict = { }
         self.translators: dict = { }
         self.plugins: dict = { }
+        self.plugin_index = None
 
     async def load(
             self,
@@ -89,14 +92,20 @@ class Loader:
         self.adapters = await self._adapter.load(bot)
         self.translators = await self._translator.load(bot)
         self.plugins = await self._plugin.load(bot)
-
-        [setattr(_translators, 'use_tree', False) for _, _translators in self.translators.items()]
-        [setattr(_plugin, 'use_tree', False) for _, _plugin in self.plugins.items()]
+        self.plugin_index = self._plugin.index
 
         self.bot.adapter_name_list = [_name for _name in self.adapters]
         self.bot.translator_name_list = [_name for _name in self.translators]
         self.bot.plugin_name_list = [_name for _name in self.plugins]
 
+        self.bot.update_route(
+            {
+                'adapter': self.cfg['adapter'],
+                'translator': self.cfg['translator'],
+                'plugin': self.cfg['plugin']
+            }
+        )
+
         return self.translators, self.plugins
 
     async def run(
@@ -1,6 +1,10 @@
 import os
 from datetime import datetime
-from typing import Dict, Union
+from typing import Dict, List, Union
+
+# 日志内容类型, 列表中的多条日志一次打印并写入
+# Log content type, multiple logs in a list are printed and written at once
+LogMsg = Union[Dict[str, str], str, List[Union[Dict[str, str], str]]]
 
 
 # 打印日志
@@ -107,17 +111,17 @@ class Log:
     async def _log(
             self,
             level: str,
-            msg: Union[Dict[str, str], str]
+            msg: LogMsg
     ) -> None:
         """
         中文:
-        打印并写入日志。
+        打印并写入日志, 传入列表时多条日志一次打印并写入。
         :param level: 日志等级。
         :param msg: 日志内容。
         :return: None.
 
         English:
-        Print & write logs.
+        Print & write logs, multiple logs are printed and written at once when a list is passed in.
         :param level: Log level.
         :param msg: Log content.
         :return: None.
@@ -139,16 +143,17 @@ class Log:
             :return: Parsed log content.
             """
             try:
-                return _msg.get(self.lang, msg['en'])
+                return _msg.get(self.lang, _msg['en'])
             except KeyError:
-                return _msg[next(iter(msg))]
-
-        _msg = _get_msg(msg) if isinstance(msg, dict) else msg
+                return _msg[next(iter(_msg))]
 
         if self.level >= getattr(self, level):
+            _msgs = [_get_msg(_m) if isinstance(_m, dict) else _m for _m in (msg if isinstance(msg, list) else [msg])]
             _time = datetime.now().strftime("%H:%M:%S:%f")[:-3]
-            write_log = f'[JustRobot][{_time}][{level}]{_msg}'
-            print_log = '[JustRobot]' + self.color[level] + f'[{_time}][{level}]' + self.color['msg'] + _msg
+            write_log = '\n'.join(f'[JustRobot][{_time}][{level}]{_msg}' for _msg in _msgs)
+            print_log = '\n'.join(
+                '[JustRobot]' + self.color[level] + f'[{_time}][{level}]' + self.color['msg'] + _msg for _msg in _msgs
+            )
 
             print(print_log)
             await self._write_log(datetime.now().strftime('%Y-%m-%d'), write_log)
@@ -157,7 +162,7 @@ class Log:
     # Level debug
     async def debug(
             self,
-            msg: Union[Dict[str, str], str]
+            msg: LogMsg
     ) -> None:
         """
         中文:
@@ -176,7 +181,7 @@ class Log:
     # Level info
     async def info(
             self,
-            msg: Union[Dict[str, str], str]
+            msg: LogMsg
     ) -> None:
         """
         中文:
@@ -195,7 +200,7 @@ class Log:
     # Level warning
     async def warn(
             self,
-            msg: Union[Dict[str, str], str]
+            msg: LogMsg
     ) -> None:
         """
         中文:
@@ -214,7 +219,7 @@ class Log:
     # Level error
     async def error(
             self,
-            msg: Union[Dict[str, str], str]
+            msg: LogMsg
     ) -> None:
         """
         中文:
@@ -233,7 +238,7 @@ class Log:
     # Level fatal
     async def fatal(
             self,
-            msg: Union[Dict[str, str], str]
+            msg: LogMsg
     ) -> None:
         """
         中文:
@@ -1,5 +1,14 @@
+import inspect
+from types import MappingProxyType
 from typing import Dict, List, Union
 
+# 尚未解析的惰性属性
+# Lazy attribute not resolved yet
+_UNSET = object()
+# 未传入原始消息时共享的空字典
+# Shared empty dict when no raw message is passed in
+_EMPTY = MappingProxyType({ })
+
 
 # noinspection PyMethodMayBeStatic
 # 双工完整消息
@@ -12,25 +21,31 @@ class Message:
     属性:
         adapter: 适配器对象
         translator: 转译器对象
+        bot: 机器人实例
         seq: 消息序列号
         notice: 消息类型
         msg: 消息内容
         file: 文件内容
-        user:  User ID
-        group: Group ID
-        channel: Channel ID
-        guild: Guild ID
+        user: User 实例, 惰性解析
+        group: Group 实例, 惰性解析
+        channel: Channel 实例, 惰性解析
+        guild: Guild 实例, 惰性解析
         isBot: 是否为机器人
-        isFriend: 是否为好友
+        isFriend: 是否为好友, 惰性解析
         isPrivate: 是否为私聊
         isGroup: 是否为群聊
         isGuild: 是否为公会
-        isMaster: 是否为主人
+        isMaster: 是否为主人, 惰性解析
         time: 消息时间
+        adapter_name: 适配器名称
+        log: 日志实例
+        target: 回复目标
     
     方法:
         load: 初始化消息实例
+        clear: 清空消息特性参数
         reply: 回复消息
+        snapshot: 构建可序列化的消息快照
 
     English:
     Message class
@@ -38,27 +53,48 @@ class Message:
     Attribute:
         adapter: Adapter object
         translator: Translator object
+        bot: Bot instance
         seq: Message sequence number
         notice: Message type
         msg: Message content
         file: File content
-        user:  User ID
-        group: Group ID
-        channel: Channel ID
-        guild: Guild ID
+        user: User instance, resolved lazily
+        group: Group instance, resolved lazily
+        channel: Channel instance, resolved lazily
+        guild: Guild instance, resolved lazily
         isBot: Whether it is a robot
-        isFriend: Whether it is a friend
+        isFriend: Whether it is a friend, resolved lazily
         isPrivate: Whether it is a private chat
         isGroup: Whether it is a group chat
         isGuild: Whether it is a guild
-        isMaster: Whether it is the owner
+        isMaster: Whether it is the owner, resolved lazily
         time: Message time
+        adapter_name: Adapter name
+        log: Log instance
+        target: Reply target
     
     Method:
         load: Initialize message instance
+        clear: Clear message feature parameters
         reply: Reply message
+        snapshot: Build a picklable message snapshot
     """
 
+    __slots__ = (
+        'adapter', 'translator', 'bot',
+        'seq', 'notice', 'msg', 'file', '_user', '_group', '_channel', '_guild',
+        'isBot', '_isFriend', 'isPrivate', 'isGroup', 'isGuild', '_isMaster',
+        'time', '_reply', '_raw', '_resolver'
+    )
+
+    # 以私有属性保存的载入参数
+    # Load parameters stored as private attributes
+    _private = {
+        'reply': '_reply',
+        'raw': '_raw',
+        'resolver': '_resolver'
+    }
+
     # 存有适配器和转译器的属性
     # Attributes containing adapters and translators
     adapter: object
@@ -70,23 +106,17 @@ class Message:
     notice: str
     msg: str
     file: Union[bytes, List[bytes]]
-    user: Union[str, None] = None
-    group: Union[str, None] = None
-    channel: Union[str, None] = None
-    guild: Union[str, None] = None
 
     # 消息情景属性
     # Message scene attributes
-    isBot: bool = False
-    isFriend: bool = False
-    isPrivate: bool = False
-    isGroup: bool = False
-    isGuild: bool = False
-    isMaster: bool = False
+    isBot: bool
+    isPrivate: bool
+    isGroup: bool
+    isGuild: bool
 
     # 消息时间属性
     # Message time attributes
-    time = str
+    time: str
 
     # 初步初始化传入部分不变属性/参数/实例
     # Preliminary initialization passes in some immutable attributes/parameters/instances
@@ -105,7 +135,45 @@ class Message:
         :param parameter: Pass in common message parameters(dict).
         :return: None.
         """
-        [setattr(self, _key, _info) for _key, _info in parameter.items()]
+        self.adapter = None
+        self.bot = None
+        self.clear()
+        for _key, _info in parameter.items():
+            setattr(self, _key, _info)
+
+    # 清空消息特性参数
+    # Clear message feature parameters
+    def clear(
+            self
+    ) -> None:
+        """
+        中文:
+        清空消息特性参数, 保留通用消息参数, 以便实例被复用。
+        :return: None.
+
+        English:
+        Clear message feature parameters and keep the common ones, so the instance can be reused.
+        :return: None.
+        """
+        self.translator = None
+        self.seq = None
+        self.notice = None
+        self.msg = None
+        self.file = None
+        self._user = _UNSET
+        self._group = _UNSET
+        self._channel = _UNSET
+        self._guild = _UNSET
+        self.isBot = False
+        self._isFriend = _UNSET
+        self.isPrivate = False
+        self.isGroup = False
+        self.isGuild = False
+        self._isMaster = _UNSET
+        self.time = None
+        self._reply = None
+        self._raw = _EMPTY
+        self._resolver = None
 
     # 初始化消息实例
     # Initialize message instance
@@ -116,21 +184,220 @@ class Message:
         """
         完成特性参数传入，构建完整消息实例。
         中文:
+        传入 raw (原始消息) 与 resolver (适配器) 时, user、group、channel、guild、isFriend、isMaster
+        在首次访问时才进行解析。
         :param parameter: 传入特性参数(dict)。
         :return: None.
 
         English:
         Finish the feature parameter pass and build a complete message instance.
+        When raw (the raw message) and resolver (the adapter) are passed in, user, group, channel, guild,
+        isFriend and isMaster are only resolved on first access.
         :param parameter: Pass in feature parameters(dict).
         :return: None.
         """
-        [setattr(self, _key, _value) for _key, _value in parameter.items()]
-        if self.group and (not self.guild):
-            self.isGroup = True
-        if (not self.group) and self.guild:
-            self.isGuild = True
-        if (not self.group) and (not self.guild):
-            self.isPrivate = True
+        for _key, _value in parameter.items():
+            setattr(self, self._private.get(_key, _key), _value)
+
+        # 情景属性只依赖 id, 无需解析实体
+        # Scene attributes only depend on ids, no entity needs to be resolved
+        _group = self._raw.get('group') if self._group is _UNSET else self._group
+        _guild = self._raw.get('guild') if self._guild is _UNSET else self._guild
+        self.isGroup = bool(_group and (not _guild))
+        self.isGuild = bool((not _group) and _guild)
+        self.isPrivate = bool((not _group) and (not _guild))
+
+    @property
+    def user(
+            self
+    ) -> Union[object, None]:
+        """
+        中文:
+        发送者 User 实例, 首次访问时解析并缓存。
+        :return: 发送者 User 实例。
+
+        English:
+        Sender User instance, resolved on first access and memoized.
+        :return: Sender User instance.
+        """
+        if self._user is _UNSET:
+            self._user = self._resolver.client.pickUser(self._raw.get('user')) if self._resolver else None
+        return self._user
+
+    @user.setter
+    def user(
+            self,
+            value: Union[object, None]
+    ) -> None:
+        self._user = value
+
+    @property
+    def group(
+            self
+    ) -> Union[object, None]:
+        """
+        中文:
+        Group 实例, 首次访问时解析并缓存。
+        :return: Group 实例。
+
+        English:
+        Group instance, resolved on first access and memoized.
+        :return: Group instance.
+        """
+        if self._group is _UNSET:
+            self._group = self._resolver.client.pickGroup(self._raw.get('group')) if self._resolver else None
+        return self._group
+
+    @group.setter
+    def group(
+            self,
+            value: Union[object, None]
+    ) -> None:
+        self._group = value
+
+    @property
+    def channel(
+            self
+    ) -> Union[object, None]:
+        """
+        中文:
+        Channel 实例, 首次访问时解析并缓存。
+        :return: Channel 实例。
+
+        English:
+        Channel instance, resolved on first access and memoized.
+        :return: Channel instance.
+        """
+        if self._channel is _UNSET:
+            self._channel = self._resolver.client.pickChannel(self._raw.get('channel'), self._raw.get('guild')) if self._resolver else None
+        return self._channel
+
+    @channel.setter
+    def channel(
+            self,
+            value: Union[object, None]
+    ) -> None:
+        self._channel = value
+
+    @property
+    def guild(
+            self
+    ) -> Union[object, None]:
+        """
+        中文:
+        Guild 实例, 首次访问时解析并缓存。
+        :return: Guild 实例。
+
+        English:
+        Guild instance, resolved on first access and memoized.
+        :return: Guild instance.
+        """
+        if self._guild is _UNSET:
+            self._guild = self._resolver.client.pickGuild(self._raw.get('guild')) if self._resolver else None
+        return self._guild
+
+    @guild.setter
+    def guild(
+            self,
+            value: Union[object, None]
+    ) -> None:
+        self._guild = value
+
+    @property
+    def isFriend(
+            self
+    ) -> bool:
+        """
+        中文:
+        是否为好友, 首次访问时解析并缓存。
+        :return: 是否为好友。
+
+        English:
+        Whether it is a friend, resolved on first access and memoized.
+        :return: Whether it is a friend.
+        """
+        if self._isFriend is _UNSET:
+            self._isFriend = self._resolver.isFriend(self._raw.get('user')) if self._resolver else False
+        return self._isFriend
+
+    @isFriend.setter
+    def isFriend(
+            self,
+            value: bool
+    ) -> None:
+        self._isFriend = value
+
+    @property
+    def isMaster(
+            self
+    ) -> bool:
+        """
+        中文:
+        是否为主人, 首次访问时解析并缓存。
+        :return: 是否为主人。
+
+        English:
+        Whether it is the owner, resolved on first access and memoized.
+        :return: Whether it is the owner.
+        """
+        if self._isMaster is _UNSET:
+            self._isMaster = self._resolver.bot.isMaster(self._resolver.name, self._raw.get('user')) if self._resolver else False
+        return self._isMaster
+
+    @isMaster.setter
+    def isMaster(
+            self,
+            value: bool
+    ) -> None:
+        self._isMaster = value
+
+    @property
+    def adapter_name(
+            self
+    ) -> str:
+        """
+        中文:
+        适配器名称, 供回复消息构建使用。
+        :return: 适配器名称(str)。
+
+        English:
+        Adapter name, used when building reply messages.
+        :return: Adapter name(str).
+        """
+        return self.adapter
+
+    @property
+    def log(
+            self
+    ) -> object:
+        """
+        中文:
+        日志实例, 供回复消息构建使用。
+        :return: 日志实例。
+
+        English:
+        Log instance, used when building reply messages.
+        :return: Log instance.
+        """
+        return getattr(self.bot, 'log', None)
+
+    @property
+    def target(
+            self
+    ) -> tuple:
+        """
+        中文:
+        回复目标, 依次取群聊、频道、私聊的 id, 无需解析实体。
+        :return: (目标类型, 目标 id)。
+
+        English:
+        Reply target, takes the id of the group, channel or private chat in order, without resolving entities.
+        :return: (Target type, target id).
+        """
+        for _kind in ('group', 'channel', 'user'):
+            if self._raw.get(_kind):
+                return _kind, self._raw[_kind]
+        return None, None
 
     # 回复消息
     # Reply message
@@ -140,17 +407,258 @@ class Message:
     ) -> bool:
         """
         中文:
-        回复消息示例方法
+        回复消息, 调用载入时传入的回复方法, 未传入时仅为示例。
         :param msg: 消息实例。
         :return: 是否成功发送消息(bool)。
 
         English:
-        Reply message example method
+        Reply message, call the reply method passed in when loading, only an example if none.
         :param msg: Message instance.
         :return: Whether the message was sent successfully(bool).
         """
+        if self._reply is None:
+            return True
+        return self._reply(msg)
+
+    # 构建可序列化的消息快照
+    # Build a picklable message snapshot
+    def snapshot(
+            self
+    ) -> 'MessageSnapshot':
+        """
+        中文:
+        构建可序列化的消息快照。
+        :return: 消息快照实例。
+
+        English:
+        Build a picklable message snapshot.
+        :return: Message snapshot instance.
+        """
+        return MessageSnapshot(self)
+
+
+# 可序列化的消息快照
+# Picklable message snapshot
+class MessageSnapshot:
+    """
+    中文:
+    可序列化的消息快照, 用于将消息传入进程池中的插件方法。
+    实体对象仅保留 id, 回复不会直接发送, 而是记录下来交由主进程发送。
+
+    属性:
+        adapter: 适配器名称
+        adapter_name: 适配器名称
+        log: 日志实例, 进程中不可用
+        seq, notice, msg, file, time: 同 Message
+        user, group, channel, guild: 实体 id
+        isBot, isFriend, isPrivate, isGroup, isGuild, isMaster: 同 Message
+        replies: 记录的回复数据
+
+    方法:
+        reply: 记录回复
+        restore: 在主进程中还原回复消息实例
+
+    English:
+    Picklable message snapshot, used to pass messages into plugin methods in the process pool.
+    Entities only keep their id, replies are not sent directly but recorded for the main process to send.
+
+    Attributes:
+        adapter: Adapter name
+        adapter_name: Adapter name
+        log: Log instance, unavailable in the process
+        seq, notice, msg, file, time: Same as Message
+        user, group, channel, guild: Entity id
+        isBot, isFriend, isPrivate, isGroup, isGuild, isMaster: Same as Message
+        replies: Recorded reply data
+
+    Methods:
+        reply: Record a reply
+        restore: Restore reply message instances in the main process
+    """
+
+    def __init__(
+            self,
+            e: Message
+    ) -> None:
+        """
+        中文:
+        从消息实例构建快照。
+        :param e: 消息实例。
+        :return: None.
+
+        English:
+        Build a snapshot from the message instance.
+        :param e: Message instance.
+        :return: None.
+        """
+        self.adapter = e.adapter
+        self.adapter_name = e.adapter
+        self.log = None
+        self.seq = e.seq
+        self.notice = e.notice
+        self.msg = e.msg
+        self.file = e.file
+        self.time = e.time
+        self.user = getattr(e.user, 'id', e.user)
+        self.group = getattr(e.group, 'id', e.group)
+        self.channel = getattr(e.channel, 'id', e.channel)
+        self.guild = getattr(e.guild, 'id', e.guild)
+        self.isBot = e.isBot
+        self.isFriend = e.isFriend
+        self.isPrivate = e.isPrivate
+        self.isGroup = e.isGroup
+        self.isGuild = e.isGuild
+        self.isMaster = e.isMaster
+        self.replies: List[dict] = []
+
+    def reply(
+            self,
+            msg: object
+    ) -> bool:
+        """
+        中文:
+        记录回复, 进程中的插件方法应同步调用。
+        :param msg: 回复消息实例或文本。
+        :return: 是否成功记录(bool)。
+
+        English:
+        Record a reply, plugin methods in the process should call it synchronously.
+        :param msg: Reply message instance or text.
+        :return: Whether it is recorded(bool).
+        """
+        if isinstance(msg, str):
+            self.replies.append({ 'msg': msg })
+            return True
+        self.replies.append(
+            {
+                _key: getattr(msg, _key, None) for _key in ['msg', 'file', 'at_sender', 'notice', 'operation']
+            }
+        )
         return True
 
+    def restore(
+            self,
+            e: Message
+    ) -> List[object]:
+        """
+        中文:
+        在主进程中还原回复消息实例。
+        :param e: 原消息实例。
+        :return: 回复消息实例列表。
+
+        English:
+        Restore reply message instances in the main process.
+        :param e: Original message instance.
+        :return: Reply message instance list.
+        """
+        _return = []
+        for _data in self.replies:
+            _reply = ReplyMessage(self)
+            [setattr(_reply, _key, _value) for _key, _value in _data.items() if _value is not None]
+            _reply.e = e
+            _return.append(_reply)
+        return _return
+
+
+# 消息实例池
+# Message instance pool
+class MessagePool:
+    """
+    中文:
+    消息实例池, 为每条消息提供独立的消息实例, 并复用处理完成的实例以减少内存分配。
+    回收的实例会被清空并分配给之后的消息, 插件在处理返回后仍持有 e (例如在 create_task 或闭包中) 时会读到其他消息的内容,
+    因此 size 为 0 时不复用实例, 由适配器的 message_pool_size 按需开启。
+
+    属性:
+        parameter: 通用消息参数
+        size: 池中最多保留的空闲实例数
+
+    私有属性:
+        _free: 空闲实例列表
+
+    方法:
+        acquire: 获取并载入消息实例
+        release: 回收消息实例
+
+    English:
+    Message instance pool, provides an independent message instance for every message,
+    and reuses instances that finished processing to reduce allocation.
+    Released instances are cleared and handed to later messages, so a plugin keeping e after its handler
+    returns (e.g. in create_task or a closure) would read another message; instances are therefore not reused
+    when size is 0, and adapters opt in through message_pool_size.
+
+    Attributes:
+        parameter: Common message parameters
+        size: Max number of free instances kept in the pool
+
+    Private attributes:
+        _free: Free instance list
+
+    Methods:
+        acquire: Acquire and load a message instance
+        release: Release a message instance
+    """
+
+    def __init__(
+            self,
+            parameter: dict,
+            size: int = 0
+    ) -> None:
+        """
+        中文:
+        初始化消息实例池。
+        :param parameter: 通用消息参数(dict)。
+        :param size: 池中最多保留的空闲实例数, 为 0 时不复用实例。
+        :return: None.
+
+        English:
+        Initialize the message instance pool.
+        :param parameter: Common message parameters(dict).
+        :param size: Max number of free instances kept in the pool, instances are not reused if 0.
+        :return: None.
+        """
+        self.parameter = parameter
+        self.size = size
+        self._free: List[Message] = []
+
+    def acquire(
+            self,
+            parameter: dict
+    ) -> Message:
+        """
+        中文:
+        获取并载入消息实例, 池为空时新建实例。
+        :param parameter: 消息特性参数(dict)。
+        :return: 消息实例。
+
+        English:
+        Acquire and load a message instance, create a new one if the pool is empty.
+        :param parameter: Message feature parameters(dict).
+        :return: Message instance.
+        """
+        e = self._free.pop() if self._free else Message(self.parameter)
+        e.load(parameter)
+        return e
+
+    def release(
+            self,
+            e: Message
+    ) -> None:
+        """
+        中文:
+        回收消息实例, 回收后的实例不应再被使用。
+        :param e: 消息实例。
+        :return: None.
+
+        English:
+        Release a message instance, the instance should not be used after releasing.
+        :param e: Message instance.
+        :return: None.
+        """
+        if len(self._free) < self.size:
+            e.clear()
+            self._free.append(e)
+
 
 # noinspection PyMethodMayBeStatic
 # 单回复简化消息
@@ -185,6 +693,52 @@ class ReplyMessage:
         self.log = e.log
         self.e = e
 
+    # 记录日志
+    # Write a log
+    async def _log(
+            self,
+            level: str,
+            message: dict
+    ) -> None:
+        """
+        中文:
+        记录日志, 进程池中的消息快照没有日志实例, 此时不记录。
+        :param level: 日志级别方法名。
+        :param message: 日志内容。
+        :return: None.
+
+        English:
+        Write a log, message snapshots in the process pool have no log instance, nothing is written then.
+        :param level: Log level method name.
+        :param message: Log content.
+        :return: None.
+        """
+        if self.log is not None:
+            await getattr(self.log, level)(message)
+
+    # 交给消息实例发送
+    # Hand over to the message instance for sending
+    async def _send(
+            self,
+            e: object
+    ) -> bool:
+        """
+        中文:
+        交给消息实例发送, 适配器的回复方法为协程, 快照的回复方法为同步方法。
+        :param e: 回复消息实例。
+        :return: 是否成功发送消息(bool)。
+
+        English:
+        Hand over to the message instance for sending, the adapter reply method is a coroutine
+        while the snapshot one is synchronous.
+        :param e: Reply message instance.
+        :return: Whether the message was sent successfully(bool).
+        """
+        _result = self.e.reply(e)
+        if inspect.isawaitable(_result):
+            _result = await _result
+        return _result
+
     # 回复消息
     # Reply message
     async def reply(
@@ -221,7 +775,7 @@ class ReplyMessage:
         # 使用消息对象进行回复
         # Reply using message object
         if e:
-            return await self.e.reply(e)
+            return await self._send(e)
 
         # 发送消息
         # Send message
@@ -235,7 +789,8 @@ class ReplyMessage:
             # 文件类型错误，应当为 bytes 或 list
             # File type error, should be bytes or list
             if file:
-                self.log.warn(
+                await self._log(
+                    'warn',
                     {
                         'zh': f'[{self.adapter_name}] 文件类型错误，应当为 bytes 或 list',
                         'en': f'[{self.adapter_name}] File type error, should be bytes or list'
@@ -244,18 +799,20 @@ class ReplyMessage:
             # 发送消息的同时不能进行操作
             # Cannot operate while sending messages
             if operation:
-                self.log.warn(
+                await self._log(
+                    'warn',
                     {
                         'zh': f'[{self.adapter_name}] 发送消息的同时不能进行操作',
                         'en': f'[{self.adapter_name}] Cannot operate while sending messages'
                     }
                 )
-            return self.e.reply(self)
+            return await self._send(self)
 
         # 消息类型错误，应当为 str
         # Message type error, should be str
         if msg and (not isinstance(msg, str)):
-            self.log.error(
+            await self._log(
+                'error',
                 {
                     'zh': f'[{self.adapter_name}] 消息类型错误，应当为 str',
                     'en': f'[{self.adapter_name}] Message type error, should be str'
@@ -272,18 +829,20 @@ class ReplyMessage:
             # 发送文件的同时不能进行操作
             # Cannot operate while sending files
             if operation:
-                self.log.warn(
+                await self._log(
+                    'warn',
                     {
                         'zh': f'[{self.adapter_name}] 发送文件的同时不能进行操作',
                         'en': f'[{self.adapter_name}] Cannot operate while sending files'
                     }
                 )
-            return self.e.reply(self)
+            return await self._send(self)
 
         # 文件类型错误，应当为 bytes 或 list
         # File type error, should be bytes or list
         if file and (not isinstance(file, (bytes, list))):
-            self.log.error(
+            await self._log(
+                'error',
                 {
                     'zh': f'[{self.adapter_name}] 文件类型错误，应当为 bytes 或 list',
                     'en': f'[{self.adapter_name}] File type error, should be bytes or list'
@@ -297,19 +856,22 @@ class ReplyMessage:
             if operation:
                 self.operation = operation
                 self.notice = 'operation'
-                self.log.warn(
-                    {
-                        'zh': f'[{self.adapter_name}] 进行操作的同时不能进行回复',
-                        'en': f'[{self.adapter_name}] Cannot operate while replying'
-                    }
-                ) if quote else None
+                if quote:
+                    await self._log(
+                        'warn',
+                        {
+                            'zh': f'[{self.adapter_name}] 进行操作的同时不能进行回复',
+                            'en': f'[{self.adapter_name}] Cannot operate while replying'
+                        }
+                    )
             if (not operation) and at_sender:
                 self.at_sender = at_sender
                 self.notice = 'at' if not quote else 'quote at'
             # 进行操作的同时不能进行 at
             # Cannot operate while at
             if operation and at_sender:
-                self.log.warn(
+                await self._log(
+                    'warn',
                     {
                         'zh': '进行操作的同时不能进行 at',
                         'en': 'Cannot operate while at'
@@ -318,7 +880,8 @@ class ReplyMessage:
             # 要发送消息不能为空
             # Message cannot be empty
             if (not operation) and (not at_sender):
-                self.log.error(
+                await self._log(
+                    'error',
                     {
                         'zh': f'[{self.adapter_name}] 要发送消息不能为空',
                         'en': f'[{self.adapter_name}] Message cannot be empty'
@@ -326,4 +889,4 @@ class ReplyMessage:
                 )
                 return False
 
-            return self.e.reply(self)
+            return await self._send(self)
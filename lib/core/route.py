@@ -0,0 +1,203 @@
+from typing import Dict, List, Tuple, Union
+
+
+# 消息路由表
+# Message routing table
+class Route:
+    """
+    中文:
+    消息路由表, 在载入时根据 use_tree 与各启用列表为每个适配器预先计算可用的转译器和插件。
+    路由表构建完成后不再修改, 配置变更时应构建新的路由表并整体替换。
+
+    属性:
+        cfg: 适配器、转译器、插件配置
+        table: 以适配器名称为键的路由表
+
+    方法:
+        translators: 获取适配器可用的转译器
+        plugins: 获取适配器 (经转译器) 可用的插件
+
+    私有方法:
+        _allow: 判断配置条目是否允许目标
+        _build: 构建单个适配器的路由
+        _route: 获取适配器的路由
+
+    English:
+    Message routing table, precomputes the translators and plugins available to every adapter
+    from use_tree and the enable lists at load time.
+    The table is never modified once built, a new table should be built and swapped in as a whole
+    when the config changes.
+
+    Attributes:
+        cfg: Adapter, translator and plugin config
+        table: Routing table keyed by adapter name
+
+    Methods:
+        translators: Get the translators available to an adapter
+        plugins: Get the plugins available to an adapter (through a translator)
+
+    Private methods:
+        _allow: Determine whether a config entry allows the target
+        _build: Build the route of a single adapter
+        _route: Get the route of an adapter
+    """
+
+    def __init__(
+            self,
+            cfg: Dict[str, dict],
+            adapters: List[str],
+            translators: List[str],
+            plugins: List[str]
+    ) -> None:
+        """
+        中文:
+        构建路由表。
+        :param cfg: 包含 adapter、translator、plugin 三项的配置字典。
+        :param adapters: 适配器名称列表。
+        :param translators: 按优先级排序的转译器名称列表。
+        :param plugins: 按优先级排序的插件名称列表。
+        :return: None.
+
+        English:
+        Build the routing table.
+        :param cfg: Config dict containing adapter, translator and plugin.
+        :param adapters: Adapter name list.
+        :param translators: Translator name list sorted by priority.
+        :param plugins: Plugin name list sorted by priority.
+        :return: None.
+        """
+        self.cfg = cfg
+        self.table = { }
+        self._translators = list(translators)
+        self._plugins = list(plugins)
+
+        for _adapter in adapters:
+            self.table[_adapter] = self._build(_adapter)
+
+    def _allow(
+            self,
+            entry: dict,
+            key: str,
+            name: str
+    ) -> bool:
+        """
+        中文:
+        判断配置条目是否允许目标, 未启用 use_tree 时总是允许。
+        :param entry: 配置条目。
+        :param key: 启用列表键名。
+        :param name: 目标名称。
+        :return: 是否允许(bool)。
+
+        English:
+        Determine whether a config entry allows the target, always allowed if use_tree is off.
+        :param entry: Config entry.
+        :param key: Enable list key.
+        :param name: Target name.
+        :return: Whether it is allowed(bool).
+        """
+        return (not entry.get('use_tree')) or (name in entry.get(key, []))
+
+    def _build(
+            self,
+            adapter: str
+    ) -> dict:
+        """
+        中文:
+        构建单个适配器的路由。
+        :param adapter: 适配器名称。
+        :return: 适配器路由(dict)。
+
+        English:
+        Build the route of a single adapter.
+        :param adapter: Adapter name.
+        :return: Adapter route(dict).
+        """
+        _adapter_cfg = self.cfg.get('adapter', { }).get(adapter, { })
+        _translator_cfg = self.cfg.get('translator', { })
+        _plugin_cfg = self.cfg.get('plugin', { })
+
+        _translators = tuple(
+            _name for _name in self._translators
+            if self._allow(_adapter_cfg, 'enable_translator', _name)
+        )
+        _listen = [
+            _name for _name in self._plugins
+            if self._allow(_plugin_cfg.get(_name, { }), 'listen_adapter', adapter)
+        ]
+
+        return {
+            'translators': _translators,
+            'plugins': frozenset(
+                _name for _name in _listen
+                if self._allow(_adapter_cfg, 'enable_direct_plugin', _name)
+            ),
+            'translator_plugins': {
+                _translator: frozenset(
+                    _name for _name in _listen
+                    if self._allow(_adapter_cfg, 'enable_plugin', _name)
+                    and self._allow(_plugin_cfg.get(_name, { }), 'listen_translator', _translator)
+                    and self._allow(_translator_cfg.get(_translator, { }), 'enable_plugin', _name)
+                ) for _translator in _translators
+            }
+        }
+
+    def _route(
+            self,
+            adapter: str
+    ) -> dict:
+        """
+        中文:
+        获取适配器的路由, 不在表中的适配器每次临时计算, 不写入路由表。
+        :param adapter: 适配器名称。
+        :return: 适配器路由(dict)。
+
+        English:
+        Get the route of an adapter, adapters missing from the table are computed on every call
+        without being written to the table.
+        :param adapter: Adapter name.
+        :return: Adapter route(dict).
+        """
+        _route = self.table.get(adapter)
+        return self._build(adapter) if _route is None else _route
+
+    def translators(
+            self,
+            adapter: str
+    ) -> Tuple[str, ...]:
+        """
+        中文:
+        获取适配器可用的转译器。
+        :param adapter: 适配器名称。
+        :return: 按优先级排序的转译器名称。
+
+        English:
+        Get the translators available to an adapter.
+        :param adapter: Adapter name.
+        :return: Translator names sorted by priority.
+        """
+        _route = self._route(adapter)
+        return _route['translators']
+
+    def plugins(
+            self,
+            adapter: str,
+            translator: Union[str, None] = None
+    ) -> frozenset:
+        """
+        中文:
+        获取适配器可用的插件, 传入转译器名称时返回经该转译器可用的插件。
+        :param adapter: 适配器名称。
+        :param translator: 转译器名称。
+        :return: 插件名称集合。
+
+        English:
+        Get the plugins available to an adapter, return the plugins available through
+        the translator when its name is passed in.
+        :param adapter: Adapter name.
+        :param translator: Translator name.
+        :return: Plugin name set.
+        """
+        _route = self._route(adapter)
+        if translator is None:
+            return _route['plugins']
+        return _route['translator_plugins'].get(translator, frozenset())
@@ -0,0 +1,277 @@
+import asyncio
+import re
+from typing import AbstractSet, Dict, List, Union
+
+try:
+    from re import _constants as constants, _parser as parser
+except ImportError:
+    import sre_constants as constants
+    import sre_parse as parser
+
+
+# 插件匹配索引
+# Plugin dispatch index
+class Index:
+    """
+    中文:
+    插件匹配索引, 在载入时将全部插件的匹配式编译为一个组合匹配器,
+    单次匹配即可得到全部命中的 (插件, 函数)。
+    以字面量开头的匹配式 (如 ^#帮助) 存入前缀树, 只有消息开头命中前缀时才进行完整匹配。
+
+    属性:
+        entries: 匹配式条目列表
+        matcher: 组合匹配器
+        trie: 字面量前缀树
+
+    私有属性:
+        _fallback: 无法合并的匹配式条目
+
+    方法:
+        match: 返回全部匹配成功的条目
+
+    私有方法:
+        _prefix: 提取匹配式的字面量前缀
+        _mergeable: 判断匹配式是否可以合并
+        _references: 判断解析树中是否含有组号引用
+        _walk: 沿前缀树查找消息开头命中的条目
+
+    English:
+    Plugin dispatch index, compiles the patterns of every plugin into one combined
+    matcher at load time, a single match returns every hit (plugin, function).
+    Patterns starting with a literal (e.g. ^#help) are stored in a prefix trie and are only
+    fully matched when the message starts with that prefix.
+
+    Attributes:
+        entries: Pattern entry list
+        matcher: Combined matcher
+        trie: Literal prefix trie
+
+    Private attributes:
+        _fallback: Entries that can not be merged
+
+    Methods:
+        match: Return every matched entry
+
+    Private methods:
+        _prefix: Extract the literal prefix of a pattern
+        _mergeable: Determine whether a pattern can be merged
+        _references: Determine whether a parse tree refers to group numbers
+        _walk: Walk the prefix trie to find entries hit at the start of the message
+    """
+
+    def __init__(
+            self,
+            plugins: Dict[str, object]
+    ) -> None:
+        """
+        中文:
+        构建匹配索引, 插件应已按优先级排序。
+        :param plugins: 插件实例字典。
+        :return: None.
+
+        English:
+        Build the dispatch index, plugins should already be sorted by priority.
+        :param plugins: Plugin instance dictionary.
+        :return: None.
+        """
+        self.entries = []
+        self.matcher = None
+        self.trie = { }
+        self._fallback = []
+
+        _groups = []
+        for _name, _plugin in plugins.items():
+            for _reg in getattr(_plugin, 'dsc', []):
+                try:
+                    _compiled = re.compile(_reg['reg'])
+                except (re.error, KeyError, TypeError):
+                    continue
+                # 载入时解析插件方法并判断是否为协程方法
+                # Resolve the plugin method and whether it is a coroutine at load time
+                _handler = getattr(_plugin, _reg.get('fnc') or '', None)
+                _entry = {
+                    'id': len(self.entries),
+                    'name': _name,
+                    'plugin': _plugin,
+                    'fnc': _reg.get('fnc'),
+                    'handler': _handler,
+                    'coroutine': asyncio.iscoroutinefunction(_handler),
+                    'executor': _reg.get('executor', getattr(_plugin, 'executor', None)),
+                    'pri': _plugin.pri,
+                    'reg': _compiled
+                }
+                self.entries.append(_entry)
+
+                # 前缀树节点中以空字符串为键存放条目 id
+                # Entry ids are stored in trie nodes under the empty string key
+                _prefix = self._prefix(_compiled)
+                if _prefix:
+                    _node = self.trie
+                    for _char in _prefix:
+                        _node = _node.setdefault(_char, { })
+                    _node.setdefault('', []).append(_entry['id'])
+                elif self._mergeable(_compiled):
+                    _groups.append(f'(?:(?=(?P<_{_entry["id"]}>{_reg["reg"]})))?')
+                else:
+                    self._fallback.append(_entry)
+
+        # 每个匹配式包装为可选前瞻, 一次 match 即可检查全部匹配式
+        # Every pattern is wrapped as an optional lookahead, one match checks all of them
+        if _groups:
+            self.matcher = re.compile(''.join(_groups))
+
+    def _prefix(
+            self,
+            compiled: re.Pattern
+    ) -> str:
+        """
+        中文:
+        提取匹配式的字面量前缀, 忽略大小写的匹配式不提取。
+        :param compiled: 编译后的匹配式。
+        :return: 字面量前缀(str), 无前缀时为空字符串。
+
+        English:
+        Extract the literal prefix of a pattern, case-insensitive patterns are skipped.
+        :param compiled: Compiled pattern.
+        :return: Literal prefix(str), empty string if there is none.
+        """
+        if compiled.flags & re.IGNORECASE:
+            return ''
+        try:
+            _parsed = parser.parse(compiled.pattern, compiled.flags)
+        except (re.error, TypeError):
+            return ''
+
+        _prefix = []
+        for _op, _av in _parsed:
+            if _op is constants.AT and _av in (constants.AT_BEGINNING, constants.AT_BEGINNING_STRING) and not _prefix:
+                continue
+            if _op is constants.LITERAL:
+                _prefix.append(chr(_av))
+                continue
+            break
+        return ''.join(_prefix)
+
+    def _mergeable(
+            self,
+            compiled: re.Pattern
+    ) -> bool:
+        """
+        中文:
+        判断匹配式是否可以合并, 含命名组、反向引用、条件组或全局标记的匹配式单独匹配。
+        :param compiled: 编译后的匹配式。
+        :return: 是否可以合并(bool)。
+
+        English:
+        Determine whether a pattern can be merged, patterns containing named groups,
+        back references, conditional groups or global flags are matched separately.
+        :param compiled: Compiled pattern.
+        :return: Whether it can be merged(bool).
+        """
+        if compiled.groupindex:
+            return False
+        if re.search(r'\(\?[aiLmsux]+\)', compiled.pattern):
+            return False
+        # 反向引用与条件组按组号引用, 合并后组号偏移会改变匹配结果
+        # Back references and conditional groups refer to group numbers, which shift once merged
+        try:
+            _parsed = parser.parse(compiled.pattern, compiled.flags)
+        except (re.error, TypeError):
+            return False
+        return not self._references(_parsed)
+
+    def _references(
+            self,
+            node: parser.SubPattern
+    ) -> bool:
+        """
+        中文:
+        递归判断解析树中是否含有反向引用或条件组。
+        :param node: 解析树节点。
+        :return: 是否含有组号引用(bool)。
+
+        English:
+        Recursively determine whether a parse tree contains back references or conditional groups.
+        :param node: Parse tree node.
+        :return: Whether it refers to group numbers(bool).
+        """
+        for _op, _av in node:
+            if _op is constants.GROUPREF or _op is constants.GROUPREF_EXISTS:
+                return True
+            # 子模式可能位于参数元组或分支列表中
+            # Sub patterns may sit in argument tuples or branch lists
+            for _value in _av if isinstance(_av, (list, tuple)) else ():
+                _children = _value if isinstance(_value, list) else [_value]
+                if any(isinstance(_child, parser.SubPattern) and self._references(_child) for _child in _children):
+                    return True
+        return False
+
+    def _walk(
+            self,
+            text: str
+    ) -> List[int]:
+        """
+        中文:
+        沿前缀树查找消息开头命中的条目。
+        :param text: 消息文本。
+        :return: 前缀命中的条目 id 列表。
+
+        English:
+        Walk the prefix trie to find entries hit at the start of the message.
+        :param text: Message text.
+        :return: Entry id list whose prefix is hit.
+        """
+        _ids = []
+        _node = self.trie
+        for _char in text:
+            _node = _node.get(_char)
+            if _node is None:
+                break
+            _ids.extend(_node.get('', ()))
+        return _ids
+
+    def match(
+            self,
+            text: str,
+            allow: Union[AbstractSet[str], None] = None
+    ) -> List[dict]:
+        """
+        中文:
+        返回全部匹配成功的条目, 每个插件只保留第一个命中的匹配式, 按优先级排序。
+        :param text: 消息文本。
+        :param allow: 允许的插件名称集合, 为空时不做限制。
+        :return: 匹配成功的条目列表。
+
+        English:
+        Return every matched entry, only the first hit pattern of each plugin is kept,
+        sorted by priority.
+        :param text: Message text.
+        :param allow: Allowed plugin name set, no restriction if None.
+        :return: Matched entry list.
+        """
+        if not isinstance(text, str):
+            return []
+
+        _hits = set()
+        if self.matcher:
+            _result = self.matcher.match(text)
+            if _result:
+                _hits.update(int(_key[1:]) for _key, _value in _result.groupdict().items() if _value is not None)
+        for _entry in self._fallback:
+            if (allow is None or _entry['name'] in allow) and _entry['reg'].match(text):
+                _hits.add(_entry['id'])
+        for _i in self._walk(text):
+            _entry = self.entries[_i]
+            if (allow is None or _entry['name'] in allow) and _entry['reg'].match(text):
+                _hits.add(_i)
+
+        _return = []
+        _seen = set()
+        for _i in sorted(_hits):
+            _entry = self.entries[_i]
+            if _entry['name'] in _seen or (allow is not None and _entry['name'] not in allow):
+                continue
+            _seen.add(_entry['name'])
+            _return.append(_entry)
+
+        return _return
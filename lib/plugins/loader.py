@@ -3,6 +3,8 @@ import importlib
 import os
 from collections import OrderedDict
 
+from .index import Index
+
 
 class Plugin:
     """
@@ -12,15 +14,18 @@ class Plugin:
         _plugin_path: 插件路径。
         _plugins_path: 插件路径列表。
         plugins: 插件实例字典。
+        index: 插件匹配索引。
         cfg: 配置信息。
         log: 日志实例。
         lang: 语言。
+        tasks: 插件载入时创建的后台任务。
 
     方法:
         _get_dir_list: 获取插件目录列表。
         _load_plugin: 加载插件。
-        _plugin_array: 插件排序。
+        _plugin_array: 插件排序并构建匹配索引。
         load: 插件载入。
+        spawn: 创建并持有后台任务, 失败时记录日志。
 
     English:
     Plugin loader.
@@ -28,15 +33,18 @@ class Plugin:
         _plugin_path: Plugin path.
         _plugins_path: Plugin path list.
         plugins: Plugin instance dictionary.
+        index: Plugin dispatch index.
         cfg: Configuration information.
         log: Log instance.
         lang: Language.
+        tasks: Background tasks created while loading plugins.
 
     Method:
         _get_dir_list: Get the list of plugin directories.
         _load_plugin: Load the plugin.
-        _plugin_array: Plugin sorting.
+        _plugin_array: Plugin sorting and build dispatch index.
         load: Plugin loading.
+        spawn: Create and hold a background task, failures are logged.
     """
 
     def __init__(
@@ -58,9 +66,11 @@ class Plugin:
         self._plugin_path = './plugins'
         self._plugins_path = []
         self.plugins = { }
+        self.index = Index({ })
         self.cfg = cfg
         self.log = None
         self.lang = None
+        self.tasks = set()
 
     def _get_dir_list(
             self
@@ -117,6 +127,44 @@ class Plugin:
                 else:
                     await self.log.error(_line)
 
+    def spawn(
+            self,
+            coroutine
+    ) -> asyncio.Task:
+        """
+        中文:
+        创建后台任务并持有引用直到完成, 避免任务在运行前被回收, 任务失败时记录日志。
+        :param coroutine: 协程。
+        :return: 任务实例。
+
+        English:
+        Create a background task and hold a reference until it finishes, so it is not collected before it runs,
+        failures of the task are logged.
+        :param coroutine: Coroutine.
+        :return: Task instance.
+        """
+        _task = asyncio.create_task(coroutine)
+        self.tasks.add(_task)
+        _task.add_done_callback(self._done)
+        return _task
+
+    def _done(
+            self,
+            task: asyncio.Task
+    ) -> None:
+        self.tasks.discard(task)
+        if task.cancelled() or task.exception() is None:
+            return
+        _task_fail_log = {
+            'zh': ': 插件后台任务失败:',
+            'en': ': Plugin background task failed:'
+        }
+        # 日志任务只持有引用, 不再检查失败, 避免日志本身出错时反复重试
+        # The log task is only held, its failure is not checked again so a failing log does not loop
+        _log = asyncio.create_task(self.log.error(f'[loader]{_task_fail_log[self.lang]} {task.exception()!r}'))
+        self.tasks.add(_log)
+        _log.add_done_callback(self.tasks.discard)
+
     def _plugin_array(
             self
     ) -> None:
@@ -130,6 +178,7 @@ class Plugin:
         _new_plugin = OrderedDict((_dict['name'], _dict['plugin']) for _dict in _list)
 
         self.plugins = _new_plugin
+        self.index = Index(self.plugins)
 
     async def load(
             self,
@@ -156,6 +205,7 @@ class Plugin:
 
         for _name, _plugin in self.plugins.items():
             try:
+                _plugin.loader = self
                 _plugin.load(bot, self.cfg)
             except AttributeError:
                 _load_fail_log = {
@@ -165,6 +215,11 @@ class Plugin:
 
                 await self.log.error(f'[loader] {_name}{_load_fail_log[self.lang]}')
 
+        # 载入与运行处于不同的事件循环, 返回前等待载入时创建的任务完成
+        # Loading and running use different event loops, wait for the tasks created while loading before returning
+        while self.tasks:
+            await asyncio.wait(set(self.tasks))
+
         self._plugin_array()
 
         return self.plugins
@@ -4,6 +4,24 @@ from typing import Union
 from ..core.message import ReplyMessage
 
 
+# 停止传播标记的类型
+# Type of the stop propagation marker
+class _Stop:
+    def __repr__(self) -> str:
+        return 'STOP'
+
+    # 按模块全局名称序列化, 进程池返回后仍为同一对象
+    # Pickled by its module global name, so it is still the same object once returned from the process pool
+    def __reduce__(self) -> str:
+        return 'STOP'
+
+
+# 插件方法返回该值时停止向后续优先级的插件传播, 按 is 比较, 不会与普通返回值混淆
+# Returned by a plugin method to stop propagating to plugins with lower priority,
+# compared with is so it is never confused with ordinary return values
+STOP = _Stop()
+
+
 # 插件基类
 # TODO: 增加一个数据库接口
 # noinspection PyMethodMayBeStatic
@@ -11,6 +29,10 @@ class Plugin:
     """
     中文:
     插件基类
+    适配器开启 message_pool_size 时, 消息实例 e 只在插件方法返回前有效, 之后会被清空并复用于其他消息;
+    需要在返回后继续使用的内容应先复制出来, 或保存 e.snapshot()。
+    声明 executor = "process" 的方法在进程池中新建的实例上运行, 只能使用 cfg、replymessage 与 log,
+    bot 为 None, 回复由 e.reply 记录后交给主进程发送。
 
     属性:
         name: 插件名称
@@ -19,9 +41,11 @@ class Plugin:
         replymessage: 回复消息构建实例
         pri: 优先级
         dsc: 匹配式
+        STOP: 停止传播返回值
         bot: 机器人实例
         cfg: 配置信息
         log: 日志实例
+        loader: 插件载入器, 载入前由载入器设置
 
     方法:
         load: 插件载入
@@ -30,6 +54,11 @@ class Plugin:
 
     English:
     Plugin base class
+    When an adapter enables message_pool_size, the message instance e is only valid until the plugin method
+    returns, after which it is cleared and reused for other messages; copy out anything needed afterwards,
+    or keep e.snapshot().
+    Methods declaring executor = "process" run on a new instance in the process pool, only cfg, replymessage
+    and log are available there, bot is None, replies are recorded by e.reply and sent by the main process.
 
     Attribute:
         name: Plugin name
@@ -38,9 +67,11 @@ class Plugin:
         replymessage: Reply message construction instance
         pri: Priority
         dsc: Matching type
+        STOP: Stop propagation return value
         bot: Bot instance
         cfg: Configuration information
         log: Log instance
+        loader: Plugin loader, set by the loader before loading
 
     Method:
         load: Plugin loading
@@ -58,6 +89,8 @@ class Plugin:
 
     # 优先级
     pri: int
+    # 停止传播返回值
+    STOP = STOP
     # 匹配式
     dsc = [
         {
@@ -72,6 +105,8 @@ class Plugin:
     cfg: dict
     # 日志实例
     log: object
+    # 插件载入器
+    loader: object
 
     # 初始化
     def __init__(
@@ -102,11 +137,13 @@ class Plugin:
         self.bot = bot
         self.replymessage = ReplyMessage
         self.log = bot.log
-        self.log.info(
-            {
-                'zh': f'[{self.name}] 插件已载入',
-                'en': f'[{self.name}] Plugin has been loaded'
-            }
+        self.loader.spawn(
+            self.log.info(
+                {
+                    'zh': f'[{self.name}] 插件已载入',
+                    'en': f'[{self.name}] Plugin has been loaded'
+                }
+            )
         )
 
     # 消息匹配
@@ -127,7 +164,7 @@ class Plugin:
         """
         for _reg in self.dsc:
 
-            if re.match(re.compile(_reg['reg']), e.message):
+            if re.match(_reg['reg'], e.msg):
                 return _reg['fnc']
 
         return False
@@ -148,9 +185,7 @@ class Plugin:
         :param e: Message instance.
         :return: Whether it is successful(bool).
         """
-        e.reply(
-            self.replymessage(e).reply(
-                msg=e.msg
-            )
+        await self.replymessage(e).reply(
+            msg=e.msg
         )
         return True